@@ -2,10 +2,21 @@ from typing import Dict
 import os
 import uvicorn
 from fastapi import FastAPI
+from app_lib.utils.local_cacher import warm_up_from_manifest
+
+# calls recorded by LocalCacher with call_manifest_path are replayed before the app serves requests
+CALL_MANIFEST_PATH = os.getenv('LOCAL_CACHER_CALL_MANIFEST_PATH')
 
 app = FastAPI()
 
 
+@app.on_event('startup')
+def warm_up_cache() -> None:
+    # uvicorn accepts connections once startup hooks return so pods are not ready while warming up
+    if CALL_MANIFEST_PATH is not None and os.path.exists(CALL_MANIFEST_PATH):
+        warm_up_from_manifest(manifest_path=CALL_MANIFEST_PATH)
+
+
 @app.get('/')
 def root() -> Dict[str, str]:
     a = 'a'
@@ -8,6 +8,8 @@ ROOT_DIR = os.path.join(__this_file_location, os.pardir)
 LIB_DIR = os.path.join(ROOT_DIR, 'app_lib')
 TEMPLATE_DIR = os.path.join(ROOT_DIR, 'templates')
 LOCAL_CACHE_DIR = os.path.join(ROOT_DIR, 'cache')
+# read only base layer of cache, bundle files or cache directories baked into images
+LOCAL_CACHE_BASE_DIR = os.path.join(ROOT_DIR, 'cache_base')
 LOCAL_FILE_DIR = os.path.join(ROOT_DIR, 'local_files')
 K8S_DIR = os.path.join(ROOT_DIR, 'k8s')
 
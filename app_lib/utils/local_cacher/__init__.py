@@ -0,0 +1,92 @@
+from app_lib.utils.local_cacher.meta_data import (
+    DATETIME_FORMAT_STR,
+    DEFAULT_CACHE_VALIDITY_HOURS,
+    DEFAULT_COLUMNS_KWARG,
+    DEFAULT_USE_CACHE_KWARG,
+    LocalCacheException,
+    MetaData,
+)
+from app_lib.utils.local_cacher.compression import (
+    ADAPTIVE_COMPRESSION,
+    NO_COMPRESSION,
+    get_available_codec_names,
+)
+from app_lib.utils.local_cacher.cache_entries import CallPlan
+from app_lib.utils.local_cacher.cache_handlers import (
+    CompressedObjectCacheHandler,
+    DataFrameCacheHandler,
+    HandlerConfig,
+    NumpyCacheHandler,
+    ObjectCacheHandler,
+    OutOfBandObjectCacheHandler,
+    ParquetCacheHandler,
+)
+from app_lib.utils.local_cacher.eviction import EvictionConfig
+from app_lib.utils.local_cacher.failures import (
+    DEFAULT_FAILURE_VALIDITY_HOURS,
+    CachedFailure,
+    FailureConfig,
+)
+from app_lib.utils.local_cacher.instrumentation import (
+    CacheCounters,
+    CacheInstrumentation,
+    CacheMetricsSink,
+    CacheMetricsSnapshot,
+    LoggingMetricsSink,
+    PrometheusMetricsSink,
+)
+from app_lib.utils.local_cacher.lazy_frames import LazyDataFrame
+from app_lib.utils.local_cacher.layouts import (
+    FLAT_LAYOUT,
+    SHARDED_LAYOUT,
+)
+from app_lib.utils.local_cacher.memory_tier import (
+    CacheTierStats,
+    MemoryCacheTier,
+)
+from app_lib.utils.local_cacher.meta_data_store import (
+    COST_EVICTION,
+    LFU_EVICTION,
+    LRU_EVICTION,
+    CacheEntryStats,
+    EvictableMetaDataStore,
+    JsonMetaDataStore,
+    MetaDataStore,
+    SqliteMetaDataStore,
+    get_meta_data_store,
+)
+from app_lib.utils.local_cacher.partitions import (
+    CONCAT_PARTITIONS,
+    MERGE_PARTITIONS,
+    PartitionSpec,
+)
+from app_lib.utils.local_cacher.ray_tier import RayObjectStoreTier
+from app_lib.utils.local_cacher.refresh import RefreshConfig
+from app_lib.utils.local_cacher.storage_backends import (
+    BundleStorageBackend,
+    FileSystemStorageBackend,
+    LayeredStorageBackend,
+    RedisStorageBackend,
+    StorageBackend,
+    StorageConfig,
+)
+from app_lib.utils.local_cacher.tiers import (
+    CacheTiers,
+    TierConfig,
+)
+from app_lib.utils.local_cacher.time_ranges import (
+    DEFAULT_MAX_TIME_RANGE_SEGMENTS,
+    TimeRangeSegment,
+    TimeRangeSpec,
+)
+from app_lib.utils.local_cacher.warmup import (
+    CallManifest,
+    ManifestCall,
+    flush_call_manifests,
+    get_call_manifest,
+    warm_up_from_manifest,
+)
+from app_lib.utils.local_cacher.cacher import (
+    BulkLookup,
+    LocalCacher,
+)
@@ -0,0 +1,199 @@
+from typing import (
+    Collection,
+    Dict,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+)
+from dataclasses import dataclass
+import dataclasses
+import io
+import json
+import os
+import shutil
+import tarfile
+import tempfile
+from app_lib.utils.local_cacher.meta_data import (
+    TEMP_FILE_PREFIX,
+    LocalCacheException,
+    MetaData,
+)
+from app_lib.utils.local_cacher.cache_handlers import get_cache_handler_from_meta_data
+from app_lib.utils.local_cacher.layouts import get_entry_dir
+from app_lib.utils.local_cacher.meta_data_store import get_meta_data_store
+
+# bundles are uncompressed tar files. files of entries are stored by name, index is stored last
+BUNDLE_INDEX_FILE_NAME = 'bundle-index.json'
+BUNDLE_FORMAT_VERSION = 1
+
+
+@dataclass(frozen=True)
+class BundleEntry:
+    meta_data: MetaData
+    # name, offset and size in bundle of each file of entry, in order listed by its cache handler
+    files: Tuple[Tuple[str, int, int], ...]
+
+    @property
+    def size_bytes(self) -> int:
+        return sum(size for _, _, size in self.files)
+
+
+def write_bundle(
+    bundle_path: str,
+    entries: Sequence[Tuple[MetaData, Sequence[str]]],
+) -> List[MetaData]:
+    # entries are meta data and file paths of entry. returns meta data of entries written
+    # entries whose files are deleted while writing are left out
+    # bundle is written to a temporary file and renamed into place
+    bundle_dir = os.path.dirname(os.path.abspath(bundle_path))
+    temp_file_descriptor, temp_file_path = tempfile.mkstemp(prefix=TEMP_FILE_PREFIX, dir=bundle_dir)
+    os.close(temp_file_descriptor)
+    written_meta_data = []
+    index_entries = []
+    try:
+        # files linked into shard directories are stored as files, not as links to other members
+        with tarfile.open(temp_file_path, 'w', format=tarfile.PAX_FORMAT, dereference=True) as tar:
+            for meta_data, file_paths in entries:
+                try:
+                    for file_path in file_paths:
+                        tar.add(file_path, arcname=os.path.basename(file_path))
+                except FileNotFoundError:
+                    # files already added are not referenced by index
+                    continue
+                written_meta_data.append(meta_data)
+                index_entries.append({
+                    'meta_data': meta_data.__dict__,
+                    'file_names': [os.path.basename(f) for f in file_paths],
+                })
+            index_data = json.dumps({
+                'bundle_format_version': BUNDLE_FORMAT_VERSION,
+                'entries': index_entries,
+            }).encode('utf8')
+            index_info = tarfile.TarInfo(name=BUNDLE_INDEX_FILE_NAME)
+            index_info.size = len(index_data)
+            tar.addfile(index_info, io.BytesIO(index_data))
+        os.replace(temp_file_path, bundle_path)
+    except BaseException:
+        os.remove(temp_file_path)
+        raise
+    return written_meta_data
+
+
+def read_bundle_index(bundle_path: str) -> Dict[str, BundleEntry]:
+    # entries keyed by canonical file prefix. only tar headers and index are read
+    with tarfile.open(bundle_path, 'r:') as tar:
+        members = {m.name: m for m in tar.getmembers()}
+        if BUNDLE_INDEX_FILE_NAME not in members:
+            raise LocalCacheException('{} is not a cache bundle'.format(bundle_path))
+        index_file = tar.extractfile(members[BUNDLE_INDEX_FILE_NAME])
+        if index_file is None:
+            raise LocalCacheException('{} is not a cache bundle'.format(bundle_path))
+        index = json.load(index_file)
+    if index.get('bundle_format_version') != BUNDLE_FORMAT_VERSION:
+        err_str = 'bundle format version {} not available. available versions: {}'.format(
+            index.get('bundle_format_version'),
+            (BUNDLE_FORMAT_VERSION, ),
+        )
+        raise LocalCacheException(err_str)
+    bundle_entries = {}
+    for index_entry in index['entries']:
+        meta_data = MetaData(**index_entry['meta_data'])
+        bundle_entries[meta_data.canonical_file_prefix] = BundleEntry(
+            meta_data=meta_data,
+            files=tuple((f, members[f].offset_data, members[f].size) for f in index_entry['file_names']),
+        )
+    return bundle_entries
+
+
+def read_bundle_files(bundle_path: str, bundle_entry: BundleEntry) -> Dict[str, bytes]:
+    # data of each file of entry keyed by file name. each call opens bundle so reads may run concurrently
+    files = {}
+    with open(bundle_path, 'rb') as f:
+        for file_name, offset, size in bundle_entry.files:
+            f.seek(offset)
+            files[file_name] = f.read(size)
+    return files
+
+
+def extract_bundle_entry(
+    bundle_path: str,
+    bundle_entry: BundleEntry,
+    entry_dir: str,
+) -> None:
+    # files are written to a temporary directory inside entry_dir then renamed into place in listed order
+    temp_dir = tempfile.mkdtemp(prefix=TEMP_FILE_PREFIX, dir=entry_dir)
+    try:
+        files = read_bundle_files(bundle_path=bundle_path, bundle_entry=bundle_entry)
+        for file_name, data in files.items():
+            with open(os.path.join(temp_dir, file_name), 'wb') as f:
+                f.write(data)
+        for file_name in files:
+            os.replace(os.path.join(temp_dir, file_name), os.path.join(entry_dir, file_name))
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+def export_bundle(
+    cache_dir: str,
+    bundle_path: str,
+    function_names: Optional[Collection[str]],
+    cache_validity_hours: float,
+    use_meta_data_index: bool,
+) -> int:
+    # write valid entries of function_names, or of all functions, to a single bundle file
+    # returns number of entries written. entries deleted while exporting are left out
+    meta_data_store = get_meta_data_store(
+        cache_dir=cache_dir,
+        use_meta_data_index=use_meta_data_index,
+    )
+    entries = []
+    for meta_data in meta_data_store.get_all_meta_data():
+        if function_names is not None and meta_data.function_name not in function_names:
+            continue
+        if not meta_data.is_valid(cache_validity_hours=cache_validity_hours):
+            continue
+        cache_handler = get_cache_handler_from_meta_data(meta_data=meta_data)
+        file_paths = cache_handler.get_cache_file_paths(
+            meta_data=meta_data,
+            cache_dir=get_entry_dir(cache_dir=cache_dir, meta_data=meta_data),
+        )
+        entries.append((meta_data, file_paths))
+    return len(write_bundle(bundle_path=bundle_path, entries=entries))
+
+
+def import_bundle(
+    bundle_path: str,
+    cache_dir: str,
+    use_meta_data_index: bool,
+    cache_layout: str,
+) -> int:
+    # copy entries of bundle into cache_dir in cache_layout. returns number of entries imported
+    # entries keep their write time so they expire as they would have in the exported cache directory
+    # entries of cache_dir written at the same time or later are kept
+    meta_data_store = get_meta_data_store(
+        cache_dir=cache_dir,
+        use_meta_data_index=use_meta_data_index,
+    )
+    imported_count = 0
+    for canonical_file_prefix, bundle_entry in read_bundle_index(bundle_path=bundle_path).items():
+        replaced_meta_data = meta_data_store.get_meta_data(canonical_file_prefix=canonical_file_prefix)
+        if replaced_meta_data is not None:
+            if replaced_meta_data.get_write_timestamp() >= bundle_entry.meta_data.get_write_timestamp():
+                continue
+            # replaced entry may be in another layout or written by another handler
+            meta_data_store.delete_meta_data(meta_data=replaced_meta_data)
+            try:
+                get_cache_handler_from_meta_data(meta_data=replaced_meta_data).delete_cache(
+                    meta_data=replaced_meta_data,
+                    cache_dir=get_entry_dir(cache_dir=cache_dir, meta_data=replaced_meta_data),
+                )
+            except FileNotFoundError:
+                pass
+        meta_data = dataclasses.replace(bundle_entry.meta_data, cache_layout=cache_layout)
+        entry_dir = get_entry_dir(cache_dir=cache_dir, meta_data=meta_data)
+        os.makedirs(entry_dir, exist_ok=True)
+        extract_bundle_entry(bundle_path=bundle_path, bundle_entry=bundle_entry, entry_dir=entry_dir)
+        meta_data_store.write_meta_data(meta_data=meta_data, size_bytes=bundle_entry.size_bytes)
+        imported_count += 1
+    return imported_count
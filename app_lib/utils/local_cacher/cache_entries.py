@@ -0,0 +1,451 @@
+from typing import (
+    Optional,
+    Collection,
+    Callable,
+    Dict,
+    Any,
+    Iterator,
+    Sequence,
+    Tuple,
+)
+from dataclasses import dataclass
+import contextlib
+import datetime
+import functools
+import inspect
+import os
+import time
+from app_lib.utils.appx_hash import AppxHash
+from app_lib.utils.local_cacher.meta_data import (
+    DATETIME_FORMAT_STR,
+    MetaData,
+    _get_canonical_file_prefix,
+)
+from app_lib.utils.local_cacher.cache_handlers import (
+    HandlerConfig,
+    get_cache_handler_from_meta_data,
+    project_columns,
+)
+from app_lib.utils.local_cacher.eviction import SizeQuotas
+from app_lib.utils.local_cacher.instrumentation import CacheInstrumentation
+from app_lib.utils.local_cacher.lazy_frames import (
+    LazyDataFrame,
+    can_read_lazily,
+)
+from app_lib.utils.local_cacher.locks import KeyedLock
+from app_lib.utils.local_cacher.storage_backends import StorageBackend
+from app_lib.utils.local_cacher.tiers import CacheTiers
+
+# single flight locks are shared by all LocalCacher instances in the process
+_SINGLE_FLIGHT_LOCK = KeyedLock()
+
+
+def _get_function_source_hash(func: Callable[..., Any]) -> str:
+    # get function source signature
+    func_source_str = inspect.getsource(func)
+    # hash function source
+    function_source_hash = AppxHash.get_appx_hash(func_source_str)
+    return function_source_hash
+
+
+def _bind_full_kwargs(
+    parameter_names: Tuple[str, ...],
+    default_kwargs: Dict[str, Any],
+    passed_args: Tuple[Any, ...],
+    passed_kwargs: Dict[str, Any],
+) -> Dict[str, Any]:
+    # defaults are overwritten by kwargs, kwargs are overwritten by args
+    full_kwargs = default_kwargs.copy()
+    full_kwargs.update(passed_kwargs)
+    full_kwargs.update(zip(parameter_names, passed_args))
+    return full_kwargs
+
+
+def _get_kwargs_hash(
+    full_kwargs: Dict[str, Any],
+    use_cache_kwarg: Optional[str],
+    unhashable_kwargs: Optional[Collection[str]],
+) -> str:
+    # remove use_cache_kwarg from hash to prevent thrashing loops
+    # full_kwargs is not mutated since callers reuse it to call the function
+    sorted_kwarg_keys = sorted(k for k in full_kwargs if k != use_cache_kwarg)
+
+    sorted_kwarg_values = []
+    for k in sorted_kwarg_keys:
+        if unhashable_kwargs and k in unhashable_kwargs:
+            continue
+        kwarg_value: Any = full_kwargs[k]
+        sorted_kwarg_values.append(kwarg_value)
+
+    # build call signature
+    args_call_signature = (
+        sorted_kwarg_keys,
+        sorted_kwarg_values,
+    )
+    # hash call signature
+    call_signature_hash = AppxHash.get_appx_hash(input_object=args_call_signature)
+    return call_signature_hash
+
+
+@dataclass(frozen=True)
+class CallPlan:
+    # everything about a function that does not change between calls
+    # built once at decoration time so cache hits do not re-inspect the function
+    parameter_names: Tuple[str, ...]
+    default_kwargs: Dict[str, Any]
+    function_source_hash: str
+    function_name: str
+    function_file_location: str
+
+    @classmethod
+    def from_function(cls, func: Callable[..., Any]) -> 'CallPlan':
+        # https://docs.python.org/3/library/inspect.html#inspect.Parameter
+        parameters = inspect.signature(func).parameters
+        parameter_names = tuple(parameters.keys())
+        default_kwargs = {k: v.default for k, v in parameters.items() if v.default is not inspect.Parameter.empty}
+        call_plan = cls(
+            parameter_names=parameter_names,
+            default_kwargs=default_kwargs,
+            function_source_hash=_get_function_source_hash(func=func),
+            function_name=func.__name__,
+            function_file_location=inspect.getfile(func),
+        )
+        return call_plan
+
+    def get_full_kwargs(
+        self,
+        passed_args: Tuple[Any, ...],
+        passed_kwargs: Dict[str, Any],
+    ) -> Dict[str, Any]:
+        full_kwargs = _bind_full_kwargs(
+            parameter_names=self.parameter_names,
+            default_kwargs=self.default_kwargs,
+            passed_args=passed_args,
+            passed_kwargs=passed_kwargs,
+        )
+        return full_kwargs
+
+    @staticmethod
+    def get_kwargs_hash(
+        full_kwargs: Dict[str, Any],
+        use_cache_kwarg: Optional[str],
+        unhashable_kwargs: Optional[Collection[str]],
+    ) -> str:
+        kwargs_hash = _get_kwargs_hash(
+            full_kwargs=full_kwargs,
+            use_cache_kwarg=use_cache_kwarg,
+            unhashable_kwargs=unhashable_kwargs,
+        )
+        return kwargs_hash
+
+    def get_canonical_file_prefix(self, kwargs_hash: str) -> str:
+        file_prefix = _get_canonical_file_prefix(
+            function_source_hash=self.function_source_hash,
+            kwargs_hash=kwargs_hash,
+        )
+        return file_prefix
+
+
+@dataclass(frozen=True)
+class CallOptions:
+    # how calls of cached functions are keyed and read
+    unhashable_kwargs: Optional[Collection[Any]]
+    use_cache_kwarg: str
+    # callers pass columns_kwarg to read a subset of columns of a cached DataFrame
+    columns_kwarg: str
+    cache_validity_hours: float
+    # entries up to max_staleness_hours past validity are returned to callers passing on_stale
+    max_staleness_hours: Optional[float]
+    disable_cache: bool
+    single_flight: bool
+
+    def uses_cache(self, full_kwargs: Dict[str, Any]) -> bool:
+        # if use_cache_kwarg is not present do not use cache at all
+        return self.use_cache_kwarg in full_kwargs and not self.disable_cache
+
+    def pop_columns_kwarg(
+        self,
+        call_plan: CallPlan,
+        passed_kwargs: Dict[str, Any],
+    ) -> Tuple[Dict[str, Any], Optional[Sequence[str]]]:
+        # columns_kwarg is consumed by the cache unless function declares it
+        columns: Optional[Sequence[str]] = None
+        if self.columns_kwarg in passed_kwargs and self.columns_kwarg not in call_plan.parameter_names:
+            passed_kwargs = passed_kwargs.copy()
+            columns = passed_kwargs.pop(self.columns_kwarg)
+        return passed_kwargs, columns
+
+
+class CacheEntries:
+    # reads, writes and computes entries of one LocalCacher through its tiers and storage backend
+    # every cached call of every caching mode goes through here so stats, instrumentation and quotas agree
+    def __init__(
+        self,
+        cache_dir: str,
+        options: CallOptions,
+        storage_backend: StorageBackend,
+        tiers: CacheTiers,
+        *,
+        handler_config: HandlerConfig,
+        size_quotas: SizeQuotas,
+        instrumentation: Optional[CacheInstrumentation] = None,
+    ):
+        self.cache_dir = cache_dir
+        self.options = options
+        self.storage_backend = storage_backend
+        self.tiers = tiers
+        self.handler_config = handler_config
+        self.size_quotas = size_quotas
+        # per function and per handler counters. nothing is timed or counted without instrumentation
+        self.instrumentation = instrumentation
+
+    def get_kwargs_hash(
+        self,
+        call_plan: CallPlan,
+        full_kwargs: Dict[str, Any],
+    ) -> str:
+        if self.instrumentation is None:
+            return call_plan.get_kwargs_hash(
+                full_kwargs=full_kwargs,
+                use_cache_kwarg=self.options.use_cache_kwarg,
+                unhashable_kwargs=self.options.unhashable_kwargs,
+            )
+        start_time = time.perf_counter()
+        kwargs_hash = call_plan.get_kwargs_hash(
+            full_kwargs=full_kwargs,
+            use_cache_kwarg=self.options.use_cache_kwarg,
+            unhashable_kwargs=self.options.unhashable_kwargs,
+        )
+        self.instrumentation.record(
+            function_name=call_plan.function_name,
+            key_hashing_seconds=time.perf_counter() - start_time,
+        )
+        return kwargs_hash
+
+    def compute(
+        self,
+        func: Callable[..., Any],
+        call_plan: CallPlan,
+        full_kwargs: Dict[str, Any],
+    ) -> Tuple[Any, float]:
+        # returns (object, seconds). compute time is recorded in meta data of written entries
+        # failed computations are counted as computations
+        start_time = time.perf_counter()
+        try:
+            return_object = func(**full_kwargs)
+        finally:
+            compute_seconds = time.perf_counter() - start_time
+            self.record_computation(call_plan=call_plan, compute_seconds=compute_seconds)
+        return return_object, compute_seconds
+
+    async def compute_coroutine(
+        self,
+        func: Callable[..., Any],
+        call_plan: CallPlan,
+        full_kwargs: Dict[str, Any],
+    ) -> Tuple[Any, float]:
+        # compute time of coroutines includes time spent waiting on the event loop
+        start_time = time.perf_counter()
+        try:
+            return_object = await func(**full_kwargs)
+        finally:
+            compute_seconds = time.perf_counter() - start_time
+            self.record_computation(call_plan=call_plan, compute_seconds=compute_seconds)
+        return return_object, compute_seconds
+
+    def record_computation(self, call_plan: CallPlan, compute_seconds: float) -> None:
+        if self.instrumentation is not None:
+            self.instrumentation.record(
+                function_name=call_plan.function_name,
+                computations=1,
+                compute_seconds=compute_seconds,
+            )
+
+    def get_lock_key(self, canonical_file_prefix: str) -> str:
+        # entries of the same cache directory share locks across LocalCacher instances of the process
+        return os.path.join(os.path.abspath(self.cache_dir), canonical_file_prefix)
+
+    @contextlib.contextmanager
+    def hold_single_flight(self, canonical_file_prefix: str) -> Iterator[None]:
+        if not self.options.single_flight:
+            yield
+            return
+        # thread lock first so threads of one process do not each wait on the storage backend lock
+        with _SINGLE_FLIGHT_LOCK.hold(key=self.get_lock_key(canonical_file_prefix=canonical_file_prefix)):
+            with self.storage_backend.hold_lock(canonical_file_prefix=canonical_file_prefix):
+                yield
+
+    def read_from_cache(
+        self,
+        canonical_file_prefix: str,
+        function_name: str,
+        columns: Optional[Sequence[str]] = None,
+        is_recheck: bool = False,
+        *,
+        on_stale: Optional[Callable[[], Any]] = None,
+        lazy: bool = False,
+    ) -> Tuple[bool, Any]:
+        # returns (cache_is_valid, object). cached objects may be None
+        # rechecks after waiting on single flight skip memory tier and do not count another miss
+        # with on_stale, entries within max_staleness_hours past validity are returned and on_stale is called
+        # with lazy, frames with recorded schema are returned as LazyDataFrame and read on first data access
+        if not is_recheck:
+            in_tier, return_object = self.read_from_tiers(
+                canonical_file_prefix=canonical_file_prefix,
+                function_name=function_name,
+            )
+            if in_tier:
+                return True, project_columns(cachable_object=return_object, columns=columns)
+
+        # single meta data read checks validity and recovers meta data
+        cache_validity_hours: float = self.options.cache_validity_hours
+        if on_stale is not None and self.options.max_staleness_hours is not None:
+            cache_validity_hours += self.options.max_staleness_hours
+        meta_data = self.storage_backend.get_valid_meta_data(
+            canonical_file_prefix=canonical_file_prefix,
+            cache_validity_hours=cache_validity_hours,
+        )
+        if meta_data is None:
+            if not is_recheck:
+                self.record_miss(canonical_file_prefix=canonical_file_prefix, function_name=function_name)
+            return False, None
+        is_stale = on_stale is not None and not meta_data.is_valid(
+            cache_validity_hours=self.options.cache_validity_hours)
+
+        # recover from storage backend
+        if lazy and not is_stale and can_read_lazily(meta_data=meta_data, columns=columns):
+            # lazy frames are not held in memory tier or published to object store
+            self.storage_backend.record_hit(canonical_file_prefix=canonical_file_prefix)
+            self.tiers.disk_tier_stats.hits += 1
+            return True, self.get_lazy_frame(meta_data=meta_data, columns=columns)
+        try:
+            return_object = self.read_object(meta_data=meta_data, columns=columns)
+        except FileNotFoundError:
+            # payload was evicted or replaced by a concurrent write after meta data was read
+            if not is_recheck:
+                self.record_miss(
+                    canonical_file_prefix=canonical_file_prefix,
+                    function_name=function_name,
+                    payload_is_missing=True,
+                )
+            return False, None
+        self.storage_backend.record_hit(canonical_file_prefix=canonical_file_prefix)
+        self.tiers.disk_tier_stats.hits += 1
+        if is_stale and on_stale is not None:
+            # refresh is scheduled once stale object is read so it can not replace files being read
+            # stale objects are not held in memory tier
+            self.tiers.disk_tier_stats.stale_hits += 1
+            on_stale()
+        elif columns is None:
+            # partial reads are not held in memory tier or published to object store
+            self.tiers.put(meta_data=meta_data, cachable_object=return_object)
+        return True, return_object
+
+    def record_miss(
+        self,
+        canonical_file_prefix: str,
+        function_name: str,
+        payload_is_missing: bool = False,
+    ) -> None:
+        self.tiers.disk_tier_stats.misses += 1
+        if self.instrumentation is not None:
+            # misses on entries past validity are told apart by a second meta data read
+            # misses on valid entries whose payload is missing are not expirations
+            is_expired = not payload_is_missing and self.storage_backend.get_meta_data(
+                canonical_file_prefix=canonical_file_prefix) is not None
+            self.instrumentation.record(
+                function_name=function_name,
+                misses=1,
+                expirations=int(is_expired),
+            )
+
+    def read_from_tiers(self, canonical_file_prefix: str, function_name: str) -> Tuple[bool, Any]:
+        in_tier, return_object = self.tiers.get(
+            canonical_file_prefix=canonical_file_prefix,
+            cache_validity_hours=self.options.cache_validity_hours,
+        )
+        if in_tier and self.instrumentation is not None:
+            self.instrumentation.record(function_name=function_name, hits=1)
+        return in_tier, return_object
+
+    def get_lazy_frame(self, meta_data: MetaData, columns: Optional[Sequence[str]]) -> LazyDataFrame:
+        # hit is counted when proxy is returned. reading the frame later counts bytes read only
+        if self.instrumentation is not None:
+            self.instrumentation.record(
+                function_name=meta_data.function_name,
+                cache_handler_name=meta_data.cache_handler_name,
+                hits=1,
+            )
+        return LazyDataFrame.from_meta_data(
+            meta_data=meta_data,
+            load_frame=functools.partial(self.read_object, meta_data=meta_data, columns=columns, is_hit=False),
+            columns=columns,
+        )
+
+    def read_object(
+        self,
+        meta_data: MetaData,
+        columns: Optional[Sequence[str]] = None,
+        is_hit: bool = True,
+    ) -> Any:
+        cache_handler = get_cache_handler_from_meta_data(meta_data=meta_data)
+        if self.instrumentation is None:
+            return self.storage_backend.read_object(meta_data=meta_data, cache_handler=cache_handler, columns=columns)
+        start_time = time.perf_counter()
+        return_object = self.storage_backend.read_object(
+            meta_data=meta_data,
+            cache_handler=cache_handler,
+            columns=columns,
+        )
+        # bytes read is the size of the whole entry, also for column reads
+        self.instrumentation.record(
+            function_name=meta_data.function_name,
+            cache_handler_name=cache_handler.CACHE_HANDLER_NAME,
+            hits=int(is_hit),
+            bytes_read=self.storage_backend.get_entry_size_bytes(meta_data=meta_data, cache_handler=cache_handler),
+            deserialize_seconds=time.perf_counter() - start_time,
+        )
+        return return_object
+
+    def write_to_cache(
+        self,
+        call_plan: CallPlan,
+        kwargs_hash: str,
+        cachable_object: Any,
+        put_in_tiers: bool = True,
+        compute_seconds: Optional[float] = None,
+    ) -> MetaData:
+        cache_handler = self.handler_config.get_write_cache_handler(cachable_object=cachable_object)
+        meta_data = MetaData(
+            write_datetime_str=datetime.datetime.now().strftime(DATETIME_FORMAT_STR),
+            canonical_file_prefix=call_plan.get_canonical_file_prefix(kwargs_hash=kwargs_hash),
+            cache_handler_name=cache_handler.CACHE_HANDLER_NAME,
+            function_source_hash=call_plan.function_source_hash,
+            kwargs_hash=kwargs_hash,
+            function_name=call_plan.function_name,
+            function_file_location=call_plan.function_file_location,
+            compute_seconds=compute_seconds,
+        )
+        # cache object. stale entries are kept while they may still be served
+        start_time = time.perf_counter() if self.instrumentation is not None else 0.0
+        meta_data = self.storage_backend.write_object(
+            cachable_object=cachable_object,
+            meta_data=meta_data,
+            cache_handler=cache_handler,
+            retention_hours=self.options.cache_validity_hours + (self.options.max_staleness_hours or 0),
+        )
+        if self.instrumentation is not None:
+            self.instrumentation.record(
+                function_name=meta_data.function_name,
+                cache_handler_name=cache_handler.CACHE_HANDLER_NAME,
+                bytes_written=self.storage_backend.get_entry_size_bytes(
+                    meta_data=meta_data,
+                    cache_handler=cache_handler,
+                ),
+                serialize_seconds=time.perf_counter() - start_time,
+            )
+        if put_in_tiers:
+            self.tiers.put(meta_data=meta_data, cachable_object=cachable_object)
+        for evicted_meta_data in self.size_quotas.enforce(meta_data=meta_data):
+            self.tiers.discard(canonical_file_prefix=evicted_meta_data.canonical_file_prefix)
+        return meta_data
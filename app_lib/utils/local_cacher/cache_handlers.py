@@ -0,0 +1,884 @@
+from typing import (
+    Any,
+    Dict,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Type,
+)
+from dataclasses import dataclass
+import dataclasses
+import json
+import mmap
+import os
+import pickle
+import shutil
+import tempfile
+import uuid
+import numpy as np
+import pandas as pd
+from app_lib.utils.local_cacher.meta_data import (
+    TEMP_FILE_PREFIX,
+    LocalCacheException,
+    MetaData,
+)
+from app_lib.utils.local_cacher.lazy_frames import get_frame_schema
+from app_lib.utils.local_cacher.compression import (
+    ADAPTIVE_COMPRESSION,
+    NO_COMPRESSION,
+    get_adaptive_codec_name,
+    get_codec,
+    get_codec_header,
+    read_codec_header,
+)
+
+# adaptive compression skips payloads smaller than this
+DEFAULT_COMPRESSION_MIN_SIZE_BYTES = 64 * 1024
+# adaptive compression skips payloads that do not shrink below this ratio
+DEFAULT_COMPRESSION_MAX_RATIO = 0.9
+# adaptive compression estimates the ratio from a leading sample of the payload
+COMPRESSION_TRIAL_SIZE_BYTES = 256 * 1024
+
+try:
+    import pyarrow
+    PYARROW_IS_INSTALLED = True
+except ImportError:
+    PYARROW_IS_INSTALLED = False
+
+
+def project_columns(
+    cachable_object: Any,
+    columns: Optional[Sequence[str]],
+) -> Any:
+    if columns is None:
+        return cachable_object
+    if not isinstance(cachable_object, pd.DataFrame):
+        err_str = 'can only select columns {} from DataFrame. cached type {}'.format(columns, type(cachable_object))
+        raise LocalCacheException(err_str)
+    return cachable_object[list(columns)]
+
+
+def _get_file_version() -> str:
+    # files of handlers writing several files per entry are named per write. index written last names them
+    return uuid.uuid4().hex
+
+
+def _get_versioned_suffix(version: Optional[str], file_suffix: str) -> str:
+    # entries written before files were versioned have no version
+    if version is None:
+        return file_suffix
+    return '{}.{}'.format(version, file_suffix)
+
+
+class ObjectCacheHandler:
+    CACHE_HANDLER_NAME = 'Generic'
+    CACHE_HANDLER_TYPES: Tuple[Any, ...] = ()
+    CACHE_FILE_SUFFIX = 'pkl'
+
+    @classmethod
+    def raise_type_error(cls) -> None:
+        err_str = 'cache handler {} can only be used in types {}'.format(
+            cls.CACHE_HANDLER_NAME,
+            cls.CACHE_HANDLER_TYPES,
+        )
+        raise LocalCacheException(err_str)
+
+    @classmethod
+    def handles_object(cls, cachable_object: Any) -> bool:
+        return type(cachable_object) in cls.CACHE_HANDLER_TYPES
+
+    @staticmethod
+    def get_file_path(
+        canonical_file_prefix: str,
+        file_suffix: str,
+        cache_dir: str,
+    ) -> str:
+        file_name = '{}.{}'.format(canonical_file_prefix, file_suffix)
+        file_path = os.path.join(cache_dir, file_name)
+        return file_path
+
+    @classmethod
+    def get_cache_file_paths(
+        cls,
+        meta_data: MetaData,
+        cache_dir: str,
+    ) -> List[str]:
+        # all files written by handler for a single cache entry
+        file_path = cls.get_file_path(
+            canonical_file_prefix=meta_data.canonical_file_prefix,
+            file_suffix=cls.CACHE_FILE_SUFFIX,
+            cache_dir=cache_dir,
+        )
+        return [file_path]
+
+    @classmethod
+    def get_cache_size_bytes(
+        cls,
+        meta_data: MetaData,
+        cache_dir: str,
+    ) -> int:
+        file_paths = cls.get_cache_file_paths(meta_data=meta_data, cache_dir=cache_dir)
+        size_bytes = sum(os.path.getsize(f) for f in file_paths if os.path.exists(f))
+        return size_bytes
+
+    def serialize_with_meta_data(
+        self,
+        cachable_object: Any,
+        meta_data: MetaData,
+        cache_dir: str,
+    ) -> MetaData:
+        # serialize object and return meta data describing what was written
+        # handlers that choose serialization settings per object record them in returned meta data
+        self.serialize_to_disk(
+            cachable_object=cachable_object,
+            meta_data=meta_data,
+            cache_dir=cache_dir,
+        )
+        return meta_data
+
+    def serialize_atomically(
+        self,
+        cachable_object: Any,
+        meta_data: MetaData,
+        cache_dir: str,
+    ) -> MetaData:
+        # serialize into a temporary directory inside cache_dir then rename files into place
+        # renames within a file system are atomic so readers see old or new files, never partial ones
+        # handlers writing several files name them per write and list last an index naming them
+        # so the index rename publishes all files at once. files of the replaced entry are deleted after
+        temp_dir = tempfile.mkdtemp(prefix=TEMP_FILE_PREFIX, dir=cache_dir)
+        try:
+            meta_data = self.serialize_with_meta_data(
+                cachable_object=cachable_object,
+                meta_data=meta_data,
+                cache_dir=temp_dir,
+            )
+            replaced_file_paths = self.get_cache_file_paths(meta_data=meta_data, cache_dir=cache_dir)
+            file_paths = []
+            for temp_file_path in self.get_cache_file_paths(meta_data=meta_data, cache_dir=temp_dir):
+                file_path = os.path.join(cache_dir, os.path.basename(temp_file_path))
+                os.replace(temp_file_path, file_path)
+                file_paths.append(file_path)
+        finally:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+        for file_path in set(replaced_file_paths) - set(file_paths):
+            try:
+                os.remove(file_path)
+            except FileNotFoundError:
+                pass
+        return meta_data
+
+    @staticmethod
+    def serialize_to_disk(
+        cachable_object: Any,
+        meta_data: MetaData,
+        cache_dir: str,
+    ) -> None:
+        file_path = ObjectCacheHandler.get_file_path(
+            canonical_file_prefix=meta_data.canonical_file_prefix,
+            file_suffix='pkl',
+            cache_dir=cache_dir,
+        )
+        with open(file_path, 'wb') as f:
+            pickle.dump(obj=cachable_object, file=f)
+
+    @staticmethod
+    def deserialize_from_disk(
+        meta_data: MetaData,
+        cache_dir: str,
+    ) -> Any:
+        file_path = ObjectCacheHandler.get_file_path(
+            canonical_file_prefix=meta_data.canonical_file_prefix,
+            file_suffix='pkl',
+            cache_dir=cache_dir,
+        )
+        with open(file_path, 'rb') as f:
+            return_object = pickle.load(file=f)
+        return return_object
+
+    @classmethod
+    def deserialize_columns_from_disk(
+        cls,
+        meta_data: MetaData,
+        cache_dir: str,
+        columns: Sequence[str],
+    ) -> Any:
+        # handlers without columnar storage read the whole object and select columns in memory
+        return_object = cls.deserialize_from_disk(meta_data=meta_data, cache_dir=cache_dir)
+        return project_columns(cachable_object=return_object, columns=columns)
+
+    @classmethod
+    def delete_cache(
+        cls,
+        meta_data: MetaData,
+        cache_dir: str,
+    ) -> None:
+        for file_path in cls.get_cache_file_paths(meta_data=meta_data, cache_dir=cache_dir):
+            os.remove(file_path)
+
+
+class CompressedObjectCacheHandler(ObjectCacheHandler):
+    # pickled objects compressed with a codec recorded in meta data and in a payload header
+    # reads use codec of header since an entry written concurrently may pair meta data of one write
+    # with payload of another
+    CACHE_HANDLER_NAME = 'CompressedGeneric'
+    CACHE_FILE_SUFFIX = 'pklz'
+
+    def __init__(
+        self,
+        codec_name: str = ADAPTIVE_COMPRESSION,
+        min_size_bytes: int = DEFAULT_COMPRESSION_MIN_SIZE_BYTES,
+        max_compression_ratio: float = DEFAULT_COMPRESSION_MAX_RATIO,
+    ):
+        if codec_name != ADAPTIVE_COMPRESSION:
+            # fail early on unavailable codecs
+            _ = get_codec(codec_name=codec_name)
+        self.codec_name = codec_name
+        self.min_size_bytes = min_size_bytes
+        self.max_compression_ratio = max_compression_ratio
+
+    def choose_codec_name(self, data: bytes) -> str:
+        if self.codec_name != ADAPTIVE_COMPRESSION:
+            return self.codec_name
+        # small payloads are not worth the decompression overhead
+        if len(data) < self.min_size_bytes:
+            return NO_COMPRESSION
+        # trial compression of a sample detects incompressible payloads
+        codec_name = get_adaptive_codec_name()
+        trial_data = data[:COMPRESSION_TRIAL_SIZE_BYTES]
+        trial_ratio = len(get_codec(codec_name=codec_name).compress(trial_data)) / len(trial_data)
+        if trial_ratio > self.max_compression_ratio:
+            return NO_COMPRESSION
+        return codec_name
+
+    def serialize_with_meta_data(
+        self,
+        cachable_object: Any,
+        meta_data: MetaData,
+        cache_dir: str,
+    ) -> MetaData:
+        data = pickle.dumps(cachable_object, protocol=pickle.HIGHEST_PROTOCOL)
+        codec_name = self.choose_codec_name(data=data)
+        compressed_meta_data = dataclasses.replace(meta_data, compression_codec=codec_name)
+        self._write_data(
+            data=get_codec(codec_name=codec_name).compress(data),
+            meta_data=compressed_meta_data,
+            cache_dir=cache_dir,
+        )
+        return compressed_meta_data
+
+    @classmethod
+    def serialize_to_disk(
+        cls,
+        cachable_object: Any,
+        meta_data: MetaData,
+        cache_dir: str,
+    ) -> None:
+        # codec is taken from meta data. use serialize_with_meta_data to choose codec per object
+        codec_name = meta_data.compression_codec or NO_COMPRESSION
+        data = pickle.dumps(cachable_object, protocol=pickle.HIGHEST_PROTOCOL)
+        cls._write_data(
+            data=get_codec(codec_name=codec_name).compress(data),
+            meta_data=meta_data,
+            cache_dir=cache_dir,
+        )
+
+    @classmethod
+    def _write_data(
+        cls,
+        data: bytes,
+        meta_data: MetaData,
+        cache_dir: str,
+    ) -> None:
+        # data is compressed with codec of meta data
+        file_path = cls.get_file_path(
+            canonical_file_prefix=meta_data.canonical_file_prefix,
+            file_suffix=cls.CACHE_FILE_SUFFIX,
+            cache_dir=cache_dir,
+        )
+        with open(file_path, 'wb') as f:
+            f.write(get_codec_header(codec_name=meta_data.compression_codec or NO_COMPRESSION))
+            f.write(data)
+
+    @classmethod
+    def deserialize_from_disk(
+        cls,
+        meta_data: MetaData,
+        cache_dir: str,
+    ) -> Any:
+        file_path = cls.get_file_path(
+            canonical_file_prefix=meta_data.canonical_file_prefix,
+            file_suffix=cls.CACHE_FILE_SUFFIX,
+            cache_dir=cache_dir,
+        )
+        with open(file_path, 'rb') as f:
+            codec_name = read_codec_header(f=f)
+            data = f.read()
+        if codec_name is None:
+            # written before payloads had headers
+            codec_name = meta_data.compression_codec or NO_COMPRESSION
+        return_object = pickle.loads(get_codec(codec_name=codec_name).decompress(data))
+        return return_object
+
+
+class OutOfBandObjectCacheHandler(ObjectCacheHandler):
+    # pickle protocol 5 with large buffers, such as those of arrays and frames, written to files of their own
+    # hits map buffer files read only so mixed python and array objects are read without copying buffers
+    # arrays of hits are read only views
+    CACHE_HANDLER_NAME = 'OutOfBandGeneric'
+    CACHE_FILE_SUFFIX = 'pkl5'
+    BUFFER_FILE_SUFFIX = 'pkl5-buffer'
+    INDEX_FILE_SUFFIX = 'pkl5-index.json'
+    # smaller buffers are kept in the pickle stream
+    MIN_BUFFER_SIZE_BYTES = 64 * 1024
+
+    @classmethod
+    def _get_index_file_path(
+        cls,
+        meta_data: MetaData,
+        cache_dir: str,
+    ) -> str:
+        index_file_path = cls.get_file_path(
+            canonical_file_prefix=meta_data.canonical_file_prefix,
+            file_suffix=cls.INDEX_FILE_SUFFIX,
+            cache_dir=cache_dir,
+        )
+        return index_file_path
+
+    @classmethod
+    def _get_buffer_file_path(
+        cls,
+        meta_data: MetaData,
+        cache_dir: str,
+        buffer_number: int,
+        version: Optional[str],
+    ) -> str:
+        buffer_file_path = cls.get_file_path(
+            canonical_file_prefix=meta_data.canonical_file_prefix,
+            file_suffix=_get_versioned_suffix(
+                version=version,
+                file_suffix='{}.{}'.format(buffer_number, cls.BUFFER_FILE_SUFFIX),
+            ),
+            cache_dir=cache_dir,
+        )
+        return buffer_file_path
+
+    @classmethod
+    def _get_stream_file_path(
+        cls,
+        meta_data: MetaData,
+        cache_dir: str,
+        version: Optional[str],
+    ) -> str:
+        stream_file_path = cls.get_file_path(
+            canonical_file_prefix=meta_data.canonical_file_prefix,
+            file_suffix=_get_versioned_suffix(version=version, file_suffix=cls.CACHE_FILE_SUFFIX),
+            cache_dir=cache_dir,
+        )
+        return stream_file_path
+
+    @classmethod
+    def _read_index(
+        cls,
+        meta_data: MetaData,
+        cache_dir: str,
+    ) -> Dict[str, Any]:
+        with open(cls._get_index_file_path(meta_data=meta_data, cache_dir=cache_dir), 'r', encoding='utf8') as f:
+            index: Dict[str, Any] = json.load(f)
+        return index
+
+    @classmethod
+    def get_cache_file_paths(
+        cls,
+        meta_data: MetaData,
+        cache_dir: str,
+    ) -> List[str]:
+        index_file_path = cls._get_index_file_path(meta_data=meta_data, cache_dir=cache_dir)
+        if not os.path.exists(index_file_path):
+            return [index_file_path]
+        index = cls._read_index(meta_data=meta_data, cache_dir=cache_dir)
+        buffer_file_paths = [
+            cls._get_buffer_file_path(
+                meta_data=meta_data,
+                cache_dir=cache_dir,
+                buffer_number=i,
+                version=index.get('version'),
+            ) for i in range(index['buffer_count'])
+        ]
+        stream_file_path = cls._get_stream_file_path(
+            meta_data=meta_data,
+            cache_dir=cache_dir,
+            version=index.get('version'),
+        )
+        return buffer_file_paths + [stream_file_path, index_file_path]
+
+    @classmethod
+    def serialize_to_disk(
+        cls,
+        cachable_object: Any,
+        meta_data: MetaData,
+        cache_dir: str,
+    ) -> None:
+        buffers: List[pickle.PickleBuffer] = []
+
+        def buffer_callback(buffer: pickle.PickleBuffer) -> bool:
+            # buffers for which False is returned are written out of band
+            if buffer.raw().nbytes < cls.MIN_BUFFER_SIZE_BYTES:
+                return True
+            buffers.append(buffer)
+            return False
+
+        data = pickle.dumps(cachable_object, protocol=5, buffer_callback=buffer_callback)
+        version = _get_file_version()
+        # each buffer starts a file so mapped buffers are page aligned
+        for i, buffer in enumerate(buffers):
+            buffer_file_path = cls._get_buffer_file_path(
+                meta_data=meta_data,
+                cache_dir=cache_dir,
+                buffer_number=i,
+                version=version,
+            )
+            with open(buffer_file_path, 'wb') as f:
+                f.write(buffer.raw())
+        with open(cls._get_stream_file_path(meta_data=meta_data, cache_dir=cache_dir, version=version), 'wb') as f:
+            f.write(data)
+        # index is written last. it names the stream and buffer files of entry
+        index_file_path = cls._get_index_file_path(meta_data=meta_data, cache_dir=cache_dir)
+        with open(index_file_path, 'w', encoding='utf8') as index_file:
+            json.dump({'version': version, 'buffer_count': len(buffers)}, index_file)
+
+    @staticmethod
+    def _map_buffer(buffer_file_path: str) -> Any:
+        with open(buffer_file_path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                # empty files can not be mapped
+                return b''
+            # mapping stays valid once file is closed. objects using the buffer keep mapping alive
+            return memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+
+    @classmethod
+    def _deserialize_version(
+        cls,
+        meta_data: MetaData,
+        cache_dir: str,
+    ) -> Any:
+        index = cls._read_index(meta_data=meta_data, cache_dir=cache_dir)
+        buffers = [
+            cls._map_buffer(buffer_file_path=cls._get_buffer_file_path(
+                meta_data=meta_data,
+                cache_dir=cache_dir,
+                buffer_number=i,
+                version=index.get('version'),
+            )) for i in range(index['buffer_count'])
+        ]
+        stream_file_path = cls._get_stream_file_path(
+            meta_data=meta_data,
+            cache_dir=cache_dir,
+            version=index.get('version'),
+        )
+        with open(stream_file_path, 'rb') as f:
+            return_object = pickle.loads(f.read(), buffers=buffers)
+        return return_object
+
+    @classmethod
+    def deserialize_from_disk(
+        cls,
+        meta_data: MetaData,
+        cache_dir: str,
+    ) -> Any:
+        try:
+            return cls._deserialize_version(meta_data=meta_data, cache_dir=cache_dir)
+        except FileNotFoundError:
+            # files named by an index read before the entry was replaced are deleted. index now names new files
+            return cls._deserialize_version(meta_data=meta_data, cache_dir=cache_dir)
+
+
+def _is_exact_parquet_object_column(values: Any) -> bool:
+    # object columns round trip through parquet only as strings, bytes, dates, decimals or all nulls
+    # pyarrow rejects mixed types and reads dicts, lists and nullable ints back as other types
+    try:
+        arrow_type = pyarrow.array(values, from_pandas=True).type
+    except pyarrow.ArrowException:
+        return False
+    return any(
+        is_type(arrow_type) for is_type in [
+            pyarrow.types.is_string,
+            pyarrow.types.is_large_string,
+            pyarrow.types.is_binary,
+            pyarrow.types.is_date,
+            pyarrow.types.is_decimal,
+            pyarrow.types.is_null,
+        ]
+    )
+
+
+def can_write_parquet(frame: pd.DataFrame) -> bool:
+    # frames parquet reads back unchanged. object columns and index levels are converted once to check
+    if not PYARROW_IS_INSTALLED:
+        return False
+    if not frame.columns.is_unique or not all(isinstance(c, str) for c in frame.columns):
+        return False
+    object_values = [frame[c] for c in frame.columns[frame.dtypes == object]]
+    object_values.extend(
+        frame.index.get_level_values(i) for i in range(frame.index.nlevels)
+        if frame.index.get_level_values(i).dtype == object
+    )
+    return all(_is_exact_parquet_object_column(values=v) for v in object_values)
+
+
+class DataFrameCacheHandler(ObjectCacheHandler):
+    # frames are written as csv only when pyarrow is not installed
+    # with pyarrow, frames parquet can not store exactly are pickled
+    CACHE_HANDLER_NAME = 'DataFrame'
+    CACHE_HANDLER_TYPES = (pd.DataFrame, )
+    CACHE_FILE_SUFFIX = 'csv'
+
+    @classmethod
+    def handles_object(cls, cachable_object: Any) -> bool:
+        return not PYARROW_IS_INSTALLED and super().handles_object(cachable_object=cachable_object)
+
+    @classmethod
+    def serialize_to_disk(
+        cls,
+        cachable_object: Any,
+        meta_data: MetaData,
+        cache_dir: str,
+    ) -> None:
+        if isinstance(cachable_object, pd.DataFrame):
+            file_path = cls.get_file_path(
+                canonical_file_prefix=meta_data.canonical_file_prefix,
+                file_suffix='csv',
+                cache_dir=cache_dir,
+            )
+            cachable_object.to_csv(path_or_buf=file_path, index=False)
+        else:
+            cls.raise_type_error()
+
+    @staticmethod
+    def deserialize_from_disk(
+        meta_data: MetaData,
+        cache_dir: str,
+    ) -> Any:
+        file_path = DataFrameCacheHandler.get_file_path(
+            canonical_file_prefix=meta_data.canonical_file_prefix,
+            file_suffix='csv',
+            cache_dir=cache_dir,
+        )
+        frame = pd.read_csv(filepath_or_buffer=file_path)
+        return frame
+
+    @classmethod
+    def deserialize_columns_from_disk(
+        cls,
+        meta_data: MetaData,
+        cache_dir: str,
+        columns: Sequence[str],
+    ) -> Any:
+        file_path = cls.get_file_path(
+            canonical_file_prefix=meta_data.canonical_file_prefix,
+            file_suffix='csv',
+            cache_dir=cache_dir,
+        )
+        frame = pd.read_csv(filepath_or_buffer=file_path, usecols=list(columns))
+        return frame[list(columns)]
+
+
+class ParquetCacheHandler(ObjectCacheHandler):
+    # columnar storage keeps dtypes, index and datetime precision
+    # columns can be read selectively without loading the whole frame
+    CACHE_HANDLER_NAME = 'Parquet'
+    CACHE_HANDLER_TYPES = (pd.DataFrame, )
+    CACHE_FILE_SUFFIX = 'parquet'
+
+    @classmethod
+    def handles_object(cls, cachable_object: Any) -> bool:
+        if not super().handles_object(cachable_object=cachable_object):
+            return False
+        return can_write_parquet(frame=cachable_object)
+
+    def serialize_with_meta_data(
+        self,
+        cachable_object: Any,
+        meta_data: MetaData,
+        cache_dir: str,
+    ) -> MetaData:
+        # parquet keeps dtypes so schema recorded at write time holds for frames read back
+        self.serialize_to_disk(
+            cachable_object=cachable_object,
+            meta_data=meta_data,
+            cache_dir=cache_dir,
+        )
+        frame_columns, frame_dtypes, frame_row_count = get_frame_schema(frame=cachable_object)
+        return dataclasses.replace(
+            meta_data,
+            frame_columns=frame_columns,
+            frame_dtypes=frame_dtypes,
+            frame_row_count=frame_row_count,
+        )
+
+    @classmethod
+    def serialize_to_disk(
+        cls,
+        cachable_object: Any,
+        meta_data: MetaData,
+        cache_dir: str,
+    ) -> None:
+        if isinstance(cachable_object, pd.DataFrame):
+            file_path = cls.get_file_path(
+                canonical_file_prefix=meta_data.canonical_file_prefix,
+                file_suffix=cls.CACHE_FILE_SUFFIX,
+                cache_dir=cache_dir,
+            )
+            cachable_object.to_parquet(path=file_path, engine='pyarrow')
+        else:
+            cls.raise_type_error()
+
+    @classmethod
+    def deserialize_from_disk(
+        cls,
+        meta_data: MetaData,
+        cache_dir: str,
+    ) -> Any:
+        file_path = cls.get_file_path(
+            canonical_file_prefix=meta_data.canonical_file_prefix,
+            file_suffix=cls.CACHE_FILE_SUFFIX,
+            cache_dir=cache_dir,
+        )
+        frame = pd.read_parquet(path=file_path, engine='pyarrow')
+        return frame
+
+    @classmethod
+    def deserialize_columns_from_disk(
+        cls,
+        meta_data: MetaData,
+        cache_dir: str,
+        columns: Sequence[str],
+    ) -> Any:
+        file_path = cls.get_file_path(
+            canonical_file_prefix=meta_data.canonical_file_prefix,
+            file_suffix=cls.CACHE_FILE_SUFFIX,
+            cache_dir=cache_dir,
+        )
+        frame = pd.read_parquet(path=file_path, engine='pyarrow', columns=list(columns))
+        return frame
+
+
+class NumpyCacheHandler(ObjectCacheHandler):
+    # arrays, or dicts and tuples of arrays, stored as raw .npy files
+    # hits return read only memory mapped views so processes share page cache instead of private copies
+    CACHE_HANDLER_NAME = 'Numpy'
+    CACHE_HANDLER_TYPES = (np.ndarray, dict, tuple)
+    CACHE_FILE_SUFFIX = 'npy'
+    INDEX_FILE_SUFFIX = 'npy-index.json'
+
+    @staticmethod
+    def _is_mappable_array(cachable_object: Any) -> bool:
+        # object arrays hold python references and can not be memory mapped
+        # subclasses such as masked arrays and matrices carry state .npy files do not keep and are pickled
+        return cachable_object.__class__ is np.ndarray and not cachable_object.dtype.hasobject
+
+    @classmethod
+    def handles_object(cls, cachable_object: Any) -> bool:
+        if cls._is_mappable_array(cachable_object=cachable_object):
+            return True
+        if isinstance(cachable_object, dict) and cachable_object:
+            keys_are_str = all(isinstance(k, str) for k in cachable_object.keys())
+            return keys_are_str and all(cls._is_mappable_array(v) for v in cachable_object.values())
+        if isinstance(cachable_object, tuple) and cachable_object:
+            return all(cls._is_mappable_array(v) for v in cachable_object)
+        return False
+
+    @classmethod
+    def _get_index_file_path(
+        cls,
+        meta_data: MetaData,
+        cache_dir: str,
+    ) -> str:
+        index_file_path = cls.get_file_path(
+            canonical_file_prefix=meta_data.canonical_file_prefix,
+            file_suffix=cls.INDEX_FILE_SUFFIX,
+            cache_dir=cache_dir,
+        )
+        return index_file_path
+
+    @classmethod
+    def _get_array_file_path(
+        cls,
+        meta_data: MetaData,
+        cache_dir: str,
+        array_number: int,
+        version: Optional[str],
+    ) -> str:
+        array_file_path = cls.get_file_path(
+            canonical_file_prefix=meta_data.canonical_file_prefix,
+            file_suffix=_get_versioned_suffix(
+                version=version,
+                file_suffix='{}.{}'.format(array_number, cls.CACHE_FILE_SUFFIX),
+            ),
+            cache_dir=cache_dir,
+        )
+        return array_file_path
+
+    @classmethod
+    def _read_index(
+        cls,
+        meta_data: MetaData,
+        cache_dir: str,
+    ) -> Dict[str, Any]:
+        with open(cls._get_index_file_path(meta_data=meta_data, cache_dir=cache_dir), 'r', encoding='utf8') as f:
+            index: Dict[str, Any] = json.load(f)
+        return index
+
+    @classmethod
+    def get_cache_file_paths(
+        cls,
+        meta_data: MetaData,
+        cache_dir: str,
+    ) -> List[str]:
+        index_file_path = cls._get_index_file_path(meta_data=meta_data, cache_dir=cache_dir)
+        if not os.path.exists(index_file_path):
+            return [index_file_path]
+        index = cls._read_index(meta_data=meta_data, cache_dir=cache_dir)
+        array_file_paths = [
+            cls._get_array_file_path(
+                meta_data=meta_data,
+                cache_dir=cache_dir,
+                array_number=i,
+                version=index.get('version'),
+            ) for i in range(index['array_count'])
+        ]
+        return array_file_paths + [index_file_path]
+
+    @classmethod
+    def serialize_to_disk(
+        cls,
+        cachable_object: Any,
+        meta_data: MetaData,
+        cache_dir: str,
+    ) -> None:
+        if not cls.handles_object(cachable_object=cachable_object):
+            cls.raise_type_error()
+        keys: List[str] = []
+        if isinstance(cachable_object, dict):
+            keys = list(cachable_object.keys())
+            arrays = list(cachable_object.values())
+            kind = 'dict'
+        elif isinstance(cachable_object, tuple):
+            arrays = list(cachable_object)
+            kind = 'tuple'
+        else:
+            arrays = [cachable_object]
+            kind = 'array'
+        version = _get_file_version()
+        for i, array in enumerate(arrays):
+            array_file_path = cls._get_array_file_path(
+                meta_data=meta_data,
+                cache_dir=cache_dir,
+                array_number=i,
+                version=version,
+            )
+            with open(array_file_path, 'wb') as f:
+                np.save(f, array, allow_pickle=False)
+        # index is written last. it names array files and describes how arrays are reassembled
+        index = {
+            'version': version,
+            'kind': kind,
+            'keys': keys,
+            'array_count': len(arrays),
+        }
+        with open(cls._get_index_file_path(meta_data=meta_data, cache_dir=cache_dir), 'w', encoding='utf8') as f:
+            json.dump(index, f)
+
+    @classmethod
+    def _deserialize_version(
+        cls,
+        meta_data: MetaData,
+        cache_dir: str,
+    ) -> Any:
+        index = cls._read_index(meta_data=meta_data, cache_dir=cache_dir)
+        arrays = [
+            np.load(
+                cls._get_array_file_path(
+                    meta_data=meta_data,
+                    cache_dir=cache_dir,
+                    array_number=i,
+                    version=index.get('version'),
+                ),
+                mmap_mode='r',
+                allow_pickle=False,
+            ) for i in range(index['array_count'])
+        ]
+        if index['kind'] == 'dict':
+            return dict(zip(index['keys'], arrays))
+        if index['kind'] == 'tuple':
+            return tuple(arrays)
+        return arrays[0]
+
+    @classmethod
+    def deserialize_from_disk(
+        cls,
+        meta_data: MetaData,
+        cache_dir: str,
+    ) -> Any:
+        try:
+            return cls._deserialize_version(meta_data=meta_data, cache_dir=cache_dir)
+        except FileNotFoundError:
+            # files named by an index read before the entry was replaced are deleted. index now names new files
+            return cls._deserialize_version(meta_data=meta_data, cache_dir=cache_dir)
+
+
+# handlers are tried in order when writing. first handler accepting object is used
+CACHE_HANDLERS: List[Type[ObjectCacheHandler]] = [
+    ParquetCacheHandler,
+    DataFrameCacheHandler,
+    NumpyCacheHandler,
+    CompressedObjectCacheHandler,
+    OutOfBandObjectCacheHandler,
+    ObjectCacheHandler,
+]
+
+
+def get_cache_handler_from_object(cachable_object: Any) -> ObjectCacheHandler:
+    for handler in CACHE_HANDLERS:
+        if handler.handles_object(cachable_object=cachable_object):
+            return handler()
+    return ObjectCacheHandler()
+
+
+def get_cache_handler_from_meta_data(meta_data: MetaData) -> ObjectCacheHandler:
+    cache_handler_name = meta_data.cache_handler_name
+    for handler in CACHE_HANDLERS:
+        if cache_handler_name == handler.CACHE_HANDLER_NAME:
+            return handler()
+    err_str = 'could not find cache handler {}'.format(cache_handler_name)
+    raise LocalCacheException(err_str)
+
+
+@dataclass(frozen=True)
+class HandlerConfig:
+    # generic objects are compressed with compression_codec. 'adaptive' chooses codec per object
+    compression_codec: Optional[str] = None
+    # generic objects are pickled with large buffers in files of their own. hits map buffers instead of copying
+    out_of_band_buffers: bool = False
+    # hits on frames return LazyDataFrame proxies. frames are read on first data access
+    # proxies are not DataFrame instances and have no operators. callers needing either call load()
+    lazy_frames: bool = False
+
+    def __post_init__(self) -> None:
+        if self.out_of_band_buffers and self.compression_codec is not None:
+            raise LocalCacheException('out of band buffers are read through memory maps and can not be compressed')
+        if self.compression_codec is not None:
+            # fail early on unavailable codecs
+            _ = CompressedObjectCacheHandler(codec_name=self.compression_codec)
+
+    def get_write_cache_handler(self, cachable_object: Any) -> ObjectCacheHandler:
+        cache_handler = get_cache_handler_from_object(cachable_object=cachable_object)
+        # compression and out of band buffers replace the generic pickle handler only
+        if cache_handler.CACHE_HANDLER_NAME != ObjectCacheHandler.CACHE_HANDLER_NAME:
+            return cache_handler
+        if self.compression_codec is not None:
+            return CompressedObjectCacheHandler(codec_name=self.compression_codec)
+        if self.out_of_band_buffers:
+            return OutOfBandObjectCacheHandler()
+        return cache_handler
@@ -0,0 +1,925 @@
+from typing import (
+    Optional,
+    Collection,
+    Callable,
+    Dict,
+    Any,
+    List,
+    Sequence,
+    Tuple,
+)
+from dataclasses import dataclass
+import concurrent.futures
+import dataclasses
+import functools
+import inspect
+import os
+from app_lib.utils.local_cacher.meta_data import (
+    DEFAULT_CACHE_VALIDITY_HOURS,
+    DEFAULT_COLUMNS_KWARG,
+    DEFAULT_USE_CACHE_KWARG,
+    LocalCacheException,
+    MetaData,
+    _get_canonical_file_prefix,
+)
+from app_lib.utils.local_cacher import bundles
+from app_lib.utils.local_cacher.cache_entries import (
+    CacheEntries,
+    CallOptions,
+    CallPlan,
+    _bind_full_kwargs,
+    _get_function_source_hash,
+    _get_kwargs_hash,
+)
+from app_lib.utils.local_cacher.cache_handlers import (
+    CACHE_HANDLERS,
+    DataFrameCacheHandler,
+    HandlerConfig,
+    ObjectCacheHandler,
+    ParquetCacheHandler,
+    get_cache_handler_from_meta_data,
+    get_cache_handler_from_object,
+    project_columns,
+)
+from app_lib.utils.local_cacher.coroutines import wrap_coroutine_function
+from app_lib.utils.local_cacher.eviction import (
+    EvictionConfig,
+    SizeQuotas,
+    evict_entries,
+)
+from app_lib.utils.local_cacher.failures import (
+    FailureConfig,
+    compute_caching_failure,
+    raise_cached_failure,
+    write_failure,
+)
+from app_lib.utils.local_cacher.generators import wrap_generator_function
+from app_lib.utils.local_cacher.instrumentation import (
+    CacheInstrumentation,
+    time_call,
+)
+from app_lib.utils.local_cacher.layouts import (
+    FLAT_LAYOUT,
+    SHARDED_LAYOUT,
+    get_entry_dir,
+    link_or_copy_file,
+)
+from app_lib.utils.local_cacher.lazy_frames import can_read_lazily
+from app_lib.utils.local_cacher.locks import delete_lock_file
+from app_lib.utils.local_cacher.memory_tier import CacheTierStats
+from app_lib.utils.local_cacher.meta_data_store import (
+    LRU_EVICTION,
+    EvictableMetaDataStore,
+    JsonMetaDataStore,
+    MetaDataStore,
+    get_meta_data_store,
+)
+from app_lib.utils.local_cacher.partitions import (
+    PartitionSpec,
+    wrap_partition_function,
+)
+from app_lib.utils.local_cacher.refresh import (
+    BackgroundRefresher,
+    RefreshConfig,
+)
+from app_lib.utils.local_cacher.storage_backends import StorageConfig
+from app_lib.utils.local_cacher.tiers import (
+    CacheTiers,
+    TierConfig,
+)
+from app_lib.utils.local_cacher.time_ranges import (
+    DEFAULT_MAX_TIME_RANGE_SEGMENTS,
+    TimeRangeSpec,
+    wrap_time_range_function,
+)
+from app_lib.utils.local_cacher.warmup import (
+    CallManifest,
+    get_call_manifest,
+    get_function_path,
+)
+
+
+def _call_unwrapped(wrapper: Callable[..., Any], full_kwargs: Dict[str, Any]) -> Tuple[Any, float]:
+    # misses of batch calls are computed by the undecorated function. returns (object, compute seconds)
+    # wrapper is passed instead of function since process pools pickle functions by name
+    # and the name of a decorated function refers to its wrapper
+    func = getattr(wrapper, '__wrapped__', wrapper)
+    return time_call(func=func, full_kwargs=full_kwargs)
+
+
+def _group_by_columns(
+    result_indices: Sequence[Tuple[int, Optional[Sequence[str]]]],
+) -> Dict[Optional[Tuple[str, ...]], List[int]]:
+    # positions of calls keyed by requested columns
+    indices_by_columns: Dict[Optional[Tuple[str, ...]], List[int]] = {}
+    for i, columns in result_indices:
+        columns_key = None if columns is None else tuple(columns)
+        indices_by_columns.setdefault(columns_key, []).append(i)
+    return indices_by_columns
+
+
+@dataclass(frozen=True)
+class _PendingCall:
+    # computation of a batch call. results of repeated kwargs are projected into each of result_indices
+    full_kwargs: Dict[str, Any]
+    # None for calls that are not cached
+    kwargs_hash: Optional[str]
+    result_indices: List[Tuple[int, Optional[Sequence[str]]]]
+
+
+@dataclass(frozen=True)
+class BulkLookup:
+    # cached results of many calls. nothing is computed
+    # hits are keyed by position in list_of_kwargs. missing calls are in order, with kwargs as passed
+    hits: Dict[int, Any]
+    missing_indices: List[int]
+    missing_kwargs: List[Dict[str, Any]]
+
+
+class LocalCacher:
+    # handlers are tried in order when writing. first handler accepting object is used
+    AVAILABLE_CACHE_HANDLERS = CACHE_HANDLERS
+
+    def __init__(
+        self,
+        cache_dir: str,
+        unhashable_kwargs: Optional[Collection[Any]] = None,
+        use_cache_kwarg: str = DEFAULT_USE_CACHE_KWARG,
+        cache_validity_hours: int = DEFAULT_CACHE_VALIDITY_HOURS,
+        disable_cache: bool = False,
+        *,
+        columns_kwarg: str = DEFAULT_COLUMNS_KWARG,
+        instrumentation: Optional[CacheInstrumentation] = None,
+        call_manifest_path: Optional[str] = None,
+        refresh_config: RefreshConfig = RefreshConfig(),
+        storage_config: StorageConfig = StorageConfig(),
+        handler_config: HandlerConfig = HandlerConfig(),
+        tier_config: TierConfig = TierConfig(),
+        eviction_config: EvictionConfig = EvictionConfig(),
+        failure_config: FailureConfig = FailureConfig(),
+    ):
+        # options beyond keying and validity are keyword only and grouped by feature in config dataclasses
+        # meta data is stored in per entry json files or a single sqlite index for the cache directory
+        self.meta_data_store = get_meta_data_store(
+            cache_dir=cache_dir,
+            use_meta_data_index=storage_config.use_meta_data_index,
+        )
+        eviction_config.validate_store(
+            meta_data_store=self.meta_data_store,
+            storage_backend=storage_config.storage_backend,
+        )
+        self.entries = CacheEntries(
+            cache_dir=cache_dir,
+            options=CallOptions(
+                unhashable_kwargs=unhashable_kwargs,
+                use_cache_kwarg=use_cache_kwarg,
+                columns_kwarg=columns_kwarg,
+                cache_validity_hours=cache_validity_hours,
+                max_staleness_hours=refresh_config.max_staleness_hours,
+                disable_cache=disable_cache,
+                single_flight=refresh_config.single_flight,
+            ),
+            storage_backend=storage_config.get_storage_backend(
+                cache_dir=cache_dir,
+                meta_data_store=self.meta_data_store,
+            ),
+            tiers=CacheTiers(tier_config=tier_config),
+            handler_config=handler_config,
+            size_quotas=SizeQuotas(
+                eviction_config=eviction_config,
+                meta_data_store=self.meta_data_store,
+                cache_dir=cache_dir,
+            ),
+            instrumentation=instrumentation,
+        )
+        self.refresher = BackgroundRefresher(max_refresh_workers=refresh_config.max_refresh_workers)
+        self.tier_config = tier_config
+        self.failure_config = failure_config
+        # computed calls are counted in a manifest replayed by warm_up_from_manifest after deploys
+        # counts are written by a timer thread and at exit
+        self.call_manifest: Optional[CallManifest] = None
+        if call_manifest_path is not None:
+            self.call_manifest = get_call_manifest(manifest_path=call_manifest_path)
+
+    @property
+    def cache_dir(self) -> str:
+        return self.entries.cache_dir
+
+    def __call__(self, func: Callable[..., Any]) -> Callable[..., Any]:
+        # inspect function once. wrapper only binds and hashes arguments per call
+        call_plan = CallPlan.from_function(func=func)
+        function_path = get_function_path(func=func)
+        if inspect.iscoroutinefunction(func):
+            if self.tier_config.run_misses_on_ray:
+                raise LocalCacheException('coroutine functions can not run on ray')
+            return wrap_coroutine_function(
+                func=func,
+                entries=self.entries,
+                failure_config=self.failure_config,
+                call_plan=call_plan,
+                on_call=functools.partial(self._record_call, function_path=function_path),
+            )
+        if inspect.isgeneratorfunction(func):
+            if self.tier_config.run_misses_on_ray:
+                raise LocalCacheException('generator functions can not run on ray')
+            return wrap_generator_function(func=func, entries=self.entries, call_plan=call_plan)
+        compute_func = self.tier_config.get_compute_func(func=func)
+        entries = self.entries
+        options = entries.options
+
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            kwargs, columns = options.pop_columns_kwarg(call_plan=call_plan, passed_kwargs=kwargs)
+            # get full kwargs to use in function call
+            full_kwargs = call_plan.get_full_kwargs(
+                passed_args=args,
+                passed_kwargs=kwargs,
+            )
+            if not options.uses_cache(full_kwargs=full_kwargs):
+                return_object, _ = entries.compute(func=compute_func, call_plan=call_plan, full_kwargs=full_kwargs)
+                return project_columns(cachable_object=return_object, columns=columns)
+
+            # single hashing pass over kwargs
+            call_signature_hash = entries.get_kwargs_hash(call_plan=call_plan, full_kwargs=full_kwargs)
+            # full hash is combination of func hash and kwarg hash
+            canonical_file_prefix = call_plan.get_canonical_file_prefix(kwargs_hash=call_signature_hash)
+            self._record_call(function_path=function_path, full_kwargs=full_kwargs)
+
+            if full_kwargs[options.use_cache_kwarg]:
+                cache_is_valid, return_object = entries.read_from_cache(
+                    canonical_file_prefix=canonical_file_prefix,
+                    function_name=call_plan.function_name,
+                    columns=columns,
+                    lazy=entries.handler_config.lazy_frames,
+                    on_stale=self._get_on_stale(
+                        func=compute_func,
+                        call_plan=call_plan,
+                        full_kwargs=full_kwargs,
+                        kwargs_hash=call_signature_hash,
+                    ),
+                )
+                if cache_is_valid:
+                    return return_object
+                raise_cached_failure(
+                    entries=entries,
+                    failure_config=self.failure_config,
+                    call_plan=call_plan,
+                    kwargs_hash=call_signature_hash,
+                )
+
+            with entries.hold_single_flight(canonical_file_prefix=canonical_file_prefix):
+                if full_kwargs[options.use_cache_kwarg]:
+                    # entry may have been written while waiting on another caller
+                    cache_is_valid, return_object = entries.read_from_cache(
+                        canonical_file_prefix=canonical_file_prefix,
+                        function_name=call_plan.function_name,
+                        columns=columns,
+                        is_recheck=True,
+                        lazy=entries.handler_config.lazy_frames,
+                    )
+                    if cache_is_valid:
+                        return return_object
+                    # computation waited on may have failed with a cached exception
+                    raise_cached_failure(
+                        entries=entries,
+                        failure_config=self.failure_config,
+                        call_plan=call_plan,
+                        kwargs_hash=call_signature_hash,
+                    )
+                # execute function. full result is cached regardless of requested columns
+                return_object, compute_seconds = compute_caching_failure(
+                    entries=entries,
+                    failure_config=self.failure_config,
+                    func=compute_func,
+                    call_plan=call_plan,
+                    full_kwargs=full_kwargs,
+                    kwargs_hash=call_signature_hash,
+                )
+                entries.write_to_cache(
+                    call_plan=call_plan,
+                    kwargs_hash=call_signature_hash,
+                    cachable_object=return_object,
+                    compute_seconds=compute_seconds,
+                )
+            return project_columns(cachable_object=return_object, columns=columns)
+
+        # batch entry point. cached_fn.map(list_of_kwargs, executor=executor)
+        setattr(wrapper, 'map', functools.partial(self._map, func=compute_func, wrapper=wrapper, call_plan=call_plan))
+        # lookup without computing misses. cached_fn.lookup_many(list_of_kwargs)
+        setattr(wrapper, 'lookup_many', functools.partial(self._lookup_many, call_plan=call_plan))
+        return wrapper
+
+    def _map(
+        self,
+        list_of_kwargs: Sequence[Dict[str, Any]],
+        func: Callable[..., Any],
+        wrapper: Callable[..., Any],
+        call_plan: CallPlan,
+        executor: Optional[concurrent.futures.Executor] = None,
+    ) -> List[Any]:
+        # keys are resolved and hits are read before any miss is computed
+        # misses are computed in executor, a thread pool by default, and written as they complete
+        # process pools require the decorated function to be importable by name
+        # misses run as ray tasks are waited on in executor, which must be a thread pool
+        # kwargs repeated within the batch are computed once. results are returned in order
+        results, pending_calls = self._read_map_hits(
+            list_of_kwargs=list_of_kwargs,
+            func=func,
+            call_plan=call_plan,
+        )
+        if not pending_calls:
+            return results
+
+        owns_executor = executor is None
+        if executor is None:
+            executor = concurrent.futures.ThreadPoolExecutor(thread_name_prefix='local-cacher-map')
+        futures = {}
+        for pending_call in pending_calls:
+            if self.tier_config.run_misses_on_ray:
+                future = executor.submit(time_call, func=func, full_kwargs=pending_call.full_kwargs)
+            else:
+                future = executor.submit(_call_unwrapped, wrapper=wrapper, full_kwargs=pending_call.full_kwargs)
+            futures[future] = pending_call
+        try:
+            for future in concurrent.futures.as_completed(futures):
+                pending_call = futures[future]
+                try:
+                    timed_result = future.result()
+                except BaseException as exception:
+                    # compute time of failed batch calls is not returned
+                    self.entries.record_computation(call_plan=call_plan, compute_seconds=0.0)
+                    is_cached_exception = isinstance(exception, self.failure_config.cached_exceptions)
+                    if pending_call.kwargs_hash is not None and is_cached_exception:
+                        write_failure(
+                            entries=self.entries,
+                            call_plan=call_plan,
+                            kwargs_hash=pending_call.kwargs_hash,
+                            exception=exception,
+                        )
+                    raise
+                self._complete_map_call(
+                    call_plan=call_plan,
+                    pending_call=pending_call,
+                    timed_result=timed_result,
+                    results=results,
+                )
+        finally:
+            # misses not started yet are dropped once a computation fails
+            for future in futures:
+                future.cancel()
+            if owns_executor:
+                executor.shutdown()
+        return results
+
+    def _complete_map_call(
+        self,
+        call_plan: CallPlan,
+        pending_call: _PendingCall,
+        timed_result: Tuple[Any, float],
+        results: List[Any],
+    ) -> None:
+        return_object, compute_seconds = timed_result
+        self.entries.record_computation(call_plan=call_plan, compute_seconds=compute_seconds)
+        if pending_call.kwargs_hash is not None:
+            self.entries.write_to_cache(
+                call_plan=call_plan,
+                kwargs_hash=pending_call.kwargs_hash,
+                cachable_object=return_object,
+                compute_seconds=compute_seconds,
+            )
+        for i, columns in pending_call.result_indices:
+            results[i] = project_columns(cachable_object=return_object, columns=columns)
+
+    def _read_map_hits(
+        self,
+        list_of_kwargs: Sequence[Dict[str, Any]],
+        func: Callable[..., Any],
+        call_plan: CallPlan,
+    ) -> Tuple[List[Any], List[_PendingCall]]:
+        # returns results with hits filled in and calls left to compute
+        results: List[Any] = [None] * len(list_of_kwargs)
+        # keyed by cache entry. uncached calls are keyed by position
+        pending_calls: Dict[str, _PendingCall] = {}
+        options = self.entries.options
+        for i, passed_kwargs in enumerate(list_of_kwargs):
+            passed_kwargs, columns = options.pop_columns_kwarg(call_plan=call_plan, passed_kwargs=passed_kwargs)
+            full_kwargs = call_plan.get_full_kwargs(passed_args=(), passed_kwargs=passed_kwargs)
+            if not options.uses_cache(full_kwargs=full_kwargs):
+                pending_calls[str(i)] = _PendingCall(
+                    full_kwargs=full_kwargs,
+                    kwargs_hash=None,
+                    result_indices=[(i, columns)],
+                )
+                continue
+            self._record_call(function_path=get_function_path(func=func), full_kwargs=full_kwargs)
+            call_signature_hash = self.entries.get_kwargs_hash(call_plan=call_plan, full_kwargs=full_kwargs)
+            canonical_file_prefix = call_plan.get_canonical_file_prefix(kwargs_hash=call_signature_hash)
+            if canonical_file_prefix in pending_calls:
+                pending_calls[canonical_file_prefix].result_indices.append((i, columns))
+                continue
+            if full_kwargs[options.use_cache_kwarg]:
+                cache_is_valid, return_object = self.entries.read_from_cache(
+                    canonical_file_prefix=canonical_file_prefix,
+                    function_name=call_plan.function_name,
+                    columns=columns,
+                    lazy=self.entries.handler_config.lazy_frames,
+                    on_stale=self._get_on_stale(
+                        func=func,
+                        call_plan=call_plan,
+                        full_kwargs=full_kwargs,
+                        kwargs_hash=call_signature_hash,
+                    ),
+                )
+                if cache_is_valid:
+                    results[i] = return_object
+                    continue
+                raise_cached_failure(
+                    entries=self.entries,
+                    failure_config=self.failure_config,
+                    call_plan=call_plan,
+                    kwargs_hash=call_signature_hash,
+                )
+            pending_calls[canonical_file_prefix] = _PendingCall(
+                full_kwargs=full_kwargs,
+                kwargs_hash=call_signature_hash,
+                result_indices=[(i, columns)],
+            )
+        return results, list(pending_calls.values())
+
+    def lookup_many(
+        self,
+        func: Callable[..., Any],
+        list_of_kwargs: Sequence[Dict[str, Any]],
+        max_workers: Optional[int] = None,
+    ) -> BulkLookup:
+        # func may be decorated or not. entries of func cached by this cacher are looked up
+        call_plan = CallPlan.from_function(func=inspect.unwrap(func))
+        return self._lookup_many(list_of_kwargs=list_of_kwargs, call_plan=call_plan, max_workers=max_workers)
+
+    def _lookup_many(
+        self,
+        list_of_kwargs: Sequence[Dict[str, Any]],
+        call_plan: CallPlan,
+        max_workers: Optional[int] = None,
+    ) -> BulkLookup:
+        # keys of all calls are resolved first. entries not in memory tiers are checked in one meta data read
+        # and hits are read concurrently on a thread pool of max_workers
+        # calls not using the cache, stale entries and cached failures are missing
+        hits, missing_indices, pending_reads = self._resolve_lookups(list_of_kwargs=list_of_kwargs, call_plan=call_plan)
+        many_meta_data = self.entries.storage_backend.get_many_valid_meta_data(
+            canonical_file_prefixes=list(pending_reads),
+            cache_validity_hours=self.entries.options.cache_validity_hours,
+        )
+        missing_prefixes = [p for p in pending_reads if p not in many_meta_data]
+        for canonical_file_prefix in missing_prefixes:
+            missing_indices.extend(i for i, _ in pending_reads.pop(canonical_file_prefix))
+        self.entries.tiers.disk_tier_stats.misses += len(missing_prefixes)
+        if self.entries.instrumentation is not None and missing_prefixes:
+            # expirations are not told apart from misses in bulk lookups
+            self.entries.instrumentation.record(function_name=call_plan.function_name, misses=len(missing_prefixes))
+        if pending_reads:
+            self.entries.storage_backend.record_hits(canonical_file_prefixes=list(pending_reads))
+            self.entries.tiers.disk_tier_stats.hits += len(pending_reads)
+            self._read_many(
+                pending_reads=pending_reads,
+                many_meta_data=many_meta_data,
+                hits=hits,
+                max_workers=max_workers,
+            )
+        missing_indices.sort()
+        return BulkLookup(
+            hits=hits,
+            missing_indices=missing_indices,
+            missing_kwargs=[list_of_kwargs[i] for i in missing_indices],
+        )
+
+    def _resolve_lookups(
+        self,
+        list_of_kwargs: Sequence[Dict[str, Any]],
+        call_plan: CallPlan,
+    ) -> Tuple[Dict[int, Any], List[int], Dict[str, List[Tuple[int, Optional[Sequence[str]]]]]]:
+        # returns hits in memory tiers, calls not using the cache and calls to read from storage backend
+        # calls to read are positions and requested columns keyed by entry
+        hits: Dict[int, Any] = {}
+        missing_indices: List[int] = []
+        pending_reads: Dict[str, List[Tuple[int, Optional[Sequence[str]]]]] = {}
+        options = self.entries.options
+        for i, passed_kwargs in enumerate(list_of_kwargs):
+            passed_kwargs, columns = options.pop_columns_kwarg(call_plan=call_plan, passed_kwargs=passed_kwargs)
+            full_kwargs = call_plan.get_full_kwargs(passed_args=(), passed_kwargs=passed_kwargs)
+            if not options.uses_cache(full_kwargs=full_kwargs) or not full_kwargs[options.use_cache_kwarg]:
+                missing_indices.append(i)
+                continue
+            call_signature_hash = self.entries.get_kwargs_hash(call_plan=call_plan, full_kwargs=full_kwargs)
+            canonical_file_prefix = call_plan.get_canonical_file_prefix(kwargs_hash=call_signature_hash)
+            if canonical_file_prefix not in pending_reads:
+                in_tier, return_object = self.entries.read_from_tiers(
+                    canonical_file_prefix=canonical_file_prefix,
+                    function_name=call_plan.function_name,
+                )
+                if in_tier:
+                    hits[i] = project_columns(cachable_object=return_object, columns=columns)
+                    continue
+            pending_reads.setdefault(canonical_file_prefix, []).append((i, columns))
+        return hits, missing_indices, pending_reads
+
+    def _read_many(
+        self,
+        pending_reads: Dict[str, List[Tuple[int, Optional[Sequence[str]]]]],
+        many_meta_data: Dict[str, MetaData],
+        hits: Dict[int, Any],
+        max_workers: Optional[int],
+    ) -> None:
+        # each entry is read once per distinct set of requested columns
+        # partial reads are not held in memory tier or published to object store
+        futures: Dict['concurrent.futures.Future[Any]', Tuple[MetaData, Optional[Tuple[str, ...]], List[int]]] = {}
+        with concurrent.futures.ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix='local-cacher-lookup',
+        ) as executor:
+            for canonical_file_prefix, result_indices in pending_reads.items():
+                meta_data = many_meta_data[canonical_file_prefix]
+                for columns_key, indices in _group_by_columns(result_indices=result_indices).items():
+                    if self.entries.handler_config.lazy_frames and can_read_lazily(
+                            meta_data=meta_data, columns=columns_key):
+                        lazy_frame = self.entries.get_lazy_frame(meta_data=meta_data, columns=columns_key)
+                        hits.update(dict.fromkeys(indices, lazy_frame))
+                        continue
+                    future = executor.submit(self.entries.read_object, meta_data=meta_data, columns=columns_key)
+                    futures[future] = (meta_data, columns_key, indices)
+            for future, (meta_data, columns_key, indices) in futures.items():
+                return_object = future.result()
+                hits.update((i, return_object) for i in indices)
+                if columns_key is None:
+                    self.entries.tiers.put(meta_data=meta_data, cachable_object=return_object)
+
+    def cache_time_ranges(
+        self,
+        start_kwarg: str,
+        end_kwarg: str,
+        time_column: str,
+        max_segments: int = DEFAULT_MAX_TIME_RANGE_SEGMENTS,
+    ) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+        # range aware mode for functions returning a DataFrame of rows with time_column within [start, end]
+        time_range_spec = TimeRangeSpec(
+            start_kwarg=start_kwarg,
+            end_kwarg=end_kwarg,
+            time_column=time_column,
+            max_segments=max_segments,
+        )
+        return functools.partial(
+            wrap_time_range_function,
+            entries=self.entries,
+            tier_config=self.tier_config,
+            time_range_spec=time_range_spec,
+        )
+
+    def cache_partitions(
+        self,
+        partition_kwarg: str,
+        combine: str,
+        partition_column: Optional[str] = None,
+    ) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+        # partition aware mode for functions taking a list of items in partition_kwarg
+        partition_spec = PartitionSpec(
+            partition_kwarg=partition_kwarg,
+            combine=combine,
+            partition_column=partition_column,
+        )
+        return functools.partial(
+            wrap_partition_function,
+            entries=self.entries,
+            tier_config=self.tier_config,
+            partition_spec=partition_spec,
+        )
+
+    def _record_call(self, function_path: Optional[str], full_kwargs: Dict[str, Any]) -> None:
+        # hits, misses and refreshes are counted in manifest. counts are held in memory until flushed
+        if self.call_manifest is not None:
+            self.call_manifest.record_call(
+                function_path=function_path,
+                full_kwargs=full_kwargs,
+                use_cache_kwarg=self.entries.options.use_cache_kwarg,
+            )
+
+    def _get_on_stale(
+        self,
+        func: Callable[..., Any],
+        call_plan: CallPlan,
+        full_kwargs: Dict[str, Any],
+        kwargs_hash: str,
+    ) -> Optional[Callable[[], Any]]:
+        # stale reads schedule a background refresh when stale while revalidate is enabled
+        if self.entries.options.max_staleness_hours is None:
+            return None
+        on_stale = functools.partial(
+            self.refresher.schedule,
+            canonical_file_prefix=call_plan.get_canonical_file_prefix(kwargs_hash=kwargs_hash),
+            refresh=functools.partial(
+                self._refresh,
+                func=func,
+                call_plan=call_plan,
+                full_kwargs=full_kwargs,
+                kwargs_hash=kwargs_hash,
+            ),
+        )
+        return on_stale
+
+    def _refresh(
+        self,
+        func: Callable[..., Any],
+        call_plan: CallPlan,
+        full_kwargs: Dict[str, Any],
+        kwargs_hash: str,
+    ) -> None:
+        canonical_file_prefix = call_plan.get_canonical_file_prefix(kwargs_hash=kwargs_hash)
+        with self.entries.hold_single_flight(canonical_file_prefix=canonical_file_prefix):
+            # entry may have been refreshed by another process
+            meta_data = self.entries.storage_backend.get_valid_meta_data(
+                canonical_file_prefix=canonical_file_prefix,
+                cache_validity_hours=self.entries.options.cache_validity_hours,
+            )
+            if meta_data is None:
+                # failures cached since the stale read are not computed again
+                raise_cached_failure(
+                    entries=self.entries,
+                    failure_config=self.failure_config,
+                    call_plan=call_plan,
+                    kwargs_hash=kwargs_hash,
+                )
+                return_object, compute_seconds = self.entries.compute(
+                    func=func,
+                    call_plan=call_plan,
+                    full_kwargs=full_kwargs,
+                )
+                self.entries.write_to_cache(
+                    call_plan=call_plan,
+                    kwargs_hash=kwargs_hash,
+                    cachable_object=return_object,
+                    compute_seconds=compute_seconds,
+                )
+
+    def wait_for_refreshes(self, timeout_seconds: Optional[float] = None) -> None:
+        # blocks until background refreshes scheduled so far are done
+        self.refresher.wait(timeout_seconds=timeout_seconds)
+
+    def get_retained_compute_seconds(self, function_name: Optional[str] = None) -> float:
+        # recompute time saved by entries still cached, or entries of function_name
+        if not isinstance(self.meta_data_store, EvictableMetaDataStore):
+            raise LocalCacheException('recorded compute time requires use_meta_data_index')
+        return self.meta_data_store.get_compute_seconds(function_name=function_name)
+
+    def get_tier_stats(self) -> Dict[str, CacheTierStats]:
+        return self.entries.tiers.get_stats()
+
+    @staticmethod
+    def _get_file_prefix(
+        func: Callable[..., Any],
+        passed_args: Tuple[Any, ...],
+        passed_kwargs: Dict[str, Any],
+        use_cache_kwarg: Optional[str],
+        unhashable_kwargs: Optional[Collection[str]],
+    ) -> str:
+        call_signature_hash = LocalCacher._get_call_signature_hash(
+            func=func,
+            passed_args=passed_args,
+            passed_kwargs=passed_kwargs,
+            use_cache_kwarg=use_cache_kwarg,
+            unhashable_kwargs=unhashable_kwargs,
+        )
+        function_source_hash = LocalCacher._get_function_source_hash(func=func)
+        file_prefix = _get_canonical_file_prefix(
+            function_source_hash=function_source_hash,
+            kwargs_hash=call_signature_hash,
+        )
+        return file_prefix
+
+    @staticmethod
+    def _get_full_kwargs(
+        func: Callable[..., Any],
+        passed_args: Tuple[Any, ...],
+        passed_kwargs: Dict[str, Any],
+    ) -> Dict[str, Any]:
+        # https://docs.python.org/3/library/inspect.html#inspect.Parameter
+        parameters = inspect.signature(func).parameters
+        default_kwargs = {k: v.default for k, v in parameters.items() if v.default is not inspect.Parameter.empty}
+        # turns args into kwargs
+        full_kwargs = _bind_full_kwargs(
+            parameter_names=tuple(parameters.keys()),
+            default_kwargs=default_kwargs,
+            passed_args=passed_args,
+            passed_kwargs=passed_kwargs,
+        )
+        return full_kwargs
+
+    @staticmethod
+    def _get_call_signature_hash(
+        func: Callable[..., Any],
+        passed_args: Tuple[Any, ...],
+        passed_kwargs: Dict[str, Any],
+        use_cache_kwarg: Optional[str],
+        unhashable_kwargs: Optional[Collection[str]],
+    ) -> str:
+        # represent function call as exhaustive list of kwargs
+        full_kwargs = LocalCacher._get_full_kwargs(
+            func=func,
+            passed_args=passed_args,
+            passed_kwargs=passed_kwargs,
+        )
+        call_signature_hash = _get_kwargs_hash(
+            full_kwargs=full_kwargs,
+            use_cache_kwarg=use_cache_kwarg,
+            unhashable_kwargs=unhashable_kwargs,
+        )
+        return call_signature_hash
+
+    @staticmethod
+    def _get_function_source_hash(func: Callable[..., Any]) -> str:
+        function_source_hash = _get_function_source_hash(func=func)
+        return function_source_hash
+
+    @staticmethod
+    def _get_cache_handler_from_object(return_object: Any) -> ObjectCacheHandler:
+        return get_cache_handler_from_object(cachable_object=return_object)
+
+    @staticmethod
+    def _get_cache_handler_from_meta_data(meta_data: MetaData) -> ObjectCacheHandler:
+        return get_cache_handler_from_meta_data(meta_data=meta_data)
+
+    @staticmethod
+    def clear_cache(
+        cache_dir: str,
+        cache_validity_hours: int = 0,
+        use_meta_data_index: bool = False,
+    ) -> None:
+        meta_data_store = get_meta_data_store(
+            cache_dir=cache_dir,
+            use_meta_data_index=use_meta_data_index,
+        )
+        # entries written at least cache_validity_hours ago
+        for meta_data in meta_data_store.get_expired_meta_data(cache_validity_hours=cache_validity_hours):
+            cache_handler = get_cache_handler_from_meta_data(meta_data=meta_data)
+            # delete files
+            cache_handler.delete_cache(
+                meta_data=meta_data,
+                cache_dir=get_entry_dir(cache_dir=cache_dir, meta_data=meta_data),
+            )
+            meta_data_store.delete_meta_data(meta_data=meta_data)
+            delete_lock_file(canonical_file_prefix=meta_data.canonical_file_prefix, cache_dir=cache_dir)
+
+    @staticmethod
+    def evict_to_size(
+        cache_dir: str,
+        max_size_bytes: int,
+        eviction_policy: str = LRU_EVICTION,
+        function_name: Optional[str] = None,
+    ) -> int:
+        # evict entries, or entries of function_name, until within max_size_bytes. returns evicted count
+        meta_data_store = get_meta_data_store(
+            cache_dir=cache_dir,
+            use_meta_data_index=True,
+        )
+        if not isinstance(meta_data_store, EvictableMetaDataStore):
+            raise LocalCacheException('eviction requires use_meta_data_index')
+        size_bytes = meta_data_store.get_size_bytes(function_name=function_name)
+        evicted_meta_data = evict_entries(
+            meta_data_store=meta_data_store,
+            cache_dir=cache_dir,
+            bytes_to_evict=size_bytes - max_size_bytes,
+            eviction_policy=eviction_policy,
+            function_name=function_name,
+        )
+        return len(evicted_meta_data)
+
+    @staticmethod
+    def migrate_meta_data_to_index(
+        cache_dir: str,
+        delete_json_files: bool = False,
+    ) -> int:
+        # import per entry -meta.json files into the sqlite meta data index
+        json_meta_data_store = JsonMetaDataStore(cache_dir=cache_dir)
+        index_meta_data_store: MetaDataStore = get_meta_data_store(
+            cache_dir=cache_dir,
+            use_meta_data_index=True,
+        )
+        all_meta_data = json_meta_data_store.get_all_meta_data()
+        for meta_data in all_meta_data:
+            cache_handler = get_cache_handler_from_meta_data(meta_data=meta_data)
+            index_meta_data_store.write_meta_data(
+                meta_data=meta_data,
+                size_bytes=cache_handler.get_cache_size_bytes(
+                    meta_data=meta_data,
+                    cache_dir=get_entry_dir(cache_dir=cache_dir, meta_data=meta_data),
+                ),
+            )
+            if delete_json_files:
+                json_meta_data_store.delete_meta_data(meta_data=meta_data)
+        return len(all_meta_data)
+
+    @staticmethod
+    def migrate_csv_entries_to_parquet(
+        cache_dir: str,
+        use_meta_data_index: bool = False,
+    ) -> int:
+        # rewrite DataFrame entries stored as csv with the parquet handler
+        # write time is preserved so entries expire as before
+        meta_data_store = get_meta_data_store(
+            cache_dir=cache_dir,
+            use_meta_data_index=use_meta_data_index,
+        )
+        migrated_count = 0
+        for meta_data in meta_data_store.get_all_meta_data():
+            if meta_data.cache_handler_name != DataFrameCacheHandler.CACHE_HANDLER_NAME:
+                continue
+            entry_dir = get_entry_dir(cache_dir=cache_dir, meta_data=meta_data)
+            frame = DataFrameCacheHandler.deserialize_from_disk(meta_data=meta_data, cache_dir=entry_dir)
+            if not ParquetCacheHandler.handles_object(cachable_object=frame):
+                continue
+            parquet_meta_data = dataclasses.replace(
+                meta_data,
+                cache_handler_name=ParquetCacheHandler.CACHE_HANDLER_NAME,
+            )
+            parquet_meta_data = ParquetCacheHandler().serialize_atomically(
+                cachable_object=frame,
+                meta_data=parquet_meta_data,
+                cache_dir=entry_dir,
+            )
+            meta_data_store.write_meta_data(
+                meta_data=parquet_meta_data,
+                size_bytes=ParquetCacheHandler.get_cache_size_bytes(meta_data=parquet_meta_data, cache_dir=entry_dir),
+            )
+            DataFrameCacheHandler.delete_cache(meta_data=meta_data, cache_dir=entry_dir)
+            migrated_count += 1
+        return migrated_count
+
+    @staticmethod
+    def migrate_to_sharded_layout(
+        cache_dir: str,
+        use_meta_data_index: bool = False,
+    ) -> int:
+        # move flat entries into shard directories. returns number of entries moved
+        # safe while cache_dir is in use. files are linked into shard directory, then meta data is switched,
+        # then flat files are deleted. readers holding flat meta data from before the switch may miss files
+        meta_data_store = get_meta_data_store(
+            cache_dir=cache_dir,
+            use_meta_data_index=use_meta_data_index,
+        )
+        migrated_count = 0
+        for meta_data in meta_data_store.get_all_meta_data():
+            if meta_data.cache_layout == SHARDED_LAYOUT:
+                continue
+            sharded_meta_data = dataclasses.replace(meta_data, cache_layout=SHARDED_LAYOUT)
+            entry_dir = get_entry_dir(cache_dir=cache_dir, meta_data=sharded_meta_data)
+            os.makedirs(entry_dir, exist_ok=True)
+            cache_handler = get_cache_handler_from_meta_data(meta_data=meta_data)
+            try:
+                for file_path in cache_handler.get_cache_file_paths(meta_data=meta_data, cache_dir=cache_dir):
+                    link_or_copy_file(
+                        file_path=file_path,
+                        linked_file_path=os.path.join(entry_dir, os.path.basename(file_path)),
+                    )
+            except FileNotFoundError:
+                # entry was deleted concurrently
+                continue
+            meta_data_store.write_meta_data(
+                meta_data=sharded_meta_data,
+                size_bytes=cache_handler.get_cache_size_bytes(meta_data=sharded_meta_data, cache_dir=entry_dir),
+            )
+            # flat meta data files are only held by json meta data stores. index rows were replaced above
+            if isinstance(meta_data_store, JsonMetaDataStore):
+                meta_data_store.delete_meta_data(meta_data=meta_data)
+            cache_handler.delete_cache(meta_data=meta_data, cache_dir=cache_dir)
+            migrated_count += 1
+        return migrated_count
+
+    @staticmethod
+    def export_bundle(
+        cache_dir: str,
+        bundle_path: str,
+        function_names: Optional[Collection[str]] = None,
+        cache_validity_hours: float = DEFAULT_CACHE_VALIDITY_HOURS,
+        use_meta_data_index: bool = False,
+    ) -> int:
+        # write valid entries of function_names, or of all functions, to a single bundle file
+        return bundles.export_bundle(
+            cache_dir=cache_dir,
+            bundle_path=bundle_path,
+            function_names=function_names,
+            cache_validity_hours=cache_validity_hours,
+            use_meta_data_index=use_meta_data_index,
+        )
+
+    @staticmethod
+    def import_bundle(
+        bundle_path: str,
+        cache_dir: str,
+        use_meta_data_index: bool = False,
+        cache_layout: str = FLAT_LAYOUT,
+    ) -> int:
+        # copy entries of bundle into cache_dir in cache_layout. returns number of entries imported
+        return bundles.import_bundle(
+            bundle_path=bundle_path,
+            cache_dir=cache_dir,
+            use_meta_data_index=use_meta_data_index,
+            cache_layout=cache_layout,
+        )
@@ -0,0 +1,102 @@
+from typing import (
+    BinaryIO,
+    Callable,
+    Dict,
+    List,
+    Optional,
+)
+from dataclasses import dataclass
+import lzma
+import zlib
+from app_lib.utils.local_cacher.meta_data import LocalCacheException
+
+try:
+    import lz4.frame
+    LZ4_IS_INSTALLED = True
+except ImportError:
+    LZ4_IS_INSTALLED = False
+
+try:
+    import zstandard
+    ZSTD_IS_INSTALLED = True
+except ImportError:
+    ZSTD_IS_INSTALLED = False
+
+NO_COMPRESSION = 'none'
+ADAPTIVE_COMPRESSION = 'adaptive'
+# fastest available codec is preferred by adaptive compression
+ADAPTIVE_CODEC_PREFERENCE = ('zstd', 'lz4', 'zlib')
+# payloads start with magic bytes, codec name length and codec name
+# pickles and framed codecs start with other bytes, so payloads without header are told apart
+CODEC_HEADER_MAGIC = b'\x00LCZ'
+
+
+@dataclass(frozen=True)
+class CompressionCodec:
+    name: str
+    compress: Callable[[bytes], bytes]
+    decompress: Callable[[bytes], bytes]
+
+
+def _no_compression(data: bytes) -> bytes:
+    return data
+
+
+def _zstd_compress(data: bytes) -> bytes:
+    # zstandard compressors are not thread safe. create one per call
+    return zstandard.ZstdCompressor().compress(data)
+
+
+def _zstd_decompress(data: bytes) -> bytes:
+    return zstandard.ZstdDecompressor().decompress(data)
+
+
+def _get_codecs() -> Dict[str, CompressionCodec]:
+    codecs = [
+        CompressionCodec(name=NO_COMPRESSION, compress=_no_compression, decompress=_no_compression),
+        CompressionCodec(name='zlib', compress=zlib.compress, decompress=zlib.decompress),
+        CompressionCodec(name='lzma', compress=lzma.compress, decompress=lzma.decompress),
+    ]
+    if LZ4_IS_INSTALLED:
+        codecs.append(CompressionCodec(name='lz4', compress=lz4.frame.compress, decompress=lz4.frame.decompress))
+    if ZSTD_IS_INSTALLED:
+        codecs.append(CompressionCodec(name='zstd', compress=_zstd_compress, decompress=_zstd_decompress))
+    return {c.name: c for c in codecs}
+
+
+_CODECS = _get_codecs()
+
+
+def get_available_codec_names() -> List[str]:
+    return list(_CODECS.keys())
+
+
+def get_codec(codec_name: str) -> CompressionCodec:
+    if codec_name not in _CODECS:
+        err_str = 'compression codec {} not available. available codecs: {}'.format(
+            codec_name,
+            get_available_codec_names(),
+        )
+        raise LocalCacheException(err_str)
+    return _CODECS[codec_name]
+
+
+def get_codec_header(codec_name: str) -> bytes:
+    codec_name_bytes = codec_name.encode('ascii')
+    return CODEC_HEADER_MAGIC + bytes([len(codec_name_bytes)]) + codec_name_bytes
+
+
+def read_codec_header(f: BinaryIO) -> Optional[str]:
+    # leaves file at start of compressed data. returns None for payloads written without header
+    if f.read(len(CODEC_HEADER_MAGIC)) != CODEC_HEADER_MAGIC:
+        f.seek(0)
+        return None
+    codec_name_length = f.read(1)[0]
+    return f.read(codec_name_length).decode('ascii')
+
+
+def get_adaptive_codec_name() -> str:
+    for codec_name in ADAPTIVE_CODEC_PREFERENCE:
+        if codec_name in _CODECS:
+            return codec_name
+    return NO_COMPRESSION
@@ -0,0 +1,235 @@
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Optional,
+    Sequence,
+    Tuple,
+)
+import asyncio
+import functools
+from app_lib.utils.local_cacher.cache_entries import (
+    CacheEntries,
+    CallPlan,
+)
+from app_lib.utils.local_cacher.cache_handlers import project_columns
+from app_lib.utils.local_cacher.failures import (
+    FailureConfig,
+    raise_cached_failure,
+    write_failure,
+)
+from app_lib.utils.local_cacher.refresh import log_refresh_failure
+
+# in flight computations of coroutine functions keyed by event loop and cache entry
+_IN_FLIGHT_TASKS: Dict[Tuple[int, str], 'asyncio.Task[Any]'] = {}
+
+
+def wrap_coroutine_function(
+    func: Callable[..., Any],
+    entries: CacheEntries,
+    failure_config: FailureConfig,
+    call_plan: CallPlan,
+    on_call: Callable[..., None],
+) -> Callable[..., Any]:
+    # coroutine results are cached. disk reads and writes run in the default executor off the event loop
+    # on_call is called with full kwargs of each cached call, hit or miss
+
+    @functools.wraps(func)
+    async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+        kwargs, columns = entries.options.pop_columns_kwarg(call_plan=call_plan, passed_kwargs=kwargs)
+        full_kwargs = call_plan.get_full_kwargs(
+            passed_args=args,
+            passed_kwargs=kwargs,
+        )
+        if not entries.options.uses_cache(full_kwargs=full_kwargs):
+            return_object, _ = await entries.compute_coroutine(
+                func=func,
+                call_plan=call_plan,
+                full_kwargs=full_kwargs,
+            )
+            return project_columns(cachable_object=return_object, columns=columns)
+
+        call_signature_hash = entries.get_kwargs_hash(call_plan=call_plan, full_kwargs=full_kwargs)
+        on_call(full_kwargs=full_kwargs)
+        compute_async = functools.partial(
+            _compute_async,
+            func=func,
+            entries=entries,
+            failure_config=failure_config,
+            call_plan=call_plan,
+            full_kwargs=full_kwargs,
+            kwargs_hash=call_signature_hash,
+        )
+        if full_kwargs[entries.options.use_cache_kwarg]:
+            cache_is_valid, return_object = await _read_or_raise_failure(
+                entries=entries,
+                failure_config=failure_config,
+                call_plan=call_plan,
+                kwargs_hash=call_signature_hash,
+                columns=columns,
+                compute_async=compute_async,
+            )
+            if cache_is_valid:
+                return return_object
+
+        if not entries.options.single_flight:
+            return project_columns(cachable_object=await compute_async(), columns=columns)
+        task = _get_in_flight_task(
+            entries=entries,
+            canonical_file_prefix=call_plan.get_canonical_file_prefix(kwargs_hash=call_signature_hash),
+            compute_async=compute_async,
+        )
+        # shielded so a cancelled awaiter does not cancel computation shared with other awaiters
+        return_object = await asyncio.shield(task)
+        return project_columns(cachable_object=return_object, columns=columns)
+
+    return async_wrapper
+
+
+async def _read_or_raise_failure(
+    entries: CacheEntries,
+    failure_config: FailureConfig,
+    call_plan: CallPlan,
+    kwargs_hash: str,
+    *,
+    columns: Optional[Sequence[str]],
+    compute_async: Callable[[], Any],
+) -> Tuple[bool, Any]:
+    # returns (cache_is_valid, object). cached failures of misses are raised
+    loop = asyncio.get_running_loop()
+    canonical_file_prefix = call_plan.get_canonical_file_prefix(kwargs_hash=kwargs_hash)
+    on_stale = None
+    if entries.options.max_staleness_hours is not None:
+        # stale reads happen in the executor. refresh task is created on the loop
+        on_stale = functools.partial(
+            loop.call_soon_threadsafe,
+            functools.partial(
+                _get_in_flight_task,
+                entries=entries,
+                canonical_file_prefix=canonical_file_prefix,
+                compute_async=compute_async,
+                is_refresh=True,
+            ),
+        )
+    cache_is_valid, return_object = await loop.run_in_executor(
+        None,
+        functools.partial(
+            entries.read_from_cache,
+            canonical_file_prefix=canonical_file_prefix,
+            function_name=call_plan.function_name,
+            columns=columns,
+            on_stale=on_stale,
+        ),
+    )
+    if not cache_is_valid:
+        await loop.run_in_executor(
+            None,
+            functools.partial(
+                raise_cached_failure,
+                entries=entries,
+                failure_config=failure_config,
+                call_plan=call_plan,
+                kwargs_hash=kwargs_hash,
+            ),
+        )
+    return cache_is_valid, return_object
+
+
+def _get_in_flight_task(
+    entries: CacheEntries,
+    canonical_file_prefix: str,
+    compute_async: Callable[[], Any],
+    is_refresh: bool = False,
+) -> 'asyncio.Task[Any]':
+    # concurrent awaiters and background refreshes of the same key share one task
+    # must be called from the event loop thread
+    loop = asyncio.get_running_loop()
+    task_key = (id(loop), entries.get_lock_key(canonical_file_prefix=canonical_file_prefix))
+    task = _IN_FLIGHT_TASKS.get(task_key)
+    if task is None:
+        task = loop.create_task(compute_async())
+        _IN_FLIGHT_TASKS[task_key] = task
+        task.add_done_callback(lambda _: _IN_FLIGHT_TASKS.pop(task_key, None))
+        if is_refresh:
+            task.add_done_callback(log_refresh_failure)
+    return task
+
+
+async def _compute_async(
+    func: Callable[..., Any],
+    entries: CacheEntries,
+    failure_config: FailureConfig,
+    call_plan: CallPlan,
+    *,
+    full_kwargs: Dict[str, Any],
+    kwargs_hash: str,
+) -> Any:
+    loop = asyncio.get_running_loop()
+    canonical_file_prefix = call_plan.get_canonical_file_prefix(kwargs_hash=kwargs_hash)
+    single_flight = entries.options.single_flight
+    lock = None
+    if single_flight:
+        # other processes computing the same key are waited on in the executor
+        lock = await loop.run_in_executor(
+            None,
+            functools.partial(
+                entries.storage_backend.acquire_lock,
+                canonical_file_prefix=canonical_file_prefix,
+            ),
+        )
+    try:
+        if single_flight and full_kwargs[entries.options.use_cache_kwarg]:
+            cache_is_valid, return_object = await loop.run_in_executor(
+                None,
+                functools.partial(
+                    entries.read_from_cache,
+                    canonical_file_prefix=canonical_file_prefix,
+                    function_name=call_plan.function_name,
+                    is_recheck=True,
+                ),
+            )
+            if cache_is_valid:
+                return return_object
+            # computation waited on may have failed with a cached exception
+            await loop.run_in_executor(
+                None,
+                functools.partial(
+                    raise_cached_failure,
+                    entries=entries,
+                    failure_config=failure_config,
+                    call_plan=call_plan,
+                    kwargs_hash=kwargs_hash,
+                ),
+            )
+        try:
+            return_object, compute_seconds = await entries.compute_coroutine(
+                func=func,
+                call_plan=call_plan,
+                full_kwargs=full_kwargs,
+            )
+        except failure_config.cached_exceptions as exception:
+            await loop.run_in_executor(
+                None,
+                functools.partial(
+                    write_failure,
+                    entries=entries,
+                    call_plan=call_plan,
+                    kwargs_hash=kwargs_hash,
+                    exception=exception,
+                ),
+            )
+            raise
+        await loop.run_in_executor(
+            None,
+            functools.partial(
+                entries.write_to_cache,
+                call_plan=call_plan,
+                kwargs_hash=kwargs_hash,
+                cachable_object=return_object,
+                compute_seconds=compute_seconds,
+            ),
+        )
+        return return_object
+    finally:
+        if lock is not None:
+            entries.storage_backend.release_lock(lock=lock)
@@ -0,0 +1,143 @@
+from typing import (
+    List,
+    Optional,
+)
+from dataclasses import dataclass
+from app_lib.utils.local_cacher.meta_data import (
+    LocalCacheException,
+    MetaData,
+)
+from app_lib.utils.local_cacher.cache_handlers import get_cache_handler_from_meta_data
+from app_lib.utils.local_cacher.layouts import get_entry_dir
+from app_lib.utils.local_cacher.locks import delete_lock_file
+from app_lib.utils.local_cacher.meta_data_store import (
+    EVICTION_POLICIES,
+    LRU_EVICTION,
+    EvictableMetaDataStore,
+    MetaDataStore,
+)
+from app_lib.utils.local_cacher.storage_backends import (
+    FileSystemStorageBackend,
+    StorageBackend,
+)
+
+# quotas are enforced by evicting down to this fraction of the quota
+# the headroom keeps eviction from running on every write once the quota is reached
+EVICTION_TARGET_RATIO = 0.9
+# entries read from the meta data index per eviction query
+EVICTION_BATCH_SIZE = 64
+
+
+@dataclass(frozen=True)
+class EvictionConfig:
+    # size quotas for the whole cache directory and for each cached function
+    max_cache_size_bytes: Optional[int] = None
+    max_function_cache_size_bytes: Optional[int] = None
+    eviction_policy: str = LRU_EVICTION
+
+    def __post_init__(self) -> None:
+        if self.eviction_policy not in EVICTION_POLICIES:
+            err_str = 'eviction policy {} not available. available policies: {}'.format(
+                self.eviction_policy,
+                EVICTION_POLICIES,
+            )
+            raise LocalCacheException(err_str)
+
+    @property
+    def has_quota(self) -> bool:
+        return self.max_cache_size_bytes is not None or self.max_function_cache_size_bytes is not None
+
+    def validate_store(self, meta_data_store: MetaDataStore, storage_backend: Optional[StorageBackend]) -> None:
+        # quotas and eviction policies need a meta data store recording sizes and access statistics
+        # storage_backend is the backend given in place of the cache directory, if any
+        if not isinstance(meta_data_store, EvictableMetaDataStore):
+            if self.has_quota:
+                raise LocalCacheException('size quotas require use_meta_data_index')
+            if self.eviction_policy != LRU_EVICTION:
+                raise LocalCacheException('eviction policies require use_meta_data_index')
+        if self.has_quota and storage_backend is not None and not isinstance(storage_backend, FileSystemStorageBackend):
+            raise LocalCacheException('size quotas require file system storage backend')
+
+
+def evict_entries(
+    meta_data_store: EvictableMetaDataStore,
+    cache_dir: str,
+    bytes_to_evict: int,
+    eviction_policy: str,
+    *,
+    function_name: Optional[str] = None,
+    protected_file_prefix: Optional[str] = None,
+) -> List[MetaData]:
+    # candidates are read in batches in eviction order until enough bytes are freed
+    evicted_meta_data: List[MetaData] = []
+    while bytes_to_evict > 0:
+        eviction_candidates = meta_data_store.get_eviction_candidates(
+            eviction_policy=eviction_policy,
+            limit=EVICTION_BATCH_SIZE,
+            function_name=function_name,
+        )
+        eviction_candidates = [
+            (m, size_bytes) for m, size_bytes in eviction_candidates
+            if m.canonical_file_prefix != protected_file_prefix
+        ]
+        if not eviction_candidates:
+            break
+        for meta_data, size_bytes in eviction_candidates:
+            meta_data_store.record_eviction(meta_data=meta_data)
+            # meta data is deleted first so readers never find an entry without files
+            meta_data_store.delete_meta_data(meta_data=meta_data)
+            cache_handler = get_cache_handler_from_meta_data(meta_data=meta_data)
+            try:
+                cache_handler.delete_cache(
+                    meta_data=meta_data,
+                    cache_dir=get_entry_dir(cache_dir=cache_dir, meta_data=meta_data),
+                )
+            except FileNotFoundError:
+                # entry was evicted concurrently by another process
+                pass
+            delete_lock_file(canonical_file_prefix=meta_data.canonical_file_prefix, cache_dir=cache_dir)
+            evicted_meta_data.append(meta_data)
+            bytes_to_evict -= size_bytes
+            if bytes_to_evict <= 0:
+                break
+    return evicted_meta_data
+
+
+class SizeQuotas:
+    # quotas of eviction_config enforced on cache_dir after each write
+    def __init__(
+        self,
+        eviction_config: EvictionConfig,
+        meta_data_store: MetaDataStore,
+        cache_dir: str,
+    ):
+        self.eviction_config = eviction_config
+        self.meta_data_store = meta_data_store
+        self.cache_dir = cache_dir
+
+    def enforce(self, meta_data: MetaData) -> List[MetaData]:
+        # returns meta data of entries evicted. only the quotas the new entry counts towards are checked
+        # entry just written is never evicted to make room for itself
+        # quotas are only accepted with stores recording sizes
+        if not isinstance(self.meta_data_store, EvictableMetaDataStore):
+            return []
+        quotas = [
+            (self.eviction_config.max_function_cache_size_bytes, meta_data.function_name),
+            (self.eviction_config.max_cache_size_bytes, None),
+        ]
+        evicted_meta_data = []
+        for max_size_bytes, function_name in quotas:
+            if max_size_bytes is None:
+                continue
+            size_bytes = self.meta_data_store.get_size_bytes(function_name=function_name)
+            if size_bytes <= max_size_bytes:
+                continue
+            evicted_meta_data += evict_entries(
+                meta_data_store=self.meta_data_store,
+                cache_dir=self.cache_dir,
+                bytes_to_evict=size_bytes - int(max_size_bytes * EVICTION_TARGET_RATIO),
+                eviction_policy=self.eviction_config.eviction_policy,
+                function_name=function_name,
+                protected_file_prefix=meta_data.canonical_file_prefix,
+            )
+        return evicted_meta_data
@@ -0,0 +1,127 @@
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Tuple,
+    Type,
+)
+from dataclasses import dataclass
+import datetime
+import pickle
+from app_lib.utils.local_cacher.meta_data import LocalCacheException
+from app_lib.utils.local_cacher.cache_entries import (
+    CacheEntries,
+    CallPlan,
+)
+from app_lib.utils.local_cacher.cache_handlers import get_cache_handler_from_meta_data
+
+# failures are raised again for this long before the call is retried
+DEFAULT_FAILURE_VALIDITY_HOURS = 5 / 60
+FAILURE_KWARGS_HASH_SUFFIX = 'failure'
+
+
+def get_failure_kwargs_hash(kwargs_hash: str) -> str:
+    # failures are cached next to the entry of the call that failed
+    return '{}-{}'.format(kwargs_hash, FAILURE_KWARGS_HASH_SUFFIX)
+
+
+@dataclass(frozen=True)
+class FailureConfig:
+    # failures raising cached_exceptions are raised again for failure_validity_hours instead of computing
+    cached_exceptions: Tuple[Type[BaseException], ...] = ()
+    failure_validity_hours: float = DEFAULT_FAILURE_VALIDITY_HOURS
+
+
+@dataclass(frozen=True)
+class CachedFailure:
+    exception_type: Type[BaseException]
+    exception_args: Tuple[Any, ...]
+    message: str
+    failure_timestamp: float
+
+    @classmethod
+    def from_exception(cls, exception: BaseException) -> 'CachedFailure':
+        # exceptions whose type or args can not be pickled are raised again as LocalCacheException
+        exception_type: Type[BaseException] = type(exception)
+        exception_args = exception.args
+        try:
+            pickle.dumps((exception_type, exception_args), protocol=pickle.HIGHEST_PROTOCOL)
+        except (TypeError, AttributeError, pickle.PicklingError):
+            exception_type = LocalCacheException
+            exception_args = ('{}: {}'.format(type(exception).__name__, exception), )
+        return cls(
+            exception_type=exception_type,
+            exception_args=exception_args,
+            message=str(exception),
+            failure_timestamp=datetime.datetime.now().timestamp(),
+        )
+
+    def is_valid(self, failure_validity_hours: float) -> bool:
+        failure_age_seconds = datetime.datetime.now().timestamp() - self.failure_timestamp
+        return failure_age_seconds <= failure_validity_hours * 3600
+
+    def to_exception(self) -> BaseException:
+        try:
+            return self.exception_type(*self.exception_args)
+        except Exception:  # pylint: disable=broad-except
+            # exception types whose constructor does not take their args
+            return LocalCacheException('{}: {}'.format(self.exception_type.__name__, self.message))
+
+
+def raise_cached_failure(
+    entries: CacheEntries,
+    failure_config: FailureConfig,
+    call_plan: CallPlan,
+    kwargs_hash: str,
+) -> None:
+    # called on misses. failures are only looked up when exceptions are cached
+    if not failure_config.cached_exceptions:
+        return
+    # read from storage backend directly. the call was counted as a miss and replays are not hits
+    meta_data = entries.storage_backend.get_valid_meta_data(
+        canonical_file_prefix=call_plan.get_canonical_file_prefix(
+            kwargs_hash=get_failure_kwargs_hash(kwargs_hash=kwargs_hash)),
+        cache_validity_hours=entries.options.cache_validity_hours,
+    )
+    if meta_data is None:
+        return
+    try:
+        cached_failure = entries.storage_backend.read_object(
+            meta_data=meta_data,
+            cache_handler=get_cache_handler_from_meta_data(meta_data=meta_data),
+        )
+    except FileNotFoundError:
+        # payload was evicted after meta data was read
+        return
+    if cached_failure.is_valid(failure_validity_hours=failure_config.failure_validity_hours):
+        raise cached_failure.to_exception()
+
+
+def write_failure(
+    entries: CacheEntries,
+    call_plan: CallPlan,
+    kwargs_hash: str,
+    exception: BaseException,
+) -> None:
+    entries.write_to_cache(
+        call_plan=call_plan,
+        kwargs_hash=get_failure_kwargs_hash(kwargs_hash=kwargs_hash),
+        cachable_object=CachedFailure.from_exception(exception=exception),
+    )
+
+
+def compute_caching_failure(
+    entries: CacheEntries,
+    failure_config: FailureConfig,
+    func: Callable[..., Any],
+    call_plan: CallPlan,
+    *,
+    full_kwargs: Dict[str, Any],
+    kwargs_hash: str,
+) -> Tuple[Any, float]:
+    # returns (object, seconds). failures raising cached_exceptions are written before being raised
+    try:
+        return entries.compute(func=func, call_plan=call_plan, full_kwargs=full_kwargs)
+    except failure_config.cached_exceptions as exception:
+        write_failure(entries=entries, call_plan=call_plan, kwargs_hash=kwargs_hash, exception=exception)
+        raise
@@ -0,0 +1,127 @@
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+)
+from dataclasses import dataclass
+import functools
+import time
+from app_lib.utils.local_cacher.meta_data import MetaData
+from app_lib.utils.local_cacher.cache_entries import (
+    CacheEntries,
+    CallPlan,
+)
+from app_lib.utils.local_cacher.cache_handlers import project_columns
+
+
+@dataclass(frozen=True)
+class _GeneratorChunks:
+    # cached in entry of generator call once all chunks are written. each chunk is an entry of its own
+    chunk_kwargs_hashes: Tuple[str, ...]
+
+
+def wrap_generator_function(
+    func: Callable[..., Any],
+    entries: CacheEntries,
+    call_plan: CallPlan,
+) -> Callable[..., Any]:
+    # chunks are passed through while written and replayed one at a time
+    # no single flight since callers can not be made to wait on how fast another caller consumes chunks
+
+    @functools.wraps(func)
+    def generator_wrapper(*args: Any, **kwargs: Any) -> Iterator[Any]:
+        kwargs, columns = entries.options.pop_columns_kwarg(call_plan=call_plan, passed_kwargs=kwargs)
+        full_kwargs = call_plan.get_full_kwargs(
+            passed_args=args,
+            passed_kwargs=kwargs,
+        )
+        if not entries.options.uses_cache(full_kwargs=full_kwargs):
+            for chunk in func(**full_kwargs):
+                yield project_columns(cachable_object=chunk, columns=columns)
+            return
+
+        kwargs_hash = entries.get_kwargs_hash(call_plan=call_plan, full_kwargs=full_kwargs)
+        if full_kwargs[entries.options.use_cache_kwarg]:
+            chunk_meta_data = _read_chunk_meta_data(entries=entries, call_plan=call_plan, kwargs_hash=kwargs_hash)
+            if chunk_meta_data is not None:
+                for meta_data in chunk_meta_data:
+                    yield entries.read_object(meta_data=meta_data, columns=columns)
+                return
+        yield from _stream_chunks(
+            entries=entries,
+            func=func,
+            call_plan=call_plan,
+            full_kwargs=full_kwargs,
+            kwargs_hash=kwargs_hash,
+            columns=columns,
+        )
+
+    return generator_wrapper
+
+
+def _read_chunk_meta_data(entries: CacheEntries, call_plan: CallPlan, kwargs_hash: str) -> Optional[List[MetaData]]:
+    # meta data of all chunks is read before replay so chunks evicted since are a miss instead of a cut short replay
+    cache_is_valid, generator_chunks = entries.read_from_cache(
+        canonical_file_prefix=call_plan.get_canonical_file_prefix(kwargs_hash=kwargs_hash),
+        function_name=call_plan.function_name,
+    )
+    if not cache_is_valid:
+        return None
+    chunk_meta_data = []
+    for chunk_kwargs_hash in generator_chunks.chunk_kwargs_hashes:
+        meta_data = entries.storage_backend.get_valid_meta_data(
+            canonical_file_prefix=call_plan.get_canonical_file_prefix(kwargs_hash=chunk_kwargs_hash),
+            cache_validity_hours=entries.options.cache_validity_hours,
+        )
+        if meta_data is None:
+            return None
+        chunk_meta_data.append(meta_data)
+    return chunk_meta_data
+
+
+def _stream_chunks(
+    entries: CacheEntries,
+    func: Callable[..., Any],
+    call_plan: CallPlan,
+    full_kwargs: Dict[str, Any],
+    *,
+    kwargs_hash: str,
+    columns: Optional[Sequence[str]],
+) -> Iterator[Any]:
+    # generator entry is only written once generator is exhausted
+    # chunks of generators not consumed to the end are left to expire and are overwritten by next call
+    chunk_kwargs_hashes: List[str] = []
+    compute_seconds = 0.0
+    chunks = func(**full_kwargs)
+    while True:
+        start_time = time.perf_counter()
+        try:
+            chunk = next(chunks)
+        except StopIteration:
+            break
+        finally:
+            chunk_seconds = time.perf_counter() - start_time
+            compute_seconds += chunk_seconds
+        chunk_kwargs_hash = '{}-chunk-{}'.format(kwargs_hash, len(chunk_kwargs_hashes))
+        # chunks are not held in memory tier so peak memory stays at one chunk
+        entries.write_to_cache(
+            call_plan=call_plan,
+            kwargs_hash=chunk_kwargs_hash,
+            cachable_object=chunk,
+            put_in_tiers=False,
+            compute_seconds=chunk_seconds,
+        )
+        chunk_kwargs_hashes.append(chunk_kwargs_hash)
+        yield project_columns(cachable_object=chunk, columns=columns)
+    entries.record_computation(call_plan=call_plan, compute_seconds=compute_seconds)
+    entries.write_to_cache(
+        call_plan=call_plan,
+        kwargs_hash=kwargs_hash,
+        cachable_object=_GeneratorChunks(chunk_kwargs_hashes=tuple(chunk_kwargs_hashes)),
+        compute_seconds=compute_seconds,
+    )
@@ -0,0 +1,166 @@
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+)
+from dataclasses import dataclass
+import dataclasses
+import logging
+import threading
+import time
+from app_lib.utils.local_cacher.meta_data import LocalCacheException
+
+try:
+    import prometheus_client
+    from prometheus_client.core import CounterMetricFamily
+    PROMETHEUS_CLIENT_IS_INSTALLED = True
+except ImportError:
+    PROMETHEUS_CLIENT_IS_INSTALLED = False
+
+PROMETHEUS_METRIC_PREFIX = 'local_cacher'
+
+
+@dataclass
+class CacheCounters:  # pylint: disable=too-many-instance-attributes
+    # hits of any tier. expirations are misses on entries past cache validity
+    hits: int = 0
+    misses: int = 0
+    expirations: int = 0
+    # bytes of entries read from and written to storage backend
+    bytes_read: int = 0
+    bytes_written: int = 0
+    computations: int = 0
+    key_hashing_seconds: float = 0.0
+    deserialize_seconds: float = 0.0
+    serialize_seconds: float = 0.0
+    compute_seconds: float = 0.0
+
+
+@dataclass(frozen=True)
+class CacheMetricsSnapshot:
+    # counters keyed by function name and by cache handler name
+    # handler counters cover storage backend reads and writes only
+    function_counters: Dict[str, CacheCounters]
+    handler_counters: Dict[str, CacheCounters]
+
+
+def time_call(func: Callable[..., Any], full_kwargs: Dict[str, Any]) -> Tuple[Any, float]:
+    # returns (object, seconds)
+    start_time = time.perf_counter()
+    return_object = func(**full_kwargs)
+    return return_object, time.perf_counter() - start_time
+
+
+class CacheMetricsSink:
+    # sinks attached to a CacheInstrumentation receive snapshots on emit. pull based sinks read on attach
+    def attach(self, instrumentation: 'CacheInstrumentation') -> None:
+        pass
+
+    def emit(self, snapshot: CacheMetricsSnapshot) -> None:
+        pass
+
+
+class CacheInstrumentation:
+    # counters shared by the LocalCacher instances it is passed to
+    # LocalCacher without instrumentation does not read clocks or count anything
+    def __init__(self, sinks: Optional[Sequence[CacheMetricsSink]] = None):
+        self._function_counters: Dict[str, CacheCounters] = {}
+        self._handler_counters: Dict[str, CacheCounters] = {}
+        self._lock = threading.Lock()
+        self.sinks: List[CacheMetricsSink] = []
+        for sink in sinks or []:
+            self.add_sink(sink=sink)
+
+    def add_sink(self, sink: CacheMetricsSink) -> None:
+        sink.attach(instrumentation=self)
+        self.sinks.append(sink)
+
+    def record(
+        self,
+        function_name: str,
+        cache_handler_name: Optional[str] = None,
+        **counter_deltas: Any,
+    ) -> None:
+        with self._lock:
+            counter_groups = [self._function_counters.setdefault(function_name, CacheCounters())]
+            if cache_handler_name is not None:
+                counter_groups.append(self._handler_counters.setdefault(cache_handler_name, CacheCounters()))
+            for counters in counter_groups:
+                for counter_name, delta in counter_deltas.items():
+                    setattr(counters, counter_name, getattr(counters, counter_name) + delta)
+
+    def snapshot(self) -> CacheMetricsSnapshot:
+        # counters are copied so snapshots do not change
+        with self._lock:
+            snapshot = CacheMetricsSnapshot(
+                function_counters={k: dataclasses.replace(v) for k, v in self._function_counters.items()},
+                handler_counters={k: dataclasses.replace(v) for k, v in self._handler_counters.items()},
+            )
+        return snapshot
+
+    def emit(self) -> None:
+        snapshot = self.snapshot()
+        for sink in self.sinks:
+            sink.emit(snapshot=snapshot)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._function_counters.clear()
+            self._handler_counters.clear()
+
+
+class LoggingMetricsSink(CacheMetricsSink):
+    # one log record per function and handler on each emit
+    def __init__(
+        self,
+        logger: Optional[logging.Logger] = None,
+        level: int = logging.INFO,
+    ):
+        self.logger = logger or logging.getLogger(__name__)
+        self.level = level
+
+    def emit(self, snapshot: CacheMetricsSnapshot) -> None:
+        counter_groups = [
+            ('function', snapshot.function_counters),
+            ('handler', snapshot.handler_counters),
+        ]
+        for scope, counters_by_name in counter_groups:
+            for name, counters in sorted(counters_by_name.items()):
+                self.logger.log(self.level, 'local cache %s %s %s', scope, name, dataclasses.asdict(counters))
+
+
+class PrometheusMetricsSink(CacheMetricsSink):
+    # registers a collector reading counters at scrape time. emit is not needed
+    def __init__(self, registry: Any = None):
+        if not PROMETHEUS_CLIENT_IS_INSTALLED:
+            raise LocalCacheException('prometheus_client not installed')
+        self.registry = registry if registry is not None else prometheus_client.REGISTRY
+        self._instrumentation: Optional[CacheInstrumentation] = None
+
+    def attach(self, instrumentation: CacheInstrumentation) -> None:
+        self._instrumentation = instrumentation
+        self.registry.register(self)
+
+    def collect(self) -> Iterator[Any]:
+        if self._instrumentation is None:
+            return
+        snapshot = self._instrumentation.snapshot()
+        counter_groups = [
+            ('function', snapshot.function_counters),
+            ('handler', snapshot.handler_counters),
+        ]
+        for scope, counters_by_name in counter_groups:
+            for field in dataclasses.fields(CacheCounters):
+                metric_family = CounterMetricFamily(
+                    '{}_{}_{}'.format(PROMETHEUS_METRIC_PREFIX, scope, field.name),
+                    'local cache {} per {}'.format(field.name.replace('_', ' '), scope),
+                    labels=[scope],
+                )
+                for name, counters in sorted(counters_by_name.items()):
+                    metric_family.add_metric([name], getattr(counters, field.name))
+                yield metric_family
@@ -0,0 +1,71 @@
+from typing import (
+    Iterator,
+    Optional,
+)
+import hashlib
+import os
+import shutil
+from app_lib.utils.local_cacher.meta_data import MetaData
+
+# all entry files in cache_dir
+FLAT_LAYOUT = 'flat'
+# entry files in cache_dir/ab/cd where abcd leads the md5 of the canonical file prefix
+# keeps directories small for cache directories with millions of entries
+SHARDED_LAYOUT = 'sharded'
+CACHE_LAYOUTS = (FLAT_LAYOUT, SHARDED_LAYOUT)
+SHARD_NAME_LENGTH = 2
+_HEX_DIGITS = frozenset('0123456789abcdef')
+
+
+def get_layout_entry_dir(
+    cache_dir: str,
+    canonical_file_prefix: str,
+    cache_layout: Optional[str],
+) -> str:
+    # meta data written before layouts were recorded has no layout and is flat
+    if cache_layout != SHARDED_LAYOUT:
+        return cache_dir
+    # prefixes lead with function source hash so they are hashed again to spread entries of one function
+    prefix_hash = hashlib.md5(canonical_file_prefix.encode('utf8')).hexdigest()
+    return os.path.join(
+        cache_dir,
+        prefix_hash[:SHARD_NAME_LENGTH],
+        prefix_hash[SHARD_NAME_LENGTH:2 * SHARD_NAME_LENGTH],
+    )
+
+
+def get_entry_dir(cache_dir: str, meta_data: MetaData) -> str:
+    # directory holding files of entry in layout it was written in
+    return get_layout_entry_dir(
+        cache_dir=cache_dir,
+        canonical_file_prefix=meta_data.canonical_file_prefix,
+        cache_layout=meta_data.cache_layout,
+    )
+
+
+def _is_shard_name(name: str) -> bool:
+    return len(name) == SHARD_NAME_LENGTH and set(name) <= _HEX_DIGITS
+
+
+def iter_entry_dirs(cache_dir: str) -> Iterator[str]:
+    # cache_dir and every shard directory. cache directories may mix layouts while being migrated
+    yield cache_dir
+    with os.scandir(cache_dir) as outer_entries:
+        outer_dirs = [e.path for e in outer_entries if e.is_dir() and _is_shard_name(e.name)]
+    for outer_dir in outer_dirs:
+        with os.scandir(outer_dir) as inner_entries:
+            inner_dirs = [e.path for e in inner_entries if e.is_dir() and _is_shard_name(e.name)]
+        yield from inner_dirs
+
+
+def link_or_copy_file(file_path: str, linked_file_path: str) -> None:
+    # hard links share data with files being read. copies are used where links are not supported
+    if os.path.exists(linked_file_path):
+        # left by an interrupted migration
+        os.remove(linked_file_path)
+    try:
+        os.link(file_path, linked_file_path)
+    except FileNotFoundError:
+        raise
+    except OSError:
+        shutil.copy2(file_path, linked_file_path)
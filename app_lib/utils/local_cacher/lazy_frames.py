@@ -0,0 +1,121 @@
+from typing import (
+    Any,
+    Callable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+)
+import pandas as pd
+from app_lib.utils.local_cacher.meta_data import MetaData
+
+
+def get_frame_schema(frame: pd.DataFrame) -> Tuple[List[str], List[str], int]:
+    # columns, dtypes and row count recorded in meta data when frame is written
+    return [str(c) for c in frame.columns], [str(d) for d in frame.dtypes], len(frame)
+
+
+def can_read_lazily(meta_data: MetaData, columns: Optional[Sequence[str]] = None) -> bool:
+    # entries written without schema and reads of unknown columns are read eagerly
+    if meta_data.frame_columns is None or meta_data.frame_dtypes is None or meta_data.frame_row_count is None:
+        return False
+    return columns is None or set(columns) <= set(meta_data.frame_columns)
+
+
+class LazyDataFrame:
+    # stands in for a cached DataFrame. schema and row count come from meta data
+    # frame is read on first access to anything else and held from then on
+    # entries replaced or evicted before first access are read as they are at that time
+    def __init__(
+        self,
+        load_frame: Callable[[], pd.DataFrame],
+        columns: Sequence[str],
+        dtypes: Sequence[str],
+        row_count: int,
+    ):
+        self._load_frame = load_frame
+        self._columns = list(columns)
+        self._dtypes = list(dtypes)
+        self._row_count = row_count
+        self._frame: Optional[pd.DataFrame] = None
+
+    @classmethod
+    def from_meta_data(
+        cls,
+        meta_data: MetaData,
+        load_frame: Callable[[], pd.DataFrame],
+        columns: Optional[Sequence[str]] = None,
+    ) -> 'LazyDataFrame':
+        # schema of selected columns when frame is read with columns
+        dtypes_by_column = dict(zip(meta_data.frame_columns or [], meta_data.frame_dtypes or []))
+        if columns is None:
+            columns = meta_data.frame_columns or []
+        return cls(
+            load_frame=load_frame,
+            columns=columns,
+            dtypes=[dtypes_by_column[c] for c in columns],
+            row_count=meta_data.frame_row_count or 0,
+        )
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._frame is not None
+
+    def load(self) -> pd.DataFrame:
+        if self._frame is None:
+            self._frame = self._load_frame()
+        return self._frame
+
+    @property
+    def columns(self) -> pd.Index:
+        if self._frame is not None:
+            return self._frame.columns
+        return pd.Index(self._columns)
+
+    @property
+    def dtypes(self) -> pd.Series:
+        if self._frame is not None:
+            return self._frame.dtypes
+        try:
+            return pd.Series([pd.api.types.pandas_dtype(d) for d in self._dtypes], index=self._columns, dtype=object)
+        except TypeError:
+            # dtypes recorded by name can not always be rebuilt
+            return self.load().dtypes
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        if self._frame is not None:
+            return self._frame.shape
+        return self._row_count, len(self._columns)
+
+    @property
+    def empty(self) -> bool:
+        return 0 in self.shape
+
+    @property
+    def ndim(self) -> int:
+        return 2
+
+    def __len__(self) -> int:
+        return self.shape[0]
+
+    def __getattr__(self, name: str) -> Any:
+        # only called for attributes not defined above
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return getattr(self.load(), name)
+
+    def __getitem__(self, key: Any) -> Any:
+        return self.load()[key]
+
+    def __iter__(self) -> Iterator[Any]:
+        return iter(self.columns)
+
+    def __contains__(self, key: Any) -> bool:
+        return key in self.columns
+
+    def __repr__(self) -> str:
+        if self._frame is not None:
+            return repr(self._frame)
+        return '<LazyDataFrame shape={}>'.format(self.shape)
@@ -0,0 +1,108 @@
+from typing import (
+    Dict,
+    Iterator,
+    Optional,
+    TextIO,
+)
+from dataclasses import (
+    dataclass,
+    field,
+)
+import contextlib
+import os
+import threading
+
+try:
+    import fcntl
+    FCNTL_IS_AVAILABLE = True
+except ImportError:
+    FCNTL_IS_AVAILABLE = False
+
+LOCK_DIR_NAME = '.locks'
+LOCK_FILE_SUFFIX = 'lock'
+
+
+@dataclass
+class _KeyLock:
+    lock: threading.Lock = field(default_factory=threading.Lock)
+    # threads holding or waiting on lock
+    holder_count: int = 0
+
+
+class KeyedLock:
+    # one lock per key. locks are dropped once no thread holds or waits on them
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._key_locks: Dict[str, _KeyLock] = {}
+
+    @contextlib.contextmanager
+    def hold(self, key: str) -> Iterator[None]:
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, _KeyLock())
+            key_lock.holder_count += 1
+        try:
+            with key_lock.lock:
+                yield
+        finally:
+            with self._lock:
+                key_lock.holder_count -= 1
+                if key_lock.holder_count == 0:
+                    del self._key_locks[key]
+
+    def __len__(self) -> int:
+        return len(self._key_locks)
+
+
+def get_lock_file_path(
+    canonical_file_prefix: str,
+    cache_dir: str,
+) -> str:
+    lock_file_name = '{}.{}'.format(canonical_file_prefix, LOCK_FILE_SUFFIX)
+    lock_file_path = os.path.join(cache_dir, LOCK_DIR_NAME, lock_file_name)
+    return lock_file_path
+
+
+def acquire_file_lock(lock_file_path: str) -> Optional[TextIO]:
+    # exclusive advisory lock shared by all processes using the cache directory
+    # blocks until lock is acquired. returned file must be passed to release_file_lock
+    # platforms without fcntl fall back to in process locking only
+    if not FCNTL_IS_AVAILABLE:
+        return None
+    os.makedirs(os.path.dirname(lock_file_path), exist_ok=True)
+    lock_file = open(lock_file_path, 'a', encoding='utf8')  # pylint: disable=consider-using-with
+    try:
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+    except BaseException:
+        lock_file.close()
+        raise
+    return lock_file
+
+
+def release_file_lock(lock_file: Optional[TextIO]) -> None:
+    if lock_file is None:
+        return
+    try:
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+    finally:
+        lock_file.close()
+
+
+@contextlib.contextmanager
+def hold_file_lock(lock_file_path: str) -> Iterator[None]:
+    lock_file = acquire_file_lock(lock_file_path=lock_file_path)
+    try:
+        yield
+    finally:
+        release_file_lock(lock_file=lock_file)
+
+
+def delete_lock_file(
+    canonical_file_prefix: str,
+    cache_dir: str,
+) -> None:
+    # a process still holding the deleted file may overlap with one locking a new file
+    # this costs a duplicate computation at worst since entries are committed atomically
+    try:
+        os.remove(get_lock_file_path(canonical_file_prefix=canonical_file_prefix, cache_dir=cache_dir))
+    except FileNotFoundError:
+        pass
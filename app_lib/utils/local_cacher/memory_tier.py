@@ -0,0 +1,104 @@
+from typing import (
+    Any,
+    Optional,
+    Tuple,
+)
+from dataclasses import dataclass
+import collections
+import pickle
+import threading
+import numpy as np
+import pandas as pd
+from app_lib.utils.local_cacher.meta_data import MetaData
+
+
+@dataclass
+class CacheTierStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    # hits served past cache validity by stale while revalidate
+    stale_hits: int = 0
+
+
+def estimate_size_bytes(cachable_object: Any, written_size_bytes: Optional[int] = None) -> int:
+    # approximate in memory footprint of object
+    # written_size_bytes is size of entry on disk. objects never written are pickled to size them
+    if isinstance(cachable_object, pd.DataFrame):
+        return int(cachable_object.memory_usage(deep=True).sum())
+    if isinstance(cachable_object, np.ndarray) and not cachable_object.dtype.hasobject:
+        # pickling memory mapped arrays would read them from disk
+        return int(cachable_object.nbytes)
+    if written_size_bytes is not None:
+        return written_size_bytes
+    return len(pickle.dumps(cachable_object, protocol=pickle.HIGHEST_PROTOCOL))
+
+
+class MemoryCacheTier:
+    # size aware LRU of deserialized objects held in front of the disk cache
+    # objects are shared between callers and must not be mutated
+    def __init__(self, budget_bytes: int):
+        self.budget_bytes = budget_bytes
+        self.size_bytes = 0
+        self.stats = CacheTierStats()
+        self._entries: 'collections.OrderedDict[str, Tuple[MetaData, Any, int]]' = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(
+        self,
+        canonical_file_prefix: str,
+        cache_validity_hours: float,
+    ) -> Tuple[bool, Any]:
+        # returns (found, object) so that None can be cached
+        with self._lock:
+            entry = self._entries.get(canonical_file_prefix)
+            if entry is not None:
+                meta_data, cached_object, _ = entry
+                if meta_data.is_valid(cache_validity_hours=cache_validity_hours):
+                    self._entries.move_to_end(canonical_file_prefix)
+                    self.stats.hits += 1
+                    return True, cached_object
+                # stale entries are dropped on read
+                self._remove(canonical_file_prefix=canonical_file_prefix)
+            self.stats.misses += 1
+            return False, None
+
+    def put(
+        self,
+        meta_data: MetaData,
+        cachable_object: Any,
+        size_bytes: Optional[int] = None,
+    ) -> None:
+        if size_bytes is None:
+            size_bytes = estimate_size_bytes(cachable_object=cachable_object, written_size_bytes=meta_data.size_bytes)
+        canonical_file_prefix = meta_data.canonical_file_prefix
+        with self._lock:
+            self._remove(canonical_file_prefix=canonical_file_prefix)
+            # objects larger than the whole budget are never held
+            if size_bytes > self.budget_bytes:
+                return
+            self._entries[canonical_file_prefix] = (meta_data, cachable_object, size_bytes)
+            self.size_bytes += size_bytes
+            # evict least recently used entries until within budget
+            while self.size_bytes > self.budget_bytes:
+                lru_prefix = next(iter(self._entries))
+                self._remove(canonical_file_prefix=lru_prefix)
+                self.stats.evictions += 1
+
+    def discard(self, canonical_file_prefix: str) -> None:
+        with self._lock:
+            self._remove(canonical_file_prefix=canonical_file_prefix)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.size_bytes = 0
+
+    def _remove(self, canonical_file_prefix: str) -> None:
+        # caller must hold lock
+        entry = self._entries.pop(canonical_file_prefix, None)
+        if entry is not None:
+            self.size_bytes -= entry[2]
@@ -0,0 +1,151 @@
+from typing import (
+    List,
+    Optional,
+    Type,
+    TypeVar,
+)
+from dataclasses import dataclass
+import datetime
+import os
+import json
+import tempfile
+
+DEFAULT_USE_CACHE_KWARG = 'use_cache'
+DEFAULT_COLUMNS_KWARG = 'cache_columns'
+DEFAULT_CACHE_VALIDITY_HOURS = 24 * 7
+DATETIME_FORMAT_STR = '%Y-%m-%d %H:%M:%S'
+# files being written are prefixed so they are never mistaken for cache entries
+TEMP_FILE_PREFIX = '.tmp-'
+
+TMetaData = TypeVar('TMetaData', bound='MetaData')
+
+
+class LocalCacheException(Exception):
+    pass
+
+
+def _get_canonical_file_prefix(
+    function_source_hash: str,
+    kwargs_hash: str,
+) -> str:
+    file_prefix_str = '{}-{}'.format(function_source_hash, kwargs_hash)
+    return file_prefix_str
+
+
+@dataclass(frozen=True)
+class MetaData:  # pylint: disable=too-many-instance-attributes
+    write_datetime_str: str
+    canonical_file_prefix: str
+    cache_handler_name: str
+    function_source_hash: str
+    kwargs_hash: str
+    function_name: str
+    function_file_location: str
+    # codec used by handlers that compress payloads
+    compression_codec: Optional[str] = None
+    # key of payload for storage backends that do not store payloads next to meta data
+    payload_key: Optional[str] = None
+    # directory layout of entry files. None for entries written before layouts were recorded
+    cache_layout: Optional[str] = None
+    # schema of frames recorded by handlers that keep dtypes. lets hits skip reading frames
+    frame_columns: Optional[List[str]] = None
+    frame_dtypes: Optional[List[str]] = None
+    frame_row_count: Optional[int] = None
+    # seconds taken to compute cached object and size of its serialized files. None if not recorded
+    compute_seconds: Optional[float] = None
+    size_bytes: Optional[int] = None
+    # set on meta data read from a read only base layer. entries of base layers are never written or evicted
+    from_base_layer: bool = False
+
+    def write_to_disk(
+        self,
+        cache_dir: str,
+    ) -> None:
+        meta_data_dict = self.__dict__
+        file_path = MetaData._get_meta_data_file_path(
+            canonical_file_prefix=self.canonical_file_prefix,
+            cache_dir=cache_dir,
+        )
+        # write to temporary file and rename. readers never see partially written meta data
+        temp_file_descriptor, temp_file_path = tempfile.mkstemp(prefix=TEMP_FILE_PREFIX, dir=cache_dir)
+        try:
+            with os.fdopen(temp_file_descriptor, 'w', encoding='utf8') as f:
+                json.dump(meta_data_dict, f, indent=0)
+            os.replace(temp_file_path, file_path)
+        except BaseException:
+            os.remove(temp_file_path)
+            raise
+
+    @classmethod
+    def from_disk(
+        cls: Type[TMetaData],
+        canonical_file_prefix: str,
+        cache_dir: str,
+    ) -> TMetaData:
+        file_path = cls._get_meta_data_file_path(
+            canonical_file_prefix=canonical_file_prefix,
+            cache_dir=cache_dir,
+        )
+        with open(file_path, 'r', encoding='utf8') as f:
+            meta_data = cls(**json.load(f))
+        return meta_data
+
+    @staticmethod
+    def cache_is_valid(
+        cache_validity_hours: int,
+        canonical_file_prefix: str,
+        cache_dir: str,
+    ) -> bool:
+        # if file does not exist there is no cache
+        meta_data_file_path = MetaData._get_meta_data_file_path(
+            canonical_file_prefix=canonical_file_prefix,
+            cache_dir=cache_dir,
+        )
+        if not os.path.exists(meta_data_file_path):
+            return False
+        cache_meta_data = MetaData.from_disk(
+            canonical_file_prefix=canonical_file_prefix,
+            cache_dir=cache_dir,
+        )
+        return cache_meta_data.is_valid(cache_validity_hours=cache_validity_hours)
+
+    def get_write_datetime(self) -> datetime.datetime:
+        write_datetime = datetime.datetime.strptime(self.write_datetime_str, DATETIME_FORMAT_STR)
+        return write_datetime
+
+    def get_write_timestamp(self) -> float:
+        # seconds since epoch. used to index and compare write times
+        write_timestamp = self.get_write_datetime().timestamp()
+        return write_timestamp
+
+    def is_valid(self, cache_validity_hours: float) -> bool:
+        # check that cache is not stale
+        cache_time = self.get_write_datetime()
+        current_time = datetime.datetime.now()
+        cache_time_delta = current_time - cache_time
+        if cache_time_delta < datetime.timedelta(seconds=0):
+            err_str = 'cache time {} prior to current time {}'.format(cache_time, current_time)
+            raise LocalCacheException(err_str)
+        if cache_time_delta > datetime.timedelta(hours=cache_validity_hours):
+            return False
+
+        return True
+
+    @staticmethod
+    def _get_meta_data_file_path(
+        canonical_file_prefix: str,
+        cache_dir: str,
+    ) -> str:
+        file_name = '{}-meta.json'.format(canonical_file_prefix)
+        file_path = os.path.join(cache_dir, file_name)
+        return file_path
+
+    def delete_meta_data(
+        self,
+        cache_dir: str,
+    ) -> None:
+        meta_data_file_path = self._get_meta_data_file_path(
+            canonical_file_prefix=self.canonical_file_prefix,
+            cache_dir=cache_dir,
+        )
+        os.remove(meta_data_file_path)
@@ -0,0 +1,525 @@
+from typing import (
+    Dict,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+)
+from dataclasses import dataclass
+import abc
+import datetime
+import json
+import os
+import sqlite3
+import threading
+from app_lib.utils.local_cacher.meta_data import MetaData
+from app_lib.utils.local_cacher.layouts import (
+    SHARDED_LAYOUT,
+    get_entry_dir,
+    get_layout_entry_dir,
+    iter_entry_dirs,
+)
+
+META_DATA_FILE_SUFFIX = '-meta.json'
+META_DATA_INDEX_FILE_NAME = 'meta-data-index.sqlite3'
+# seconds a connection waits on a write lock held by another process
+META_DATA_INDEX_TIMEOUT_SECONDS = 30.0
+# bulk lookups query this many entries per statement. older sqlite builds allow 999 parameters
+META_DATA_INDEX_LOOKUP_BATCH_SIZE = 500
+# eviction policies for size bounded cache directories
+LRU_EVICTION = 'lru'
+LFU_EVICTION = 'lfu'
+# GreedyDual-Size. entries that took long to compute for their size are kept
+# priority of an entry is compute seconds per byte on top of the priority of the last evicted entry
+# so entries not accessed for a while age out however costly they are
+COST_EVICTION = 'cost'
+_EVICTION_ORDER_BY = {
+    LRU_EVICTION: 'last_access_timestamp ASC',
+    LFU_EVICTION: 'hit_count ASC, last_access_timestamp ASC',
+    COST_EVICTION: 'eviction_priority ASC, last_access_timestamp ASC',
+}
+EVICTION_POLICIES = tuple(_EVICTION_ORDER_BY.keys())
+
+_META_DATA_INDEX_SCHEMA = (
+    '''
+    CREATE TABLE IF NOT EXISTS cache_entries (
+        canonical_file_prefix TEXT PRIMARY KEY,
+        function_name TEXT NOT NULL,
+        write_timestamp REAL NOT NULL,
+        size_bytes INTEGER NOT NULL DEFAULT 0,
+        last_access_timestamp REAL NOT NULL,
+        hit_count INTEGER NOT NULL DEFAULT 0,
+        meta_data_json TEXT NOT NULL
+    )
+    ''',
+    'CREATE INDEX IF NOT EXISTS cache_entries_write_timestamp ON cache_entries (write_timestamp)',
+    'CREATE INDEX IF NOT EXISTS cache_entries_function_name ON cache_entries (function_name)',
+    'CREATE INDEX IF NOT EXISTS cache_entries_last_access_timestamp ON cache_entries (last_access_timestamp)',
+    'CREATE INDEX IF NOT EXISTS cache_entries_hit_count ON cache_entries (hit_count, last_access_timestamp)',
+    'CREATE TABLE IF NOT EXISTS eviction_state (name TEXT PRIMARY KEY, value REAL NOT NULL)',
+    "INSERT OR IGNORE INTO eviction_state (name, value) VALUES ('inflation', 0)",
+)
+# columns added to indexes created by earlier versions. entries without recorded compute time cost nothing
+_META_DATA_INDEX_ADDED_COLUMNS = (
+    ('compute_seconds', 'REAL NOT NULL DEFAULT 0'),
+    ('eviction_priority', 'REAL NOT NULL DEFAULT 0'),
+)
+_META_DATA_INDEX_ADDED_INDEXES = (
+    'CREATE INDEX IF NOT EXISTS cache_entries_eviction_priority '
+    'ON cache_entries (eviction_priority, last_access_timestamp)',
+)
+# running size of entries of each function kept by triggers so quota checks do not sum the whole index
+_SIZE_TOTALS_SCHEMA = (
+    'CREATE TABLE IF NOT EXISTS function_sizes (function_name TEXT PRIMARY KEY, size_bytes INTEGER NOT NULL)',
+    '''
+    CREATE TRIGGER IF NOT EXISTS cache_entries_size_insert AFTER INSERT ON cache_entries BEGIN
+        INSERT INTO function_sizes (function_name, size_bytes) VALUES (NEW.function_name, NEW.size_bytes)
+        ON CONFLICT (function_name) DO UPDATE SET size_bytes = size_bytes + excluded.size_bytes;
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS cache_entries_size_delete AFTER DELETE ON cache_entries BEGIN
+        UPDATE function_sizes SET size_bytes = size_bytes - OLD.size_bytes WHERE function_name = OLD.function_name;
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS cache_entries_size_update AFTER UPDATE OF function_name, size_bytes ON cache_entries
+    BEGIN
+        UPDATE function_sizes SET size_bytes = size_bytes - OLD.size_bytes WHERE function_name = OLD.function_name;
+        INSERT INTO function_sizes (function_name, size_bytes) VALUES (NEW.function_name, NEW.size_bytes)
+        ON CONFLICT (function_name) DO UPDATE SET size_bytes = size_bytes + excluded.size_bytes;
+    END
+    ''',
+)
+_EVICTION_PRIORITY_SQL = (
+    "(SELECT value FROM eviction_state WHERE name = 'inflation') + compute_seconds / MAX(size_bytes, 1)"
+)
+
+
+@dataclass(frozen=True)
+class CacheEntryStats:
+    canonical_file_prefix: str
+    size_bytes: int
+    last_access_timestamp: float
+    hit_count: int
+
+
+def _get_expiry_timestamp(cache_validity_hours: float) -> float:
+    expiry_datetime = datetime.datetime.now() - datetime.timedelta(hours=cache_validity_hours)
+    return expiry_datetime.timestamp()
+
+
+class MetaDataStore(abc.ABC):
+    # stores meta data for all cache entries in a single cache directory
+    def __init__(self, cache_dir: str):
+        self.cache_dir = cache_dir
+
+    @abc.abstractmethod
+    def get_meta_data(self, canonical_file_prefix: str) -> Optional[MetaData]:
+        pass
+
+    def get_valid_meta_data(
+        self,
+        canonical_file_prefix: str,
+        cache_validity_hours: float,
+    ) -> Optional[MetaData]:
+        # single read of meta data. returns None if entry is missing or stale
+        meta_data = self.get_meta_data(canonical_file_prefix=canonical_file_prefix)
+        if meta_data is None or not meta_data.is_valid(cache_validity_hours=cache_validity_hours):
+            return None
+        return meta_data
+
+    def get_many_valid_meta_data(
+        self,
+        canonical_file_prefixes: Sequence[str],
+        cache_validity_hours: float,
+    ) -> Dict[str, MetaData]:
+        # valid meta data keyed by canonical file prefix. missing and stale entries are left out
+        many_meta_data = {}
+        for canonical_file_prefix in canonical_file_prefixes:
+            meta_data = self.get_valid_meta_data(
+                canonical_file_prefix=canonical_file_prefix,
+                cache_validity_hours=cache_validity_hours,
+            )
+            if meta_data is not None:
+                many_meta_data[canonical_file_prefix] = meta_data
+        return many_meta_data
+
+    @abc.abstractmethod
+    def write_meta_data(
+        self,
+        meta_data: MetaData,
+        size_bytes: int = 0,
+    ) -> None:
+        pass
+
+    @abc.abstractmethod
+    def delete_meta_data(self, meta_data: MetaData) -> None:
+        pass
+
+    def record_hit(self, canonical_file_prefix: str) -> None:
+        pass
+
+    def record_hits(self, canonical_file_prefixes: Sequence[str]) -> None:
+        for canonical_file_prefix in canonical_file_prefixes:
+            self.record_hit(canonical_file_prefix=canonical_file_prefix)
+
+    @abc.abstractmethod
+    def get_all_meta_data(self) -> List[MetaData]:
+        pass
+
+    def get_expired_meta_data(self, cache_validity_hours: float) -> List[MetaData]:
+        expiry_timestamp = _get_expiry_timestamp(cache_validity_hours=cache_validity_hours)
+        expired_meta_data = [m for m in self.get_all_meta_data() if m.get_write_timestamp() <= expiry_timestamp]
+        return expired_meta_data
+
+    def get_function_meta_data(self, function_name: str) -> List[MetaData]:
+        function_meta_data = [m for m in self.get_all_meta_data() if m.function_name == function_name]
+        return function_meta_data
+
+
+class EvictableMetaDataStore(MetaDataStore):
+    # stores recording sizes, compute time and access statistics of entries
+    # size quotas, eviction and retained compute time require one
+    @abc.abstractmethod
+    def get_size_bytes(self, function_name: Optional[str] = None) -> int:
+        pass
+
+    @abc.abstractmethod
+    def get_compute_seconds(self, function_name: Optional[str] = None) -> float:
+        pass
+
+    @abc.abstractmethod
+    def record_eviction(self, meta_data: MetaData) -> None:
+        # called before evicted entries are deleted
+        pass
+
+    @abc.abstractmethod
+    def get_eviction_candidates(
+        self,
+        eviction_policy: str,
+        limit: int,
+        function_name: Optional[str] = None,
+    ) -> List[Tuple[MetaData, int]]:
+        pass
+
+
+class JsonMetaDataStore(MetaDataStore):
+    # one -meta.json file per cache entry, stored next to the cached object
+    # sizes and access statistics are not recorded so entries can not be evicted by size
+    def get_meta_data(self, canonical_file_prefix: str) -> Optional[MetaData]:
+        # flat entries are looked up first. cache directories may mix layouts while being migrated
+        try:
+            return MetaData.from_disk(
+                canonical_file_prefix=canonical_file_prefix,
+                cache_dir=self.cache_dir,
+            )
+        except FileNotFoundError:
+            pass
+        try:
+            return MetaData.from_disk(
+                canonical_file_prefix=canonical_file_prefix,
+                cache_dir=get_layout_entry_dir(
+                    cache_dir=self.cache_dir,
+                    canonical_file_prefix=canonical_file_prefix,
+                    cache_layout=SHARDED_LAYOUT,
+                ),
+            )
+        except FileNotFoundError:
+            return None
+
+    def write_meta_data(
+        self,
+        meta_data: MetaData,
+        size_bytes: int = 0,
+    ) -> None:
+        meta_data.write_to_disk(cache_dir=get_entry_dir(cache_dir=self.cache_dir, meta_data=meta_data))
+
+    def delete_meta_data(self, meta_data: MetaData) -> None:
+        meta_data.delete_meta_data(cache_dir=get_entry_dir(cache_dir=self.cache_dir, meta_data=meta_data))
+
+    def get_all_meta_data(self) -> List[MetaData]:
+        all_meta_data: List[MetaData] = []
+        for entry_dir in iter_entry_dirs(cache_dir=self.cache_dir):
+            canonical_file_prefixes = [
+                f[:-len(META_DATA_FILE_SUFFIX)] for f in os.listdir(entry_dir)
+                if f.endswith(META_DATA_FILE_SUFFIX) and os.path.isfile(os.path.join(entry_dir, f))
+            ]
+            all_meta_data.extend(
+                MetaData.from_disk(canonical_file_prefix=p, cache_dir=entry_dir) for p in canonical_file_prefixes
+            )
+        return all_meta_data
+
+
+class SqliteMetaDataStore(EvictableMetaDataStore):
+    # single sqlite index per cache directory in WAL mode
+    # readers do not block writers and lookups, sweeps and per function queries use indexes
+    def __init__(self, cache_dir: str):
+        super().__init__(cache_dir=cache_dir)
+        self.index_file_path = os.path.join(cache_dir, META_DATA_INDEX_FILE_NAME)
+        # sqlite connections may not be shared across threads
+        self._thread_local = threading.local()
+
+    def _get_connection(self) -> sqlite3.Connection:
+        connection: Optional[sqlite3.Connection] = getattr(self._thread_local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(
+                self.index_file_path,
+                timeout=META_DATA_INDEX_TIMEOUT_SECONDS,
+                isolation_level=None,
+            )
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            for statement in _META_DATA_INDEX_SCHEMA:
+                connection.execute(statement)
+            SqliteMetaDataStore._add_missing_columns(connection=connection)
+            SqliteMetaDataStore._add_size_totals(connection=connection)
+            self._thread_local.connection = connection
+        return connection
+
+    @staticmethod
+    def _add_missing_columns(connection: sqlite3.Connection) -> None:
+        column_names = {row[1] for row in connection.execute('PRAGMA table_info(cache_entries)')}
+        for column_name, column_definition in _META_DATA_INDEX_ADDED_COLUMNS:
+            if column_name in column_names:
+                continue
+            try:
+                connection.execute('ALTER TABLE cache_entries ADD COLUMN {} {}'.format(column_name, column_definition))
+            except sqlite3.OperationalError:
+                # added concurrently by another process
+                pass
+        for statement in _META_DATA_INDEX_ADDED_INDEXES:
+            connection.execute(statement)
+
+    @staticmethod
+    def _add_size_totals(connection: sqlite3.Connection) -> None:
+        # totals of indexes created by earlier versions are summed once, under a write lock
+        # so entries written concurrently are counted by triggers or by the sum, not both
+        table_exists_sql = "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'function_sizes'"
+        if connection.execute(table_exists_sql).fetchone() is not None:
+            return
+        connection.execute('BEGIN IMMEDIATE')
+        with connection:
+            if connection.execute(table_exists_sql).fetchone() is not None:
+                return
+            for statement in _SIZE_TOTALS_SCHEMA:
+                connection.execute(statement)
+            connection.execute(
+                'INSERT INTO function_sizes SELECT function_name, SUM(size_bytes) FROM cache_entries '
+                'GROUP BY function_name'
+            )
+
+    @staticmethod
+    def _to_meta_data(rows: List[Tuple[str]]) -> List[MetaData]:
+        all_meta_data = [MetaData(**json.loads(row[0])) for row in rows]
+        return all_meta_data
+
+    def get_meta_data(self, canonical_file_prefix: str) -> Optional[MetaData]:
+        rows = self._get_connection().execute(
+            'SELECT meta_data_json FROM cache_entries WHERE canonical_file_prefix = ?',
+            (canonical_file_prefix, ),
+        ).fetchall()
+        if not rows:
+            return None
+        return self._to_meta_data(rows=rows)[0]
+
+    def get_many_valid_meta_data(
+        self,
+        canonical_file_prefixes: Sequence[str],
+        cache_validity_hours: float,
+    ) -> Dict[str, MetaData]:
+        expiry_timestamp = _get_expiry_timestamp(cache_validity_hours=cache_validity_hours)
+        rows = []
+        for i in range(0, len(canonical_file_prefixes), META_DATA_INDEX_LOOKUP_BATCH_SIZE):
+            batch_prefixes = list(canonical_file_prefixes[i:i + META_DATA_INDEX_LOOKUP_BATCH_SIZE])
+            rows.extend(
+                self._get_connection().execute(
+                    '''
+                    SELECT meta_data_json FROM cache_entries
+                    WHERE canonical_file_prefix IN ({}) AND write_timestamp > ?
+                    '''.format(', '.join('?' * len(batch_prefixes))),
+                    (*batch_prefixes, expiry_timestamp),
+                ).fetchall()
+            )
+        return {m.canonical_file_prefix: m for m in self._to_meta_data(rows=rows)}
+
+    def write_meta_data(
+        self,
+        meta_data: MetaData,
+        size_bytes: int = 0,
+    ) -> None:
+        # upsert so replaced entries fire update triggers. conflict clauses of outer statements override triggers
+        write_timestamp = meta_data.get_write_timestamp()
+        self._get_connection().execute(
+            '''
+            INSERT INTO cache_entries (
+                canonical_file_prefix,
+                function_name,
+                write_timestamp,
+                size_bytes,
+                last_access_timestamp,
+                hit_count,
+                meta_data_json,
+                compute_seconds,
+                eviction_priority
+            ) VALUES (?, ?, ?, ?, ?, 0, ?, ?, (SELECT value FROM eviction_state WHERE name = 'inflation') + ?)
+            ON CONFLICT (canonical_file_prefix) DO UPDATE SET
+                function_name = excluded.function_name,
+                write_timestamp = excluded.write_timestamp,
+                size_bytes = excluded.size_bytes,
+                last_access_timestamp = excluded.last_access_timestamp,
+                hit_count = 0,
+                meta_data_json = excluded.meta_data_json,
+                compute_seconds = excluded.compute_seconds,
+                eviction_priority = excluded.eviction_priority
+            ''',
+            (
+                meta_data.canonical_file_prefix,
+                meta_data.function_name,
+                write_timestamp,
+                size_bytes,
+                write_timestamp,
+                json.dumps(meta_data.__dict__),
+                meta_data.compute_seconds or 0,
+                (meta_data.compute_seconds or 0) / max(size_bytes, 1),
+            ),
+        )
+
+    def delete_meta_data(self, meta_data: MetaData) -> None:
+        self._get_connection().execute(
+            'DELETE FROM cache_entries WHERE canonical_file_prefix = ?',
+            (meta_data.canonical_file_prefix, ),
+        )
+
+    def record_hit(self, canonical_file_prefix: str) -> None:
+        self._get_connection().execute(
+            '''
+            UPDATE cache_entries
+            SET hit_count = hit_count + 1, last_access_timestamp = ?, eviction_priority = {}
+            WHERE canonical_file_prefix = ?
+            '''.format(_EVICTION_PRIORITY_SQL),
+            (datetime.datetime.now().timestamp(), canonical_file_prefix),
+        )
+
+    def record_hits(self, canonical_file_prefixes: Sequence[str]) -> None:
+        # single transaction for all hits. connections are in autocommit mode so it is begun explicitly
+        access_timestamp = datetime.datetime.now().timestamp()
+        connection = self._get_connection()
+        connection.execute('BEGIN')
+        with connection:
+            connection.executemany(
+                '''
+                UPDATE cache_entries
+                SET hit_count = hit_count + 1, last_access_timestamp = ?, eviction_priority = {}
+                WHERE canonical_file_prefix = ?
+                '''.format(_EVICTION_PRIORITY_SQL),
+                [(access_timestamp, p) for p in canonical_file_prefixes],
+            )
+
+    def get_all_meta_data(self) -> List[MetaData]:
+        rows = self._get_connection().execute('SELECT meta_data_json FROM cache_entries').fetchall()
+        return self._to_meta_data(rows=rows)
+
+    def get_expired_meta_data(self, cache_validity_hours: float) -> List[MetaData]:
+        rows = self._get_connection().execute(
+            'SELECT meta_data_json FROM cache_entries WHERE write_timestamp <= ?',
+            (_get_expiry_timestamp(cache_validity_hours=cache_validity_hours), ),
+        ).fetchall()
+        return self._to_meta_data(rows=rows)
+
+    def get_function_meta_data(self, function_name: str) -> List[MetaData]:
+        rows = self._get_connection().execute(
+            'SELECT meta_data_json FROM cache_entries WHERE function_name = ?',
+            (function_name, ),
+        ).fetchall()
+        return self._to_meta_data(rows=rows)
+
+    def get_entry_stats(self, canonical_file_prefix: str) -> Optional[CacheEntryStats]:
+        # size and access statistics recorded for entry
+        row = self._get_connection().execute(
+            '''
+            SELECT canonical_file_prefix, size_bytes, last_access_timestamp, hit_count
+            FROM cache_entries WHERE canonical_file_prefix = ?
+            ''',
+            (canonical_file_prefix, ),
+        ).fetchone()
+        if row is None:
+            return None
+        return CacheEntryStats(*row)
+
+    def get_size_bytes(self, function_name: Optional[str] = None) -> int:
+        # recorded size of all entries, or entries of function_name. read from running totals
+        if function_name is None:
+            row = self._get_connection().execute('SELECT SUM(size_bytes) FROM function_sizes').fetchone()
+        else:
+            row = self._get_connection().execute(
+                'SELECT size_bytes FROM function_sizes WHERE function_name = ?',
+                (function_name, ),
+            ).fetchone()
+        return 0 if row is None else int(row[0] or 0)
+
+    def get_compute_seconds(self, function_name: Optional[str] = None) -> float:
+        # recorded compute time of all entries, or entries of function_name. time saved by entries still cached
+        if function_name is None:
+            row = self._get_connection().execute('SELECT SUM(compute_seconds) FROM cache_entries').fetchone()
+        else:
+            row = self._get_connection().execute(
+                'SELECT SUM(compute_seconds) FROM cache_entries WHERE function_name = ?',
+                (function_name, ),
+            ).fetchone()
+        return float(row[0] or 0)
+
+    def record_eviction(self, meta_data: MetaData) -> None:
+        # priorities of entries written or hit from now on start at priority of evicted entry
+        self._get_connection().execute(
+            '''
+            UPDATE eviction_state SET value = MAX(value, COALESCE(
+                (SELECT eviction_priority FROM cache_entries WHERE canonical_file_prefix = ?),
+                value
+            ))
+            WHERE name = 'inflation'
+            ''',
+            (meta_data.canonical_file_prefix, ),
+        )
+
+    def get_eviction_candidates(
+        self,
+        eviction_policy: str,
+        limit: int,
+        function_name: Optional[str] = None,
+    ) -> List[Tuple[MetaData, int]]:
+        # first limit entries in eviction order with their recorded size
+        # read through an index so only evicted entries are visited
+        order_by = _EVICTION_ORDER_BY[eviction_policy]
+        if function_name is None:
+            rows = self._get_connection().execute(
+                'SELECT meta_data_json, size_bytes FROM cache_entries ORDER BY {} LIMIT ?'.format(order_by),
+                (limit, ),
+            ).fetchall()
+        else:
+            rows = self._get_connection().execute(
+                'SELECT meta_data_json, size_bytes FROM cache_entries WHERE function_name = ? ORDER BY {} LIMIT ?'.
+                format(order_by),
+                (function_name, limit),
+            ).fetchall()
+        eviction_candidates = [(MetaData(**json.loads(row[0])), int(row[1])) for row in rows]
+        return eviction_candidates
+
+
+# stores are shared by all LocalCacher instances pointing to the same directory
+_META_DATA_STORES: Dict[Tuple[str, bool], MetaDataStore] = {}
+_META_DATA_STORES_LOCK = threading.Lock()
+
+
+def get_meta_data_store(
+    cache_dir: str,
+    use_meta_data_index: bool = False,
+) -> MetaDataStore:
+    store_key = (os.path.abspath(cache_dir), use_meta_data_index)
+    with _META_DATA_STORES_LOCK:
+        if store_key not in _META_DATA_STORES:
+            if use_meta_data_index:
+                _META_DATA_STORES[store_key] = SqliteMetaDataStore(cache_dir=cache_dir)
+            else:
+                _META_DATA_STORES[store_key] = JsonMetaDataStore(cache_dir=cache_dir)
+        return _META_DATA_STORES[store_key]
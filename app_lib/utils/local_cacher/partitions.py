@@ -0,0 +1,205 @@
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Optional,
+    Sequence,
+)
+from dataclasses import dataclass
+import functools
+import inspect
+import pandas as pd
+from app_lib.utils.local_cacher.meta_data import LocalCacheException
+from app_lib.utils.local_cacher.cache_entries import (
+    CacheEntries,
+    CallPlan,
+)
+from app_lib.utils.local_cacher.cache_handlers import project_columns
+from app_lib.utils.local_cacher.tiers import TierConfig
+
+# frames holding rows of items in partition_column are concatenated
+CONCAT_PARTITIONS = 'concat'
+# dicts keyed by items are merged
+MERGE_PARTITIONS = 'merge'
+PARTITION_COMBINES = (CONCAT_PARTITIONS, MERGE_PARTITIONS)
+
+
+@dataclass(frozen=True)
+class PartitionSpec:
+    # list valued kwarg whose items are cached independently and how results of items combine
+    partition_kwarg: str
+    combine: str
+    partition_column: Optional[str] = None
+
+    def __post_init__(self) -> None:
+        if self.combine not in PARTITION_COMBINES:
+            err_str = 'partition combine {} not available. available combines: {}'.format(
+                self.combine,
+                PARTITION_COMBINES,
+            )
+            raise LocalCacheException(err_str)
+        if self.combine == CONCAT_PARTITIONS and self.partition_column is None:
+            raise LocalCacheException('partition_column is required to concat partitions')
+
+
+def split_partitions(
+    partition_spec: PartitionSpec,
+    cachable_object: Any,
+    items: Sequence[Any],
+) -> Dict[Any, Any]:
+    # result of one call for items split into result of each item. items without rows or keys get empty results
+    if partition_spec.combine == CONCAT_PARTITIONS:
+        if not isinstance(cachable_object, pd.DataFrame):
+            err_str = 'can only concat partitions of DataFrame. returned type {}'.format(type(cachable_object))
+            raise LocalCacheException(err_str)
+        groups = dict(list(cachable_object.groupby(partition_spec.partition_column, sort=False)))
+        return {item: groups.get(item, cachable_object.iloc[0:0]) for item in items}
+    if not isinstance(cachable_object, dict):
+        err_str = 'can only merge partitions of dict. returned type {}'.format(type(cachable_object))
+        raise LocalCacheException(err_str)
+    return {item: {item: cachable_object[item]} if item in cachable_object else {} for item in items}
+
+
+def combine_partitions(partition_spec: PartitionSpec, partitions: Sequence[Any]) -> Any:
+    # partitions are combined in order of requested items
+    if partition_spec.combine == CONCAT_PARTITIONS:
+        return pd.concat(partitions, ignore_index=True)
+    combined: Dict[Any, Any] = {}
+    for partition in partitions:
+        combined.update(partition)
+    return combined
+
+
+def wrap_partition_function(
+    func: Callable[..., Any],
+    entries: CacheEntries,
+    tier_config: TierConfig,
+    partition_spec: PartitionSpec,
+) -> Callable[..., Any]:
+    # result of each item is cached as the entry of a call for that item alone
+    # missing items are computed in one call and split by partition_column or by dict keys
+    call_plan = CallPlan.from_function(func=func)
+    if inspect.iscoroutinefunction(func):
+        raise LocalCacheException('partition caching does not support coroutine functions')
+    partition_kwarg = partition_spec.partition_kwarg
+    if partition_kwarg not in call_plan.parameter_names:
+        err_str = '{} is not a parameter of {}'.format(partition_kwarg, call_plan.function_name)
+        raise LocalCacheException(err_str)
+    compute_func = tier_config.get_compute_func(func=func)
+
+    @functools.wraps(func)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        kwargs, columns = entries.options.pop_columns_kwarg(call_plan=call_plan, passed_kwargs=kwargs)
+        full_kwargs = call_plan.get_full_kwargs(
+            passed_args=args,
+            passed_kwargs=kwargs,
+        )
+        # duplicate items are computed and returned once
+        items = list(dict.fromkeys(full_kwargs[partition_kwarg]))
+        if not entries.options.uses_cache(full_kwargs=full_kwargs) or not items:
+            return_object, _ = entries.compute(func=compute_func, call_plan=call_plan, full_kwargs=full_kwargs)
+            return project_columns(cachable_object=return_object, columns=columns)
+        # calls differing only in items wait on each other so shared missing items are computed once
+        series_kwargs = {k: v for k, v in full_kwargs.items() if k != partition_kwarg}
+        series_file_prefix = call_plan.get_canonical_file_prefix(kwargs_hash='{}-partitions'.format(
+            entries.get_kwargs_hash(call_plan=call_plan, full_kwargs=series_kwargs)))
+
+        partitions: Dict[Any, Any] = {}
+        if full_kwargs[entries.options.use_cache_kwarg]:
+            partitions = _read_partitions(
+                entries=entries,
+                call_plan=call_plan,
+                partition_spec=partition_spec,
+                full_kwargs=full_kwargs,
+                items=items,
+            )
+        if len(partitions) < len(items):
+            with entries.hold_single_flight(canonical_file_prefix=series_file_prefix):
+                partitions = _compute_partitions(
+                    entries=entries,
+                    func=compute_func,
+                    call_plan=call_plan,
+                    partition_spec=partition_spec,
+                    full_kwargs=full_kwargs,
+                    items=items,
+                )
+        return project_columns(
+            cachable_object=combine_partitions(
+                partition_spec=partition_spec,
+                partitions=[partitions[item] for item in items],
+            ),
+            columns=columns,
+        )
+
+    return wrapper
+
+
+def _read_partitions(
+    entries: CacheEntries,
+    call_plan: CallPlan,
+    partition_spec: PartitionSpec,
+    full_kwargs: Dict[str, Any],
+    *,
+    items: Sequence[Any],
+    is_recheck: bool = False,
+) -> Dict[Any, Any]:
+    # cached partitions by item
+    partitions = {}
+    for item in items:
+        item_kwargs = {**full_kwargs, partition_spec.partition_kwarg: [item]}
+        kwargs_hash = entries.get_kwargs_hash(call_plan=call_plan, full_kwargs=item_kwargs)
+        cache_is_valid, partition = entries.read_from_cache(
+            canonical_file_prefix=call_plan.get_canonical_file_prefix(kwargs_hash=kwargs_hash),
+            function_name=call_plan.function_name,
+            is_recheck=is_recheck,
+        )
+        if cache_is_valid:
+            partitions[item] = partition
+    return partitions
+
+
+def _compute_partitions(
+    entries: CacheEntries,
+    func: Callable[..., Any],
+    call_plan: CallPlan,
+    partition_spec: PartitionSpec,
+    *,
+    full_kwargs: Dict[str, Any],
+    items: Sequence[Any],
+) -> Dict[Any, Any]:
+    # missing items are computed in one call and each of their partitions is written
+    partitions = {}
+    if full_kwargs[entries.options.use_cache_kwarg]:
+        # partitions may have been written while waiting on another caller
+        partitions = _read_partitions(
+            entries=entries,
+            call_plan=call_plan,
+            partition_spec=partition_spec,
+            full_kwargs=full_kwargs,
+            items=items,
+            is_recheck=True,
+        )
+    missing_items = [item for item in items if item not in partitions]
+    if not missing_items:
+        return partitions
+    return_object, compute_seconds = entries.compute(
+        func=func,
+        call_plan=call_plan,
+        full_kwargs={**full_kwargs, partition_spec.partition_kwarg: missing_items},
+    )
+    missing_partitions = split_partitions(
+        partition_spec=partition_spec,
+        cachable_object=return_object,
+        items=missing_items,
+    )
+    # compute time of the call is shared evenly by items computed in it
+    for item, partition in missing_partitions.items():
+        item_kwargs = {**full_kwargs, partition_spec.partition_kwarg: [item]}
+        entries.write_to_cache(
+            call_plan=call_plan,
+            kwargs_hash=entries.get_kwargs_hash(call_plan=call_plan, full_kwargs=item_kwargs),
+            cachable_object=partition,
+            compute_seconds=compute_seconds / len(missing_items),
+        )
+    partitions.update(missing_partitions)
+    return partitions
@@ -0,0 +1,133 @@
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Tuple,
+)
+import collections
+import functools
+from app_lib.utils.local_cacher.meta_data import (
+    LocalCacheException,
+    MetaData,
+)
+from app_lib.utils.local_cacher.memory_tier import CacheTierStats
+
+try:
+    import ray
+    RAY_IS_INSTALLED = True
+except ImportError:
+    RAY_IS_INSTALLED = False
+
+DEFAULT_RAY_REGISTRY_NAME = 'local_cacher_object_registry'
+DEFAULT_RAY_NAMESPACE = 'local_cacher'
+# objects held in the object store by one registry. least recently used objects are released first
+DEFAULT_RAY_MAX_OBJECT_COUNT = 1024
+
+
+class ObjectRegistry:
+    # ray actor mapping cache keys to objects in the object store
+    # objects are put by the actor so they are owned by it and outlive the workers that computed them
+    def __init__(self, max_object_count: int):
+        self.max_object_count = max_object_count
+        self._entries: 'collections.OrderedDict[str, Tuple[MetaData, List[Any]]]' = collections.OrderedDict()
+
+    def get(self, canonical_file_prefix: str) -> Optional[Tuple[MetaData, List[Any]]]:
+        # object ref is wrapped in a list so ray returns the ref rather than the object
+        entry = self._entries.get(canonical_file_prefix)
+        if entry is not None:
+            self._entries.move_to_end(canonical_file_prefix)
+        return entry
+
+    def put(self, meta_data: MetaData, cachable_object: Any) -> None:
+        canonical_file_prefix = meta_data.canonical_file_prefix
+        self._entries.pop(canonical_file_prefix, None)
+        self._entries[canonical_file_prefix] = (meta_data, [ray.put(cachable_object)])
+        while len(self._entries) > self.max_object_count:
+            self._entries.popitem(last=False)
+
+    def discard(self, canonical_file_prefix: str) -> None:
+        self._entries.pop(canonical_file_prefix, None)
+
+    def get_object_count(self) -> int:
+        return len(self._entries)
+
+
+class RayObjectStoreTier:
+    # tier shared by all workers connected to one ray cluster. sits between memory tier and storage backend
+    # registry is a named detached actor created by the first tier to use it
+    # ray must be initialized by the caller, or is initialized by ray on first use
+    def __init__(
+        self,
+        registry_name: str = DEFAULT_RAY_REGISTRY_NAME,
+        namespace: str = DEFAULT_RAY_NAMESPACE,
+        max_object_count: int = DEFAULT_RAY_MAX_OBJECT_COUNT,
+    ):
+        if not RAY_IS_INSTALLED:
+            raise LocalCacheException('ray not installed')
+        self.registry_name = registry_name
+        self.namespace = namespace
+        self.max_object_count = max_object_count
+        self.stats = CacheTierStats()
+        self._registry: Any = None
+
+    def get_registry(self) -> Any:
+        if self._registry is None:
+            self._registry = ray.remote(ObjectRegistry).options(
+                name=self.registry_name,
+                namespace=self.namespace,
+                lifetime='detached',
+                get_if_exists=True,
+                # registry only holds references and must not take a cpu from tasks
+                num_cpus=0,
+            ).remote(max_object_count=self.max_object_count)
+        return self._registry
+
+    def get(
+        self,
+        canonical_file_prefix: str,
+        cache_validity_hours: float,
+    ) -> Tuple[bool, Any]:
+        # returns (found, object) so that None can be cached
+        entry = ray.get(self.get_registry().get.remote(canonical_file_prefix=canonical_file_prefix))
+        if entry is not None:
+            meta_data, object_refs = entry
+            if meta_data.is_valid(cache_validity_hours=cache_validity_hours):
+                try:
+                    cachable_object = ray.get(object_refs[0])
+                    self.stats.hits += 1
+                    return True, cachable_object
+                except ray.exceptions.RayError:
+                    # object lost with its node. storage backend still holds entry
+                    pass
+            self.discard(canonical_file_prefix=canonical_file_prefix)
+        self.stats.misses += 1
+        return False, None
+
+    def put(self, meta_data: MetaData, cachable_object: Any) -> None:
+        # waits for registry so entry is visible to other workers once put returns
+        ray.get(self.get_registry().put.remote(meta_data=meta_data, cachable_object=cachable_object))
+
+    def discard(self, canonical_file_prefix: str) -> None:
+        ray.get(self.get_registry().discard.remote(canonical_file_prefix=canonical_file_prefix))
+
+    def __len__(self) -> int:
+        object_count: int = ray.get(self.get_registry().get_object_count.remote())
+        return object_count
+
+
+def get_ray_function(
+    func: Callable[..., Any],
+    ray_remote_options: Optional[Dict[str, Any]] = None,
+) -> Callable[..., Any]:
+    # runs func as a ray task and waits for its result
+    if not RAY_IS_INSTALLED:
+        raise LocalCacheException('ray not installed')
+    remote_function = ray.remote(func).options(**(ray_remote_options or {}))
+
+    @functools.wraps(func)
+    def ray_function(**kwargs: Any) -> Any:
+        return ray.get(remote_function.remote(**kwargs))
+
+    return ray_function
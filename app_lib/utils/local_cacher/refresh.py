@@ -0,0 +1,76 @@
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Optional,
+    Union,
+)
+from dataclasses import dataclass
+import asyncio
+import concurrent.futures
+import logging
+import threading
+
+# background refreshes of stale entries run in a thread pool of this size per LocalCacher
+DEFAULT_MAX_REFRESH_WORKERS = 2
+
+_LOGGER = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class RefreshConfig:
+    # how entries are computed again
+    # concurrent misses on the same key wait for a single computation, across threads and processes
+    single_flight: bool = True
+    # stale while revalidate. entries up to max_staleness_hours past validity are returned immediately
+    # and refreshed in the background on max_refresh_workers threads
+    max_staleness_hours: Optional[float] = None
+    max_refresh_workers: int = DEFAULT_MAX_REFRESH_WORKERS
+
+
+def log_refresh_failure(future: 'Union[asyncio.Future[Any], concurrent.futures.Future[Any]]') -> None:
+    # failed computations nobody awaits are logged. stale entries keep being served
+    if future.cancelled():
+        return
+    exception = future.exception()
+    if exception is not None:
+        _LOGGER.error('local cache computation failed', exc_info=exception)
+
+
+class BackgroundRefresher:
+    # runs refreshes of stale entries off the calling thread. at most one refresh per key and process
+    def __init__(self, max_refresh_workers: int = DEFAULT_MAX_REFRESH_WORKERS):
+        self.max_refresh_workers = max_refresh_workers
+        self._executor: Optional[concurrent.futures.ThreadPoolExecutor] = None
+        self._futures: Dict[str, 'concurrent.futures.Future[None]'] = {}
+        self._lock = threading.Lock()
+
+    def schedule(self, canonical_file_prefix: str, refresh: Callable[[], None]) -> None:
+        with self._lock:
+            if canonical_file_prefix in self._futures:
+                return
+            if self._executor is None:
+                self._executor = concurrent.futures.ThreadPoolExecutor(
+                    max_workers=self.max_refresh_workers,
+                    thread_name_prefix='local-cacher-refresh',
+                )
+            refresh_future = self._executor.submit(
+                self._run,
+                canonical_file_prefix=canonical_file_prefix,
+                refresh=refresh,
+            )
+            self._futures[canonical_file_prefix] = refresh_future
+        refresh_future.add_done_callback(log_refresh_failure)
+
+    def _run(self, canonical_file_prefix: str, refresh: Callable[[], None]) -> None:
+        try:
+            refresh()
+        finally:
+            with self._lock:
+                self._futures.pop(canonical_file_prefix, None)
+
+    def wait(self, timeout_seconds: Optional[float] = None) -> None:
+        # blocks until refreshes scheduled so far are done
+        with self._lock:
+            refresh_futures = list(self._futures.values())
+        concurrent.futures.wait(refresh_futures, timeout=timeout_seconds)
@@ -0,0 +1,685 @@
+from typing import (
+    Any,
+    Dict,
+    Iterator,
+    Optional,
+    Sequence,
+    Union,
+)
+from dataclasses import dataclass
+import abc
+import contextlib
+import dataclasses
+import json
+import os
+import shutil
+import tempfile
+import time
+import uuid
+from app_lib.utils.local_cacher.meta_data import (
+    TEMP_FILE_PREFIX,
+    LocalCacheException,
+    MetaData,
+)
+from app_lib.utils.local_cacher.bundles import (
+    read_bundle_files,
+    read_bundle_index,
+)
+from app_lib.utils.local_cacher.cache_handlers import ObjectCacheHandler
+from app_lib.utils.local_cacher.layouts import (
+    CACHE_LAYOUTS,
+    FLAT_LAYOUT,
+    get_entry_dir,
+)
+from app_lib.utils.local_cacher.locks import (
+    acquire_file_lock,
+    get_lock_file_path,
+    release_file_lock,
+)
+from app_lib.utils.local_cacher.meta_data_store import (
+    JsonMetaDataStore,
+    MetaDataStore,
+)
+
+try:
+    import redis
+    REDIS_IS_INSTALLED = True
+except ImportError:
+    REDIS_IS_INSTALLED = False
+
+DEFAULT_REDIS_KEY_PREFIX = 'local_cacher'
+# a lock holder that dies releases its lock once the lease expires
+DEFAULT_REDIS_LOCK_LEASE_SECONDS = 600.0
+DEFAULT_REDIS_LOCK_POLL_SECONDS = 0.05
+# replaced payloads are kept this long for readers holding the previous meta data
+REDIS_REPLACED_PAYLOAD_SECONDS = 60
+# deletes lock only if still held by caller. an expired lease may have been acquired by another holder
+_REDIS_RELEASE_LOCK_SCRIPT = '''
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+'''
+
+
+def _deserialize_staged_files(
+    files: Dict[str, bytes],
+    meta_data: MetaData,
+    cache_handler: ObjectCacheHandler,
+    columns: Optional[Sequence[str]],
+) -> Any:
+    # handlers read files. files of entries not stored in a directory are staged in a temporary directory
+    temp_dir = tempfile.mkdtemp(prefix=TEMP_FILE_PREFIX)
+    try:
+        for file_name, data in files.items():
+            with open(os.path.join(temp_dir, file_name), 'wb') as f:
+                f.write(data)
+        if columns is not None:
+            return cache_handler.deserialize_columns_from_disk(
+                meta_data=meta_data,
+                cache_dir=temp_dir,
+                columns=columns,
+            )
+        return cache_handler.deserialize_from_disk(
+            meta_data=meta_data,
+            cache_dir=temp_dir,
+        )
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+class StorageBackend(abc.ABC):
+    # durable tier behind LocalCacher. payloads are written and read through cache handlers
+    @abc.abstractmethod
+    def get_valid_meta_data(
+        self,
+        canonical_file_prefix: str,
+        cache_validity_hours: float,
+    ) -> Optional[MetaData]:
+        pass
+
+    def get_many_valid_meta_data(
+        self,
+        canonical_file_prefixes: Sequence[str],
+        cache_validity_hours: float,
+    ) -> Dict[str, MetaData]:
+        # valid meta data keyed by canonical file prefix. missing and stale entries are left out
+        many_meta_data = {}
+        for canonical_file_prefix in canonical_file_prefixes:
+            meta_data = self.get_valid_meta_data(
+                canonical_file_prefix=canonical_file_prefix,
+                cache_validity_hours=cache_validity_hours,
+            )
+            if meta_data is not None:
+                many_meta_data[canonical_file_prefix] = meta_data
+        return many_meta_data
+
+    @abc.abstractmethod
+    def get_meta_data(self, canonical_file_prefix: str) -> Optional[MetaData]:
+        # meta data of entry regardless of validity
+        pass
+
+    @abc.abstractmethod
+    def get_entry_size_bytes(
+        self,
+        meta_data: MetaData,
+        cache_handler: ObjectCacheHandler,
+    ) -> int:
+        pass
+
+    def record_hit(self, canonical_file_prefix: str) -> None:
+        pass
+
+    def record_hits(self, canonical_file_prefixes: Sequence[str]) -> None:
+        for canonical_file_prefix in canonical_file_prefixes:
+            self.record_hit(canonical_file_prefix=canonical_file_prefix)
+
+    @abc.abstractmethod
+    def read_object(
+        self,
+        meta_data: MetaData,
+        cache_handler: ObjectCacheHandler,
+        columns: Optional[Sequence[str]] = None,
+    ) -> Any:
+        pass
+
+    @abc.abstractmethod
+    def write_object(
+        self,
+        cachable_object: Any,
+        meta_data: MetaData,
+        cache_handler: ObjectCacheHandler,
+        retention_hours: float,
+    ) -> MetaData:
+        # entries are committed atomically. returns meta data describing what was written
+        pass
+
+    @abc.abstractmethod
+    def acquire_lock(self, canonical_file_prefix: str) -> Any:
+        # blocks until caller holds lock on entry. returned lock must be passed to release_lock
+        pass
+
+    @abc.abstractmethod
+    def release_lock(self, lock: Any) -> None:
+        pass
+
+    @contextlib.contextmanager
+    def hold_lock(self, canonical_file_prefix: str) -> Iterator[None]:
+        lock = self.acquire_lock(canonical_file_prefix=canonical_file_prefix)
+        try:
+            yield
+        finally:
+            self.release_lock(lock=lock)
+
+
+class FileSystemStorageBackend(StorageBackend):
+    # payload files and meta data in a single cache directory. locks are file locks
+    # entries are written in cache_layout and read in the layout recorded in their meta data
+    def __init__(
+        self,
+        cache_dir: str,
+        meta_data_store: MetaDataStore,
+        cache_layout: str = FLAT_LAYOUT,
+    ):
+        self.cache_dir = cache_dir
+        self.meta_data_store = meta_data_store
+        if cache_layout not in CACHE_LAYOUTS:
+            err_str = 'cache layout {} not available. available layouts: {}'.format(cache_layout, CACHE_LAYOUTS)
+            raise LocalCacheException(err_str)
+        self.cache_layout = cache_layout
+
+    def get_valid_meta_data(
+        self,
+        canonical_file_prefix: str,
+        cache_validity_hours: float,
+    ) -> Optional[MetaData]:
+        meta_data = self.meta_data_store.get_valid_meta_data(
+            canonical_file_prefix=canonical_file_prefix,
+            cache_validity_hours=cache_validity_hours,
+        )
+        return meta_data
+
+    def get_many_valid_meta_data(
+        self,
+        canonical_file_prefixes: Sequence[str],
+        cache_validity_hours: float,
+    ) -> Dict[str, MetaData]:
+        return self.meta_data_store.get_many_valid_meta_data(
+            canonical_file_prefixes=canonical_file_prefixes,
+            cache_validity_hours=cache_validity_hours,
+        )
+
+    def get_meta_data(self, canonical_file_prefix: str) -> Optional[MetaData]:
+        return self.meta_data_store.get_meta_data(canonical_file_prefix=canonical_file_prefix)
+
+    def get_entry_size_bytes(
+        self,
+        meta_data: MetaData,
+        cache_handler: ObjectCacheHandler,
+    ) -> int:
+        return cache_handler.get_cache_size_bytes(
+            meta_data=meta_data,
+            cache_dir=get_entry_dir(cache_dir=self.cache_dir, meta_data=meta_data),
+        )
+
+    def record_hit(self, canonical_file_prefix: str) -> None:
+        self.meta_data_store.record_hit(canonical_file_prefix=canonical_file_prefix)
+
+    def record_hits(self, canonical_file_prefixes: Sequence[str]) -> None:
+        self.meta_data_store.record_hits(canonical_file_prefixes=canonical_file_prefixes)
+
+    def read_object(
+        self,
+        meta_data: MetaData,
+        cache_handler: ObjectCacheHandler,
+        columns: Optional[Sequence[str]] = None,
+    ) -> Any:
+        entry_dir = get_entry_dir(cache_dir=self.cache_dir, meta_data=meta_data)
+        if columns is not None:
+            return cache_handler.deserialize_columns_from_disk(
+                meta_data=meta_data,
+                cache_dir=entry_dir,
+                columns=columns,
+            )
+        return cache_handler.deserialize_from_disk(
+            meta_data=meta_data,
+            cache_dir=entry_dir,
+        )
+
+    def write_object(
+        self,
+        cachable_object: Any,
+        meta_data: MetaData,
+        cache_handler: ObjectCacheHandler,
+        retention_hours: float,
+    ) -> MetaData:
+        # flat entries keep meta data of entries written before layouts were recorded
+        if self.cache_layout != FLAT_LAYOUT:
+            meta_data = dataclasses.replace(meta_data, cache_layout=self.cache_layout)
+        entry_dir = get_entry_dir(cache_dir=self.cache_dir, meta_data=meta_data)
+        os.makedirs(entry_dir, exist_ok=True)
+        meta_data = cache_handler.serialize_atomically(
+            cachable_object=cachable_object,
+            meta_data=meta_data,
+            cache_dir=entry_dir,
+        )
+        size_bytes = cache_handler.get_cache_size_bytes(meta_data=meta_data, cache_dir=entry_dir)
+        meta_data = dataclasses.replace(meta_data, size_bytes=size_bytes)
+        # meta data is written last. entries are only visible once object is fully on disk
+        self.meta_data_store.write_meta_data(
+            meta_data=meta_data,
+            size_bytes=size_bytes,
+        )
+        return meta_data
+
+    def acquire_lock(self, canonical_file_prefix: str) -> Any:
+        lock_file = acquire_file_lock(lock_file_path=get_lock_file_path(
+            canonical_file_prefix=canonical_file_prefix,
+            cache_dir=self.cache_dir,
+        ))
+        return lock_file
+
+    def release_lock(self, lock: Any) -> None:
+        release_file_lock(lock_file=lock)
+
+
+class RedisStorageBackend(StorageBackend):
+    # entries shared by all replicas connected to one redis server
+    # entry hash holds meta data and write time. payload files are stored in a separate immutable hash
+    # both expire through redis TTLs so no sweep is needed
+    def __init__(
+        self,
+        redis_client: 'redis.Redis',
+        key_prefix: str = DEFAULT_REDIS_KEY_PREFIX,
+        lock_lease_seconds: float = DEFAULT_REDIS_LOCK_LEASE_SECONDS,
+        lock_poll_seconds: float = DEFAULT_REDIS_LOCK_POLL_SECONDS,
+    ):
+        if not REDIS_IS_INSTALLED:
+            raise LocalCacheException('redis not installed')
+        # payloads are binary
+        if redis_client.connection_pool.connection_kwargs.get('decode_responses'):
+            raise LocalCacheException('redis client must not decode responses')
+        self.redis_client = redis_client
+        self.key_prefix = key_prefix
+        self.lock_lease_seconds = lock_lease_seconds
+        self.lock_poll_seconds = lock_poll_seconds
+        self._release_lock_script = redis_client.register_script(_REDIS_RELEASE_LOCK_SCRIPT)
+
+    def _get_entry_key(self, canonical_file_prefix: str) -> str:
+        return '{}:entry:{}'.format(self.key_prefix, canonical_file_prefix)
+
+    def _get_lock_key(self, canonical_file_prefix: str) -> str:
+        return '{}:lock:{}'.format(self.key_prefix, canonical_file_prefix)
+
+    def _get_payload_key(self, canonical_file_prefix: str) -> str:
+        # unique per write so readers never see payload of a different write than their meta data
+        return '{}:payload:{}:{}'.format(self.key_prefix, canonical_file_prefix, uuid.uuid4().hex)
+
+    def get_valid_meta_data(
+        self,
+        canonical_file_prefix: str,
+        cache_validity_hours: float,
+    ) -> Optional[MetaData]:
+        # expired entries are removed by redis. write timestamp covers readers with shorter validity
+        meta_data_json, write_timestamp = self.redis_client.hmget(
+            self._get_entry_key(canonical_file_prefix=canonical_file_prefix),
+            ['meta_data', 'write_timestamp'],
+        )
+        return RedisStorageBackend._to_valid_meta_data(
+            meta_data_json=meta_data_json,
+            write_timestamp=write_timestamp,
+            cache_validity_hours=cache_validity_hours,
+        )
+
+    def get_many_valid_meta_data(
+        self,
+        canonical_file_prefixes: Sequence[str],
+        cache_validity_hours: float,
+    ) -> Dict[str, MetaData]:
+        # single round trip for all entries
+        pipeline = self.redis_client.pipeline(transaction=False)
+        for canonical_file_prefix in canonical_file_prefixes:
+            pipeline.hmget(
+                self._get_entry_key(canonical_file_prefix=canonical_file_prefix),
+                ['meta_data', 'write_timestamp'],
+            )
+        many_meta_data = {}
+        for canonical_file_prefix, (meta_data_json, write_timestamp) in zip(
+            canonical_file_prefixes,
+            pipeline.execute(),
+        ):
+            meta_data = RedisStorageBackend._to_valid_meta_data(
+                meta_data_json=meta_data_json,
+                write_timestamp=write_timestamp,
+                cache_validity_hours=cache_validity_hours,
+            )
+            if meta_data is not None:
+                many_meta_data[canonical_file_prefix] = meta_data
+        return many_meta_data
+
+    @staticmethod
+    def _to_valid_meta_data(
+        meta_data_json: Union[bytes, str, None],
+        write_timestamp: Union[bytes, str, None],
+        cache_validity_hours: float,
+    ) -> Optional[MetaData]:
+        if meta_data_json is None or write_timestamp is None:
+            return None
+        if time.time() - float(write_timestamp) > cache_validity_hours * 60 * 60:
+            return None
+        return MetaData(**json.loads(meta_data_json))
+
+    def get_meta_data(self, canonical_file_prefix: str) -> Optional[MetaData]:
+        meta_data_json = self.redis_client.hget(
+            self._get_entry_key(canonical_file_prefix=canonical_file_prefix),
+            'meta_data',
+        )
+        if meta_data_json is None:
+            return None
+        return MetaData(**json.loads(meta_data_json))
+
+    def get_entry_size_bytes(
+        self,
+        meta_data: MetaData,
+        cache_handler: ObjectCacheHandler,
+    ) -> int:
+        size_bytes = self.redis_client.hget(
+            self._get_entry_key(canonical_file_prefix=meta_data.canonical_file_prefix),
+            'size_bytes',
+        )
+        return 0 if size_bytes is None else int(size_bytes)
+
+    def read_object(
+        self,
+        meta_data: MetaData,
+        cache_handler: ObjectCacheHandler,
+        columns: Optional[Sequence[str]] = None,
+    ) -> Any:
+        if meta_data.payload_key is None:
+            err_str = 'cache entry {} has no payload key'.format(meta_data.canonical_file_prefix)
+            raise LocalCacheException(err_str)
+        payload: Dict[Any, Any] = self.redis_client.hgetall(meta_data.payload_key)
+        if not payload:
+            err_str = 'payload of cache entry {} expired'.format(meta_data.canonical_file_prefix)
+            raise LocalCacheException(err_str)
+        return _deserialize_staged_files(
+            files={file_name.decode('utf8'): data for file_name, data in payload.items()},
+            meta_data=meta_data,
+            cache_handler=cache_handler,
+            columns=columns,
+        )
+
+    def write_object(
+        self,
+        cachable_object: Any,
+        meta_data: MetaData,
+        cache_handler: ObjectCacheHandler,
+        retention_hours: float,
+    ) -> MetaData:
+        temp_dir = tempfile.mkdtemp(prefix=TEMP_FILE_PREFIX)
+        try:
+            meta_data = cache_handler.serialize_with_meta_data(
+                cachable_object=cachable_object,
+                meta_data=meta_data,
+                cache_dir=temp_dir,
+            )
+            payload: Dict[Any, Any] = {}
+            for file_path in cache_handler.get_cache_file_paths(meta_data=meta_data, cache_dir=temp_dir):
+                with open(file_path, 'rb') as f:
+                    payload[os.path.basename(file_path)] = f.read()
+        finally:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+        payload_key = self._get_payload_key(canonical_file_prefix=meta_data.canonical_file_prefix)
+        size_bytes = sum(len(data) for data in payload.values())
+        meta_data = dataclasses.replace(meta_data, payload_key=payload_key, size_bytes=size_bytes)
+        entry_key = self._get_entry_key(canonical_file_prefix=meta_data.canonical_file_prefix)
+        replaced_payload_key = self.redis_client.hget(entry_key, 'payload_key')
+        ttl_seconds = max(1, int(retention_hours * 60 * 60))
+        # payload and entry are committed in one transaction
+        pipeline = self.redis_client.pipeline(transaction=True)
+        pipeline.hset(payload_key, mapping=payload)
+        pipeline.expire(payload_key, ttl_seconds + REDIS_REPLACED_PAYLOAD_SECONDS)
+        pipeline.hset(
+            entry_key,
+            mapping={
+                'meta_data': json.dumps(meta_data.__dict__),
+                'write_timestamp': time.time(),
+                'payload_key': payload_key,
+                'size_bytes': size_bytes,
+            },
+        )
+        pipeline.expire(entry_key, ttl_seconds)
+        if replaced_payload_key is not None:
+            pipeline.expire(replaced_payload_key, REDIS_REPLACED_PAYLOAD_SECONDS)
+        pipeline.execute()
+        return meta_data
+
+    def acquire_lock(self, canonical_file_prefix: str) -> Any:
+        # lease lock shared by all replicas. SET NX PX acquires lock and lease atomically
+        lock_key = self._get_lock_key(canonical_file_prefix=canonical_file_prefix)
+        lock_token = uuid.uuid4().hex
+        lock_lease_milliseconds = int(self.lock_lease_seconds * 1000)
+        while not self.redis_client.set(lock_key, lock_token, nx=True, px=lock_lease_milliseconds):
+            time.sleep(self.lock_poll_seconds)
+        return lock_key, lock_token
+
+    def release_lock(self, lock: Any) -> None:
+        lock_key, lock_token = lock
+        self._release_lock_script(keys=[lock_key], args=[lock_token])
+
+
+class BundleStorageBackend(StorageBackend):
+    # read only entries of a bundle file written by LocalCacher.export_bundle
+    # index is read once. files of an entry are staged in a temporary directory on each read
+    def __init__(self, bundle_path: str):
+        self.bundle_path = bundle_path
+        self.bundle_entries = read_bundle_index(bundle_path=bundle_path)
+
+    def get_valid_meta_data(
+        self,
+        canonical_file_prefix: str,
+        cache_validity_hours: float,
+    ) -> Optional[MetaData]:
+        meta_data = self.get_meta_data(canonical_file_prefix=canonical_file_prefix)
+        if meta_data is None or not meta_data.is_valid(cache_validity_hours=cache_validity_hours):
+            return None
+        return meta_data
+
+    def get_meta_data(self, canonical_file_prefix: str) -> Optional[MetaData]:
+        bundle_entry = self.bundle_entries.get(canonical_file_prefix)
+        if bundle_entry is None:
+            return None
+        return bundle_entry.meta_data
+
+    def get_entry_size_bytes(
+        self,
+        meta_data: MetaData,
+        cache_handler: ObjectCacheHandler,
+    ) -> int:
+        return self.bundle_entries[meta_data.canonical_file_prefix].size_bytes
+
+    def read_object(
+        self,
+        meta_data: MetaData,
+        cache_handler: ObjectCacheHandler,
+        columns: Optional[Sequence[str]] = None,
+    ) -> Any:
+        return _deserialize_staged_files(
+            files=read_bundle_files(
+                bundle_path=self.bundle_path,
+                bundle_entry=self.bundle_entries[meta_data.canonical_file_prefix],
+            ),
+            meta_data=meta_data,
+            cache_handler=cache_handler,
+            columns=columns,
+        )
+
+    def write_object(
+        self,
+        cachable_object: Any,
+        meta_data: MetaData,
+        cache_handler: ObjectCacheHandler,
+        retention_hours: float,
+    ) -> MetaData:
+        raise LocalCacheException('cache bundle {} is read only'.format(self.bundle_path))
+
+    def acquire_lock(self, canonical_file_prefix: str) -> Any:
+        raise LocalCacheException('cache bundle {} is read only'.format(self.bundle_path))
+
+    def release_lock(self, lock: Any) -> None:
+        raise LocalCacheException('cache bundle {} is read only'.format(self.bundle_path))
+
+
+def get_base_layer_storage_backend(base_layer: str) -> StorageBackend:
+    # base layers are bundle files or cache directories with per entry json meta data
+    # meta data of directories is read without an index so directories on read only file systems can be used
+    if os.path.isdir(base_layer):
+        return FileSystemStorageBackend(cache_dir=base_layer, meta_data_store=JsonMetaDataStore(cache_dir=base_layer))
+    if os.path.isfile(base_layer):
+        return BundleStorageBackend(bundle_path=base_layer)
+    raise LocalCacheException('base layer {} not found'.format(base_layer))
+
+
+class LayeredStorageBackend(StorageBackend):
+    # writable storage backend over a read only base layer
+    # entries are read from storage_backend first. all writes, hits and locks go to storage_backend
+    # so base layers can be baked into images and served without copying
+    def __init__(
+        self,
+        storage_backend: StorageBackend,
+        base_storage_backend: StorageBackend,
+    ):
+        self.storage_backend = storage_backend
+        self.base_storage_backend = base_storage_backend
+
+    @staticmethod
+    def _mark_base_layer(meta_data: Optional[MetaData]) -> Optional[MetaData]:
+        if meta_data is None:
+            return None
+        return dataclasses.replace(meta_data, from_base_layer=True)
+
+    def _get_layer(self, meta_data: MetaData) -> StorageBackend:
+        if meta_data.from_base_layer:
+            return self.base_storage_backend
+        return self.storage_backend
+
+    def get_valid_meta_data(
+        self,
+        canonical_file_prefix: str,
+        cache_validity_hours: float,
+    ) -> Optional[MetaData]:
+        meta_data = self.storage_backend.get_valid_meta_data(
+            canonical_file_prefix=canonical_file_prefix,
+            cache_validity_hours=cache_validity_hours,
+        )
+        if meta_data is not None:
+            return meta_data
+        return LayeredStorageBackend._mark_base_layer(
+            meta_data=self.base_storage_backend.get_valid_meta_data(
+                canonical_file_prefix=canonical_file_prefix,
+                cache_validity_hours=cache_validity_hours,
+            ),
+        )
+
+    def get_many_valid_meta_data(
+        self,
+        canonical_file_prefixes: Sequence[str],
+        cache_validity_hours: float,
+    ) -> Dict[str, MetaData]:
+        many_meta_data = self.storage_backend.get_many_valid_meta_data(
+            canonical_file_prefixes=canonical_file_prefixes,
+            cache_validity_hours=cache_validity_hours,
+        )
+        base_meta_data = self.base_storage_backend.get_many_valid_meta_data(
+            canonical_file_prefixes=[p for p in canonical_file_prefixes if p not in many_meta_data],
+            cache_validity_hours=cache_validity_hours,
+        )
+        for canonical_file_prefix, meta_data in base_meta_data.items():
+            many_meta_data[canonical_file_prefix] = dataclasses.replace(meta_data, from_base_layer=True)
+        return many_meta_data
+
+    def get_meta_data(self, canonical_file_prefix: str) -> Optional[MetaData]:
+        meta_data = self.storage_backend.get_meta_data(canonical_file_prefix=canonical_file_prefix)
+        if meta_data is not None:
+            return meta_data
+        return LayeredStorageBackend._mark_base_layer(
+            meta_data=self.base_storage_backend.get_meta_data(canonical_file_prefix=canonical_file_prefix),
+        )
+
+    def get_entry_size_bytes(
+        self,
+        meta_data: MetaData,
+        cache_handler: ObjectCacheHandler,
+    ) -> int:
+        return self._get_layer(meta_data=meta_data).get_entry_size_bytes(
+            meta_data=meta_data,
+            cache_handler=cache_handler,
+        )
+
+    def record_hit(self, canonical_file_prefix: str) -> None:
+        # hits on base layer entries do not match entries of storage_backend
+        self.storage_backend.record_hit(canonical_file_prefix=canonical_file_prefix)
+
+    def record_hits(self, canonical_file_prefixes: Sequence[str]) -> None:
+        self.storage_backend.record_hits(canonical_file_prefixes=canonical_file_prefixes)
+
+    def read_object(
+        self,
+        meta_data: MetaData,
+        cache_handler: ObjectCacheHandler,
+        columns: Optional[Sequence[str]] = None,
+    ) -> Any:
+        return self._get_layer(meta_data=meta_data).read_object(
+            meta_data=meta_data,
+            cache_handler=cache_handler,
+            columns=columns,
+        )
+
+    def write_object(
+        self,
+        cachable_object: Any,
+        meta_data: MetaData,
+        cache_handler: ObjectCacheHandler,
+        retention_hours: float,
+    ) -> MetaData:
+        return self.storage_backend.write_object(
+            cachable_object=cachable_object,
+            meta_data=meta_data,
+            cache_handler=cache_handler,
+            retention_hours=retention_hours,
+        )
+
+    def acquire_lock(self, canonical_file_prefix: str) -> Any:
+        return self.storage_backend.acquire_lock(canonical_file_prefix=canonical_file_prefix)
+
+    def release_lock(self, lock: Any) -> None:
+        self.storage_backend.release_lock(lock=lock)
+
+
+@dataclass(frozen=True)
+class StorageConfig:
+    # meta data is stored in per entry json files or a single sqlite index for the cache directory
+    use_meta_data_index: bool = False
+    # entries are written in cache_layout. entries in either layout are read so directories can be migrated in use
+    cache_layout: str = FLAT_LAYOUT
+    # entries are stored in cache_dir unless another storage backend is given
+    storage_backend: Optional[StorageBackend] = None
+    # entries missing from storage backend are read from base_layer, a bundle file or cache directory
+    # base layers are read only. quotas, eviction and clear_cache apply to cache_dir only
+    base_layer: Optional[str] = None
+
+    def get_storage_backend(self, cache_dir: str, meta_data_store: MetaDataStore) -> StorageBackend:
+        storage_backend = self.storage_backend
+        if storage_backend is None:
+            storage_backend = FileSystemStorageBackend(
+                cache_dir=cache_dir,
+                meta_data_store=meta_data_store,
+                cache_layout=self.cache_layout,
+            )
+        if self.base_layer is not None:
+            storage_backend = LayeredStorageBackend(
+                storage_backend=storage_backend,
+                base_storage_backend=get_base_layer_storage_backend(base_layer=self.base_layer),
+            )
+        return storage_backend
@@ -0,0 +1,77 @@
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Optional,
+    Tuple,
+)
+from dataclasses import dataclass
+from app_lib.utils.local_cacher.meta_data import MetaData
+from app_lib.utils.local_cacher.memory_tier import (
+    CacheTierStats,
+    MemoryCacheTier,
+)
+from app_lib.utils.local_cacher.ray_tier import (
+    RayObjectStoreTier,
+    get_ray_function,
+)
+
+
+@dataclass(frozen=True)
+class TierConfig:
+    # optional in process tier of memory_budget_bytes. hot keys are served without touching the file system
+    memory_budget_bytes: Optional[int] = None
+    # optional tier shared through the ray object store. storage backend remains the durable tier
+    ray_object_store_tier: Optional[RayObjectStoreTier] = None
+    # misses are computed as ray tasks with ray_remote_options. caching stays in the caller
+    run_misses_on_ray: bool = False
+    ray_remote_options: Optional[Dict[str, Any]] = None
+
+    def get_compute_func(self, func: Callable[..., Any]) -> Callable[..., Any]:
+        if self.run_misses_on_ray:
+            return get_ray_function(func=func, ray_remote_options=self.ray_remote_options)
+        return func
+
+
+class CacheTiers:
+    # memory tier, then object store tier, in front of storage backend
+    # reads of storage backend are counted as disk tier
+    def __init__(self, tier_config: TierConfig):
+        self.memory_tier: Optional[MemoryCacheTier] = None
+        if tier_config.memory_budget_bytes is not None:
+            self.memory_tier = MemoryCacheTier(budget_bytes=tier_config.memory_budget_bytes)
+        self.ray_object_store_tier = tier_config.ray_object_store_tier
+        self.disk_tier_stats = CacheTierStats()
+
+    def get(self, canonical_file_prefix: str, cache_validity_hours: float) -> Tuple[bool, Any]:
+        # returns (found, object) so that None can be cached
+        for tier in [self.memory_tier, self.ray_object_store_tier]:
+            if tier is None:
+                continue
+            in_tier, cachable_object = tier.get(
+                canonical_file_prefix=canonical_file_prefix,
+                cache_validity_hours=cache_validity_hours,
+            )
+            if in_tier:
+                return True, cachable_object
+        return False, None
+
+    def put(self, meta_data: MetaData, cachable_object: Any) -> None:
+        if self.memory_tier is not None:
+            self.memory_tier.put(meta_data=meta_data, cachable_object=cachable_object)
+        if self.ray_object_store_tier is not None:
+            self.ray_object_store_tier.put(meta_data=meta_data, cachable_object=cachable_object)
+
+    def discard(self, canonical_file_prefix: str) -> None:
+        if self.memory_tier is not None:
+            self.memory_tier.discard(canonical_file_prefix=canonical_file_prefix)
+        if self.ray_object_store_tier is not None:
+            self.ray_object_store_tier.discard(canonical_file_prefix=canonical_file_prefix)
+
+    def get_stats(self) -> Dict[str, CacheTierStats]:
+        tier_stats = {'disk': self.disk_tier_stats}
+        if self.memory_tier is not None:
+            tier_stats['memory'] = self.memory_tier.stats
+        if self.ray_object_store_tier is not None:
+            tier_stats['ray'] = self.ray_object_store_tier.stats
+        return tier_stats
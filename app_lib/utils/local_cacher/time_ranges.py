@@ -0,0 +1,353 @@
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+)
+from dataclasses import dataclass
+import functools
+import inspect
+import pandas as pd
+from app_lib.utils.local_cacher.meta_data import LocalCacheException
+from app_lib.utils.local_cacher.cache_entries import (
+    CacheEntries,
+    CallPlan,
+)
+from app_lib.utils.local_cacher.cache_handlers import project_columns
+from app_lib.utils.local_cacher.tiers import TierConfig
+
+# segments of one series are coalesced into one once there are more than this many
+DEFAULT_MAX_TIME_RANGE_SEGMENTS = 32
+
+
+@dataclass(frozen=True)
+class TimeRangeSpec:
+    # kwargs bounding the closed range [start, end] and the column holding times of rows
+    start_kwarg: str
+    end_kwarg: str
+    time_column: str
+    max_segments: int = DEFAULT_MAX_TIME_RANGE_SEGMENTS
+
+
+@dataclass(frozen=True)
+class TimeRangeSegment:
+    # cached sub range. kwargs_hash is the hash of the call that computed it
+    start: Any
+    end: Any
+    kwargs_hash: str
+
+    def overlaps(self, start: Any, end: Any) -> bool:
+        return bool(self.start <= end and start <= self.end)
+
+    def is_within(self, start: Any, end: Any) -> bool:
+        return bool(start <= self.start and self.end <= end)
+
+
+def get_missing_intervals(
+    start: Any,
+    end: Any,
+    covered_intervals: Sequence[Tuple[Any, Any]],
+) -> List[Tuple[Any, Any]]:
+    # closed intervals of [start, end] not covered by covered_intervals
+    # missing intervals share their bounds with neighbouring covered intervals. see combine_segment_frames
+    missing_intervals = []
+    cursor = start
+    cursor_is_covered = False
+    for interval_start, interval_end in sorted(covered_intervals, key=lambda interval: interval[0]):
+        if interval_end < cursor or interval_start > end:
+            continue
+        if interval_start > cursor:
+            missing_intervals.append((cursor, interval_start))
+        cursor = max(cursor, interval_end)
+        cursor_is_covered = True
+    if cursor < end or not cursor_is_covered:
+        missing_intervals.append((cursor, end))
+    return missing_intervals
+
+
+def merge_segments(
+    segments: Sequence[TimeRangeSegment],
+    new_segments: Sequence[TimeRangeSegment],
+) -> List[TimeRangeSegment]:
+    # segments within a new segment are replaced by it
+    merged_segments = [
+        s for s in segments
+        if not any(s.is_within(start=n.start, end=n.end) for n in new_segments)
+    ]
+    merged_segments.extend(new_segments)
+    return merged_segments
+
+
+def _get_time_bound(time_values: pd.Series, bound: Any) -> Any:
+    if pd.api.types.is_datetime64_any_dtype(time_values):
+        return pd.Timestamp(bound)
+    return bound
+
+
+def filter_time_range(
+    frame: pd.DataFrame,
+    time_column: str,
+    start: Any,
+    end: Any,
+    include_start: bool = True,
+) -> pd.DataFrame:
+    # frames with all rows in range are returned as is
+    time_values = frame[time_column]
+    start = _get_time_bound(time_values=time_values, bound=start)
+    end = _get_time_bound(time_values=time_values, bound=end)
+    start_mask = time_values >= start if include_start else time_values > start
+    mask = start_mask & (time_values <= end)
+    if mask.all():
+        return frame
+    return frame[mask]
+
+
+def combine_segment_frames(
+    segment_frames: Sequence[Tuple[Any, Any, pd.DataFrame]],
+    time_column: str,
+    start: Any,
+    end: Any,
+) -> pd.DataFrame:
+    # segment_frames are the closed range and frame of each segment. segments may extend past requested range
+    # segments share bounds with the segments before them. times held by an earlier segment are taken from it alone
+    # so rows on shared bounds are kept once and duplicate rows within a segment are kept
+    # a single segment within requested range is returned as read. default indexes of other results are renumbered
+    segment_frames = sorted(segment_frames, key=lambda segment_frame: segment_frame[0])
+    frames = []
+    cursor = None
+    for _, segment_end, frame in segment_frames:
+        if cursor is not None and segment_end <= cursor:
+            continue
+        if cursor is None or cursor < start:
+            frame = filter_time_range(frame=frame, time_column=time_column, start=start, end=end)
+        else:
+            frame = filter_time_range(frame=frame, time_column=time_column, start=cursor, end=end, include_start=False)
+        frames.append(frame)
+        cursor = segment_end
+    if len(frames) == 1 and frames[0] is segment_frames[0][2]:
+        return frames[0]
+    # filtered frames keep their row labels, so default indexes are told apart before filtering
+    has_default_index = all(isinstance(frame.index, pd.RangeIndex) for _, _, frame in segment_frames)
+    return pd.concat(frames, ignore_index=has_default_index)
+
+
+def wrap_time_range_function(
+    func: Callable[..., Any],
+    entries: CacheEntries,
+    tier_config: TierConfig,
+    time_range_spec: TimeRangeSpec,
+) -> Callable[..., Any]:
+    # cached sub ranges of calls with the same other kwargs are reused and only missing intervals are computed
+    # each computed interval is cached as the entry of the call computing it
+    call_plan = CallPlan.from_function(func=func)
+    if inspect.iscoroutinefunction(func):
+        raise LocalCacheException('time range caching does not support coroutine functions')
+    for kwarg in [time_range_spec.start_kwarg, time_range_spec.end_kwarg]:
+        if kwarg not in call_plan.parameter_names:
+            raise LocalCacheException('{} is not a parameter of {}'.format(kwarg, call_plan.function_name))
+    compute_func = tier_config.get_compute_func(func=func)
+    start_kwarg = time_range_spec.start_kwarg
+    end_kwarg = time_range_spec.end_kwarg
+
+    @functools.wraps(func)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        kwargs, columns = entries.options.pop_columns_kwarg(call_plan=call_plan, passed_kwargs=kwargs)
+        full_kwargs = call_plan.get_full_kwargs(
+            passed_args=args,
+            passed_kwargs=kwargs,
+        )
+        if not entries.options.uses_cache(full_kwargs=full_kwargs):
+            return_object, _ = entries.compute(func=compute_func, call_plan=call_plan, full_kwargs=full_kwargs)
+            return project_columns(cachable_object=return_object, columns=columns)
+        if full_kwargs[end_kwarg] < full_kwargs[start_kwarg]:
+            err_str = '{} {} prior to {} {}'.format(
+                end_kwarg,
+                full_kwargs[end_kwarg],
+                start_kwarg,
+                full_kwargs[start_kwarg],
+            )
+            raise LocalCacheException(err_str)
+        # segments of a series are listed in an index entry keyed by all other kwargs
+        series_kwargs = {k: v for k, v in full_kwargs.items() if k not in (start_kwarg, end_kwarg)}
+        index_kwargs_hash = '{}-segments'.format(
+            entries.get_kwargs_hash(call_plan=call_plan, full_kwargs=series_kwargs))
+
+        # fully cached ranges are read without waiting on writers of the series
+        frame = None
+        if full_kwargs[entries.options.use_cache_kwarg]:
+            frame = _resolve_time_range(
+                entries=entries,
+                func=None,
+                call_plan=call_plan,
+                time_range_spec=time_range_spec,
+                full_kwargs=full_kwargs,
+                index_kwargs_hash=index_kwargs_hash,
+            )
+        if frame is None:
+            with entries.hold_single_flight(
+                    canonical_file_prefix=call_plan.get_canonical_file_prefix(kwargs_hash=index_kwargs_hash)):
+                frame = _resolve_time_range(
+                    entries=entries,
+                    func=compute_func,
+                    call_plan=call_plan,
+                    time_range_spec=time_range_spec,
+                    full_kwargs=full_kwargs,
+                    index_kwargs_hash=index_kwargs_hash,
+                )
+        return project_columns(cachable_object=frame, columns=columns)
+
+    return wrapper
+
+
+def _resolve_time_range(
+    entries: CacheEntries,
+    func: Optional[Callable[..., Any]],
+    call_plan: CallPlan,
+    time_range_spec: TimeRangeSpec,
+    *,
+    full_kwargs: Dict[str, Any],
+    index_kwargs_hash: str,
+) -> Optional[Any]:
+    # without func, returns None unless the range is fully cached
+    # with func, missing intervals are computed and written and the segment index is updated
+    start = full_kwargs[time_range_spec.start_kwarg]
+    end = full_kwargs[time_range_spec.end_kwarg]
+    _, segments = entries.read_from_cache(
+        canonical_file_prefix=call_plan.get_canonical_file_prefix(kwargs_hash=index_kwargs_hash),
+        function_name=call_plan.function_name,
+        is_recheck=func is not None,
+    )
+    segments = segments or []
+    segment_frames: List[Tuple[Any, Any, pd.DataFrame]] = []
+    expired_segments: List[TimeRangeSegment] = []
+    # refreshes recompute the whole range
+    if full_kwargs[entries.options.use_cache_kwarg]:
+        segment_frames, expired_segments = _read_segment_frames(
+            entries=entries,
+            call_plan=call_plan,
+            segments=[s for s in segments if s.overlaps(start=start, end=end)],
+            is_recheck=func is not None,
+        )
+    missing_intervals = get_missing_intervals(
+        start=start,
+        end=end,
+        covered_intervals=[(s, e) for s, e, _ in segment_frames],
+    )
+    if func is None and missing_intervals:
+        return None
+
+    interval_frames, new_segments = _compute_intervals(
+        entries=entries,
+        func=func,  # type: ignore[arg-type]
+        call_plan=call_plan,
+        time_range_spec=time_range_spec,
+        full_kwargs=full_kwargs,
+        missing_intervals=missing_intervals,
+    )
+    frame = combine_segment_frames(
+        segment_frames=segment_frames + interval_frames,
+        time_column=time_range_spec.time_column,
+        start=start,
+        end=end,
+    )
+    if new_segments:
+        _write_segment_index(
+            entries=entries,
+            call_plan=call_plan,
+            time_range_spec=time_range_spec,
+            full_kwargs=full_kwargs,
+            index_kwargs_hash=index_kwargs_hash,
+            segments=merge_segments(
+                segments=[s for s in segments if s not in expired_segments],
+                new_segments=new_segments,
+            ),
+            frame=frame,
+        )
+    return frame
+
+
+def _read_segment_frames(
+    entries: CacheEntries,
+    call_plan: CallPlan,
+    segments: Sequence[TimeRangeSegment],
+    is_recheck: bool,
+) -> Tuple[List[Tuple[Any, Any, pd.DataFrame]], List[TimeRangeSegment]]:
+    # returns range and frame of each valid segment, and expired segments
+    segment_frames = []
+    expired_segments = []
+    for segment in segments:
+        segment_is_valid, segment_frame = entries.read_from_cache(
+            canonical_file_prefix=call_plan.get_canonical_file_prefix(kwargs_hash=segment.kwargs_hash),
+            function_name=call_plan.function_name,
+            is_recheck=is_recheck,
+        )
+        if segment_is_valid:
+            segment_frames.append((segment.start, segment.end, segment_frame))
+        else:
+            expired_segments.append(segment)
+    return segment_frames, expired_segments
+
+
+def _compute_intervals(
+    entries: CacheEntries,
+    func: Callable[..., Any],
+    call_plan: CallPlan,
+    time_range_spec: TimeRangeSpec,
+    *,
+    full_kwargs: Dict[str, Any],
+    missing_intervals: Sequence[Tuple[Any, Any]],
+) -> Tuple[List[Tuple[Any, Any, pd.DataFrame]], List[TimeRangeSegment]]:
+    # each missing interval is computed and written as the entry of the call computing it
+    interval_frames = []
+    new_segments = []
+    for interval_start, interval_end in missing_intervals:
+        interval_kwargs = full_kwargs.copy()
+        interval_kwargs[time_range_spec.start_kwarg] = interval_start
+        interval_kwargs[time_range_spec.end_kwarg] = interval_end
+        interval_frame, compute_seconds = entries.compute(
+            func=func,
+            call_plan=call_plan,
+            full_kwargs=interval_kwargs,
+        )
+        interval_kwargs_hash = entries.get_kwargs_hash(call_plan=call_plan, full_kwargs=interval_kwargs)
+        entries.write_to_cache(
+            call_plan=call_plan,
+            kwargs_hash=interval_kwargs_hash,
+            cachable_object=interval_frame,
+            compute_seconds=compute_seconds,
+        )
+        interval_frames.append((interval_start, interval_end, interval_frame))
+        new_segments.append(TimeRangeSegment(
+            start=interval_start,
+            end=interval_end,
+            kwargs_hash=interval_kwargs_hash,
+        ))
+    return interval_frames, new_segments
+
+
+def _write_segment_index(
+    entries: CacheEntries,
+    call_plan: CallPlan,
+    time_range_spec: TimeRangeSpec,
+    full_kwargs: Dict[str, Any],
+    *,
+    index_kwargs_hash: str,
+    segments: List[TimeRangeSegment],
+    frame: pd.DataFrame,
+) -> None:
+    if len(segments) > time_range_spec.max_segments:
+        # requested range is written as one segment replacing the segments within it
+        kwargs_hash = entries.get_kwargs_hash(call_plan=call_plan, full_kwargs=full_kwargs)
+        entries.write_to_cache(call_plan=call_plan, kwargs_hash=kwargs_hash, cachable_object=frame)
+        segments = merge_segments(
+            segments=segments,
+            new_segments=[TimeRangeSegment(
+                start=full_kwargs[time_range_spec.start_kwarg],
+                end=full_kwargs[time_range_spec.end_kwarg],
+                kwargs_hash=kwargs_hash,
+            )],
+        )
+    entries.write_to_cache(call_plan=call_plan, kwargs_hash=index_kwargs_hash, cachable_object=segments)
@@ -0,0 +1,221 @@
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Tuple,
+)
+from dataclasses import dataclass
+import atexit
+import base64
+import collections
+import concurrent.futures
+import importlib
+import json
+import logging
+import multiprocessing
+import os
+import pickle
+import tempfile
+import threading
+from app_lib.utils.local_cacher.meta_data import TEMP_FILE_PREFIX
+
+DEFAULT_WARMUP_WORKERS = 2
+# counts of recorded calls are appended this many seconds after the first call recorded since the last flush
+DEFAULT_MANIFEST_FLUSH_SECONDS = 10.0
+# manifests growing past this size are compacted after a flush, keeping the most frequent calls
+DEFAULT_MANIFEST_MAX_SIZE_BYTES = 4 * 1024 * 1024
+DEFAULT_MANIFEST_MAX_CALLS = 10000
+
+_LOGGER = logging.getLogger(__name__)
+# calls replayed by warmup workers are not recorded again
+_IS_WARMING_UP = False
+
+
+@dataclass(frozen=True)
+class ManifestCall:
+    # function is imported by path during warmup. kwargs are pickled without use_cache_kwarg
+    # use_cache_kwarg is set to True when replayed, since functions may not give it a default
+    function_path: str
+    kwargs_bytes: bytes
+    use_cache_kwarg: str
+
+
+def get_function_path(func: Callable[..., Any]) -> Optional[str]:
+    # functions defined in other functions or in scripts can not be imported during warmup
+    if '<locals>' in func.__qualname__ or func.__module__ == '__main__':
+        return None
+    return '{}:{}'.format(func.__module__, func.__qualname__)
+
+
+class CallManifest:
+    # json lines file of cached calls, hits included, with their counts so frequent calls are replayed first
+    # counts are kept in memory and appended by a timer thread and at exit, so recording does no file i/o
+    # lines are appended with a single write so concurrent writers do not interleave
+    def __init__(
+        self,
+        manifest_path: str,
+        flush_seconds: float = DEFAULT_MANIFEST_FLUSH_SECONDS,
+        max_size_bytes: int = DEFAULT_MANIFEST_MAX_SIZE_BYTES,
+        max_calls: int = DEFAULT_MANIFEST_MAX_CALLS,
+    ):
+        self.manifest_path = manifest_path
+        self.flush_seconds = flush_seconds
+        self.max_size_bytes = max_size_bytes
+        self.max_calls = max_calls
+        self._pending_counts: 'collections.Counter[ManifestCall]' = collections.Counter()
+        self._flush_timer: Optional[threading.Timer] = None
+        self._lock = threading.Lock()
+
+    def record_call(
+        self,
+        function_path: Optional[str],
+        full_kwargs: Dict[str, Any],
+        use_cache_kwarg: str,
+    ) -> None:
+        # calls with unhashable or unpicklable kwargs are not recorded
+        if function_path is None or _IS_WARMING_UP:
+            return
+        kwargs = {k: v for k, v in full_kwargs.items() if k != use_cache_kwarg}
+        try:
+            for v in kwargs.values():
+                hash(v)
+            kwargs_bytes = pickle.dumps(kwargs, protocol=pickle.HIGHEST_PROTOCOL)
+        except (TypeError, AttributeError, pickle.PicklingError):
+            return
+        with self._lock:
+            manifest_call = ManifestCall(
+                function_path=function_path,
+                kwargs_bytes=kwargs_bytes,
+                use_cache_kwarg=use_cache_kwarg,
+            )
+            self._pending_counts[manifest_call] += 1
+            if self._flush_timer is None:
+                self._flush_timer = threading.Timer(self.flush_seconds, self.flush)
+                self._flush_timer.daemon = True
+                self._flush_timer.start()
+
+    def flush(self) -> None:
+        # append counts recorded since last flush. manifests past max_size_bytes are compacted
+        with self._lock:
+            pending_counts = self._pending_counts
+            self._pending_counts = collections.Counter()
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+        if not pending_counts:
+            return
+        self._append_lines(lines=[CallManifest._to_line(manifest_call=c, count=n) for c, n in pending_counts.items()])
+        if os.path.getsize(self.manifest_path) > self.max_size_bytes:
+            self.compact()
+
+    def get_calls_by_frequency(self) -> List[Tuple[ManifestCall, int]]:
+        # most frequent calls first. counts not flushed yet are left out
+        call_counts: 'collections.Counter[ManifestCall]' = collections.Counter()
+        if not os.path.exists(self.manifest_path):
+            return []
+        with open(self.manifest_path, 'r', encoding='utf8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                    manifest_call = ManifestCall(
+                        function_path=record['function'],
+                        kwargs_bytes=base64.b64decode(record['kwargs']),
+                        use_cache_kwarg=record['use_cache_kwarg'],
+                    )
+                except (ValueError, KeyError):
+                    # line cut short by a writer that died
+                    continue
+                call_counts[manifest_call] += record.get('count', 1)
+        return call_counts.most_common()
+
+    def compact(self) -> int:
+        # rewrite manifest with one line per distinct call, max_calls most frequent. returns number of lines
+        # calls flushed by other processes while compacting are lost
+        calls_by_frequency = self.get_calls_by_frequency()[:self.max_calls]
+        lines = [CallManifest._to_line(manifest_call=c, count=count) for c, count in calls_by_frequency]
+        manifest_dir = os.path.dirname(os.path.abspath(self.manifest_path))
+        temp_file_descriptor, temp_file_path = tempfile.mkstemp(prefix=TEMP_FILE_PREFIX, dir=manifest_dir)
+        try:
+            with os.fdopen(temp_file_descriptor, 'w', encoding='utf8') as f:
+                f.write(''.join(lines))
+            os.replace(temp_file_path, self.manifest_path)
+        except BaseException:
+            os.remove(temp_file_path)
+            raise
+        return len(lines)
+
+    def _append_lines(self, lines: List[str]) -> None:
+        with open(self.manifest_path, 'a', encoding='utf8') as f:
+            f.write(''.join(lines))
+
+    @staticmethod
+    def _to_line(manifest_call: ManifestCall, count: int) -> str:
+        record = {
+            'function': manifest_call.function_path,
+            'kwargs': base64.b64encode(manifest_call.kwargs_bytes).decode('ascii'),
+            'use_cache_kwarg': manifest_call.use_cache_kwarg,
+            'count': count,
+        }
+        return json.dumps(record) + '\n'
+
+
+# manifests are shared by all LocalCacher instances recording to the same file
+_CALL_MANIFESTS: Dict[str, CallManifest] = {}
+_CALL_MANIFESTS_LOCK = threading.Lock()
+
+
+def get_call_manifest(manifest_path: str) -> CallManifest:
+    with _CALL_MANIFESTS_LOCK:
+        manifest_key = os.path.abspath(manifest_path)
+        if manifest_key not in _CALL_MANIFESTS:
+            _CALL_MANIFESTS[manifest_key] = CallManifest(manifest_path=manifest_path)
+        return _CALL_MANIFESTS[manifest_key]
+
+
+@atexit.register
+def flush_call_manifests() -> None:
+    with _CALL_MANIFESTS_LOCK:
+        call_manifests = list(_CALL_MANIFESTS.values())
+    for call_manifest in call_manifests:
+        call_manifest.flush()
+
+
+def _warm_up_call(manifest_call: ManifestCall) -> None:
+    # runs in warmup worker. calls decorated function so result is cached as by any other caller
+    global _IS_WARMING_UP  # pylint: disable=global-statement
+    _IS_WARMING_UP = True
+    module_name, qualname = manifest_call.function_path.split(':')
+    func: Any = importlib.import_module(module_name)
+    for attribute_name in qualname.split('.'):
+        func = getattr(func, attribute_name)
+    kwargs = pickle.loads(manifest_call.kwargs_bytes)
+    kwargs[manifest_call.use_cache_kwarg] = True
+    func(**kwargs)
+
+
+def warm_up_from_manifest(
+    manifest_path: str,
+    max_workers: int = DEFAULT_WARMUP_WORKERS,
+    max_calls: Optional[int] = None,
+) -> int:
+    # replays recorded calls, most frequent first, in a bounded process pool. returns number of calls warmed
+    # calls of functions that were removed or whose kwargs changed are logged and skipped
+    flush_call_manifests()
+    calls_by_frequency = CallManifest(manifest_path=manifest_path).get_calls_by_frequency()[:max_calls]
+    if not calls_by_frequency:
+        return 0
+    warmed_count = 0
+    with concurrent.futures.ProcessPoolExecutor(
+            max_workers=max_workers,
+            mp_context=multiprocessing.get_context('spawn'),
+    ) as executor:
+        futures = {executor.submit(_warm_up_call, manifest_call=c): c for c, _ in calls_by_frequency}
+        for future in concurrent.futures.as_completed(futures):
+            exception = future.exception()
+            if exception is not None:
+                _LOGGER.warning('warmup of %s failed', futures[future].function_path, exc_info=exception)
+                continue
+            warmed_count += 1
+    return warmed_count
@@ -0,0 +1,79 @@
+# micro-benchmark of LocalCacher hit latency
+# compares the per-call key derivation used before call plans against the current wrapper
+# usage from repository root: python -m benchmarks.local_cacher_benchmark
+from typing import Any, Callable, Dict
+import tempfile
+import timeit
+import pandas as pd
+from app_lib.utils.local_cacher import LocalCacher, MetaData
+
+# pylint: disable=protected-access
+
+NUMBER_OF_CALLS = 200
+USE_CACHE_KWARG = 'use_cache'
+
+
+def expensive_f(
+    frame: pd.DataFrame,
+    scale: float,
+    use_cache: bool = True,  # pylint: disable=unused-argument
+) -> pd.DataFrame:
+    return frame * scale
+
+
+def _legacy_hit(
+    func: Callable[..., Any],
+    cache_dir: str,
+    kwargs: Dict[str, Any],
+) -> Any:
+    # key derivation as performed by the wrapper before call plans
+    # signature inspected repeatedly, kwargs hashed twice, source read on every call
+    _ = LocalCacher._get_full_kwargs(func=func, passed_args=(), passed_kwargs=kwargs)
+    _ = LocalCacher._get_call_signature_hash(
+        func=func,
+        passed_args=(),
+        passed_kwargs=kwargs,
+        use_cache_kwarg=USE_CACHE_KWARG,
+        unhashable_kwargs=None,
+    )
+    _ = LocalCacher._get_function_source_hash(func=func)
+    canonical_file_prefix = LocalCacher._get_file_prefix(
+        func=func,
+        passed_args=(),
+        passed_kwargs=kwargs,
+        use_cache_kwarg=USE_CACHE_KWARG,
+        unhashable_kwargs=None,
+    )
+    _ = MetaData.cache_is_valid(
+        cache_validity_hours=1,
+        canonical_file_prefix=canonical_file_prefix,
+        cache_dir=cache_dir,
+    )
+    meta_data = MetaData.from_disk(canonical_file_prefix=canonical_file_prefix, cache_dir=cache_dir)
+    cache_handler = LocalCacher._get_cache_handler_from_meta_data(meta_data=meta_data)
+    return cache_handler.deserialize_from_disk(meta_data=meta_data, cache_dir=cache_dir)
+
+
+def run_benchmark(number_of_rows: int) -> None:
+    frame = pd.DataFrame({'a': range(number_of_rows), 'b': [0.5] * number_of_rows})
+    kwargs = {'frame': frame, 'scale': 2.0, USE_CACHE_KWARG: True}
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cached_f = LocalCacher(cache_dir=cache_dir, cache_validity_hours=1)(expensive_f)
+        # populate cache
+        _ = cached_f(**kwargs)
+        legacy_seconds = timeit.timeit(
+            lambda: _legacy_hit(func=cached_f, cache_dir=cache_dir, kwargs=kwargs),
+            number=NUMBER_OF_CALLS,
+        )
+        current_seconds = timeit.timeit(lambda: cached_f(**kwargs), number=NUMBER_OF_CALLS)
+    print('rows={:>8} legacy hit={:8.3f}ms current hit={:8.3f}ms speedup={:5.2f}x'.format(
+        number_of_rows,
+        1000 * legacy_seconds / NUMBER_OF_CALLS,
+        1000 * current_seconds / NUMBER_OF_CALLS,
+        legacy_seconds / current_seconds,
+    ))
+
+
+if __name__ == '__main__':
+    for rows in (10, 1000, 100000):
+        run_benchmark(number_of_rows=rows)
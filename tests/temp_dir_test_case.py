@@ -0,0 +1,21 @@
+from typing import Optional
+import os
+import shutil
+import tempfile
+from tests.base_test_case import BaseTestCase
+
+
+class TempDirTestCase(BaseTestCase):
+    # each test gets its own temporary directory, removed once test and its tearDown have run
+    # tests of functions decorated at module level set fixed_temp_dir to the directory those functions use
+    fixed_temp_dir: Optional[str] = None
+
+    def setUp(self) -> None:
+        super().setUp()
+        if self.fixed_temp_dir is None:
+            self.temp_dir = tempfile.mkdtemp()
+        else:
+            os.makedirs(self.fixed_temp_dir, exist_ok=True)
+            self.temp_dir = self.fixed_temp_dir
+        self.addCleanup(shutil.rmtree, self.temp_dir, ignore_errors=True)
+        self.cache_dir = self.temp_dir
@@ -0,0 +1,74 @@
+import asyncio
+import pytest
+import pandas as pd
+from tests.temp_dir_test_case import TempDirTestCase
+from app_lib.utils.local_cacher import LocalCacher
+
+AWAITER_COUNT = 8
+
+
+class TestAsync(TempDirTestCase):
+    # pylint: disable=unexpected-keyword-arg
+    def test_coroutine_function(self) -> None:
+        call_counter = []
+
+        @LocalCacher(cache_dir=self.cache_dir)
+        async def f(
+                x: int,
+                use_cache: bool = True,  # pylint: disable=unused-argument
+        ) -> pd.DataFrame:
+            call_counter.append(x)
+            await asyncio.sleep(0)
+            return pd.DataFrame({'x': [x] * 3, 'y': [2 * x] * 3})
+
+        async def _run() -> None:
+            expected_result = pd.DataFrame({'x': [1] * 3, 'y': [2] * 3})
+            # result of coroutine is cached, not coroutine object
+            self.assertFramesEqual(await f(x=1), expected_result)
+            self.assertFramesEqual(await f(x=1), expected_result)
+            self.assertFramesEqual(await f(x=1, cache_columns=['y']), expected_result[['y']])
+            self.assertEqual(call_counter, [1])
+            # refresh recomputes
+            self.assertFramesEqual(await f(x=1, use_cache=False), expected_result)
+            self.assertEqual(call_counter, [1, 1])
+
+        asyncio.run(_run())
+
+    def test_concurrent_awaiters(self) -> None:
+        call_counter = []
+
+        @LocalCacher(cache_dir=self.cache_dir)
+        async def f(
+                x: int,
+                use_cache: bool = True,  # pylint: disable=unused-argument
+        ) -> int:
+            call_counter.append(x)
+            await asyncio.sleep(0.1)
+            return 2 * x
+
+        async def _run() -> None:
+            results = await asyncio.gather(*[f(x=1) for _ in range(AWAITER_COUNT)], f(x=2))
+            self.assertEqual(list(results), [2] * AWAITER_COUNT + [4])
+
+        asyncio.run(_run())
+        # awaiters of the same key share one computation
+        self.assertEqual(sorted(call_counter), [1, 2])
+
+    def test_disabled_cache(self) -> None:
+        call_counter = []
+
+        @LocalCacher(cache_dir=self.cache_dir, disable_cache=True)
+        async def f(use_cache: bool = True) -> int:  # pylint: disable=unused-argument
+            call_counter.append(1)
+            return 1
+
+        async def _run() -> None:
+            self.assertEqual(await f(), 1)
+            self.assertEqual(await f(), 1)
+
+        asyncio.run(_run())
+        self.assertEqual(len(call_counter), 2)
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
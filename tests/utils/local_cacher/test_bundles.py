@@ -0,0 +1,199 @@
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    List,
+    Tuple,
+)
+import dataclasses
+import datetime
+import inspect
+import os
+import tarfile
+import pytest
+import numpy as np
+import pandas as pd
+from tests.temp_dir_test_case import TempDirTestCase
+from app_lib.utils.local_cacher import (
+    DATETIME_FORMAT_STR,
+    EvictionConfig,
+    SHARDED_LAYOUT,
+    JsonMetaDataStore,
+    LocalCacheException,
+    LocalCacher,
+    SqliteMetaDataStore,
+    StorageConfig,
+)
+
+
+class TestBundles(TempDirTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.cache_dir = os.path.join(self.temp_dir, 'cache')
+        self.base_dir = os.path.join(self.temp_dir, 'base')
+        self.bundle_path = os.path.join(self.temp_dir, 'bundle.tar')
+        for cache_dir in [self.cache_dir, self.base_dir]:
+            os.makedirs(cache_dir)
+
+    @staticmethod
+    def _get_functions(local_cacher: LocalCacher, call_counter: List[Tuple[str, int]]) -> List[Callable[..., Any]]:
+        # same source in every cache directory so entries are shared
+        @local_cacher
+        def get_frame(
+                x: int,
+                use_cache: bool = True,  # pylint: disable=unused-argument
+        ) -> pd.DataFrame:
+            call_counter.append(('get_frame', x))
+            return pd.DataFrame({'x': [x] * 3, 'y': [2 * x] * 3})
+
+        @local_cacher
+        def get_arrays(
+                x: int,
+                use_cache: bool = True,  # pylint: disable=unused-argument
+        ) -> Dict[str, np.ndarray]:
+            call_counter.append(('get_arrays', x))
+            return {'a': np.arange(x), 'b': np.ones(x)}
+
+        @local_cacher
+        def get_object(
+                x: int,
+                use_cache: bool = True,  # pylint: disable=unused-argument
+        ) -> Dict[str, int]:
+            call_counter.append(('get_object', x))
+            return {'x': x}
+
+        return [get_frame, get_arrays, get_object]
+
+    def _export_bundle(self) -> None:
+        call_counter: List[Tuple[str, int]] = []
+        for func in self._get_functions(local_cacher=LocalCacher(cache_dir=self.base_dir), call_counter=call_counter):
+            for x in range(3):
+                _ = func(x=x)
+        exported_count = LocalCacher.export_bundle(
+            cache_dir=self.base_dir,
+            bundle_path=self.bundle_path,
+            function_names=['get_frame', 'get_arrays'],
+        )
+        self.assertEqual(exported_count, 6)
+
+    def _assert_hits(self, local_cacher: LocalCacher) -> List[Tuple[str, int]]:
+        call_counter: List[Tuple[str, int]] = []
+        get_frame, get_arrays, get_object = self._get_functions(local_cacher=local_cacher, call_counter=call_counter)
+        for x in range(3):
+            self.assertFramesEqual(get_frame(x=x), pd.DataFrame({'x': [x] * 3, 'y': [2 * x] * 3}))
+            self.assertFramesEqual(get_frame(x=x, cache_columns=['y']), pd.DataFrame({'y': [2 * x] * 3}))
+            arrays = get_arrays(x=x)
+            np.testing.assert_array_equal(arrays['a'], np.arange(x))
+            np.testing.assert_array_equal(arrays['b'], np.ones(x))
+            self.assertEqual(get_object(x=x), {'x': x})
+        # entries of functions not exported are computed
+        self.assertEqual(call_counter, [('get_object', x) for x in range(3)])
+        return call_counter
+
+    # pylint: disable=unexpected-keyword-arg
+    def test_export_import(self) -> None:
+        self._export_bundle()
+        with tarfile.open(self.bundle_path) as tar:
+            self.assertEqual(tar.getnames()[-1], 'bundle-index.json')
+        imported_count = LocalCacher.import_bundle(
+            bundle_path=self.bundle_path,
+            cache_dir=self.cache_dir,
+            use_meta_data_index=True,
+            cache_layout=SHARDED_LAYOUT,
+        )
+        self.assertEqual(imported_count, 6)
+        # sizes are recorded in index
+        meta_data_store = SqliteMetaDataStore(cache_dir=self.cache_dir)
+        self.assertGreater(meta_data_store.get_size_bytes(function_name='get_frame'), 0)
+        self.assertEqual(
+            {m.cache_layout for m in meta_data_store.get_all_meta_data()},
+            {SHARDED_LAYOUT},
+        )
+        self._assert_hits(local_cacher=LocalCacher(
+            cache_dir=self.cache_dir,
+            storage_config=StorageConfig(use_meta_data_index=True),
+        ))
+
+    def test_export_valid_entries(self) -> None:
+        self._export_bundle()
+        meta_data_store = JsonMetaDataStore(cache_dir=self.base_dir)
+        for meta_data in meta_data_store.get_function_meta_data(function_name='get_frame'):
+            expired_meta_data = dataclasses.replace(
+                meta_data,
+                write_datetime_str=(datetime.datetime.now() - datetime.timedelta(hours=2)).strftime(
+                    DATETIME_FORMAT_STR),
+            )
+            meta_data_store.write_meta_data(meta_data=expired_meta_data)
+        exported_count = LocalCacher.export_bundle(
+            cache_dir=self.base_dir,
+            bundle_path=self.bundle_path,
+            cache_validity_hours=1,
+        )
+        self.assertEqual(exported_count, 6)
+
+    def test_static_bundle_methods(self) -> None:
+        # bundles are exported and imported through the class, without a LocalCacher instance
+        self.assertEqual(LocalCacher.export_bundle(cache_dir=self.base_dir, bundle_path=self.bundle_path), 0)
+        self.assertEqual(LocalCacher.import_bundle(bundle_path=self.bundle_path, cache_dir=self.cache_dir), 0)
+        for method_name in ['export_bundle', 'import_bundle']:
+            self.assertTrue(inspect.isfunction(inspect.getattr_static(LocalCacher, method_name).__func__))
+
+    def test_import_keeps_newer_entries(self) -> None:
+        self._export_bundle()
+        call_counter: List[Tuple[str, int]] = []
+        local_cacher = LocalCacher(cache_dir=self.cache_dir)
+        get_frame, _, _ = self._get_functions(local_cacher=local_cacher, call_counter=call_counter)
+        _ = get_frame(x=0)
+        imported_count = LocalCacher.import_bundle(bundle_path=self.bundle_path, cache_dir=self.cache_dir)
+        self.assertEqual(imported_count, 5)
+        # importing again replaces nothing
+        imported_count = LocalCacher.import_bundle(bundle_path=self.bundle_path, cache_dir=self.cache_dir)
+        self.assertEqual(imported_count, 0)
+
+    def test_bundle_base_layer(self) -> None:
+        self._export_bundle()
+        bundle_size_bytes = os.path.getsize(self.bundle_path)
+        local_cacher = LocalCacher(cache_dir=self.cache_dir, storage_config=StorageConfig(base_layer=self.bundle_path))
+        self._assert_hits(local_cacher=local_cacher)
+        # only entries computed are written to writable cache directory
+        self.assertEqual(len(JsonMetaDataStore(cache_dir=self.cache_dir).get_all_meta_data()), 3)
+        self.assertEqual(os.path.getsize(self.bundle_path), bundle_size_bytes)
+
+        # entries of writable cache directory replace entries of base layer
+        call_counter: List[Tuple[str, int]] = []
+        get_frame, _, _ = self._get_functions(local_cacher=local_cacher, call_counter=call_counter)
+        _ = get_frame(x=0, use_cache=False)
+        self.assertFramesEqual(get_frame(x=0), pd.DataFrame({'x': [0] * 3, 'y': [0] * 3}))
+        self.assertEqual(call_counter, [('get_frame', 0)])
+        self.assertEqual(len(JsonMetaDataStore(cache_dir=self.cache_dir).get_all_meta_data()), 4)
+
+        lookup = local_cacher.lookup_many(func=get_frame, list_of_kwargs=[{'x': x} for x in range(4)])
+        self.assertEqual(sorted(lookup.hits), [0, 1, 2])
+        self.assertEqual(lookup.missing_kwargs, [{'x': 3}])
+
+    def test_directory_base_layer(self) -> None:
+        self._export_bundle()
+        base_dir = os.path.join(self.temp_dir, 'imported_base')
+        os.makedirs(base_dir)
+        _ = LocalCacher.import_bundle(bundle_path=self.bundle_path, cache_dir=base_dir)
+        local_cacher = LocalCacher(
+            cache_dir=self.cache_dir,
+            storage_config=StorageConfig(use_meta_data_index=True, base_layer=base_dir),
+            eviction_config=EvictionConfig(max_cache_size_bytes=10**6),
+        )
+        self._assert_hits(local_cacher=local_cacher)
+        # base layer entries are not cleared
+        LocalCacher.clear_cache(cache_dir=self.cache_dir, use_meta_data_index=True)
+        self.assertEqual(len(JsonMetaDataStore(cache_dir=base_dir).get_all_meta_data()), 6)
+
+    def test_invalid_base_layer(self) -> None:
+        with self.assertRaises(LocalCacheException):
+            LocalCacher(cache_dir=self.cache_dir, storage_config=StorageConfig(base_layer=self.bundle_path))
+        with tarfile.open(self.bundle_path, 'w') as tar:
+            tar.add(self.base_dir, arcname='base')
+        with self.assertRaises(LocalCacheException):
+            LocalCacher(cache_dir=self.cache_dir, storage_config=StorageConfig(base_layer=self.bundle_path))
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
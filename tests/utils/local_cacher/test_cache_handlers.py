@@ -0,0 +1,386 @@
+from typing import Any
+import datetime
+import os
+import pytest
+import numpy as np
+import pandas as pd
+from tests.temp_dir_test_case import TempDirTestCase
+from app_lib.utils.local_cacher import (
+    DATETIME_FORMAT_STR,
+    DataFrameCacheHandler,
+    HandlerConfig,
+    JsonMetaDataStore,
+    LocalCacheException,
+    LocalCacher,
+    MetaData,
+    NumpyCacheHandler,
+    ObjectCacheHandler,
+    OutOfBandObjectCacheHandler,
+    ParquetCacheHandler,
+)
+from app_lib.utils.local_cacher.cache_handlers import PYARROW_IS_INSTALLED
+
+
+def _get_meta_data(
+    canonical_file_prefix: str,
+    cache_handler_name: str,
+) -> MetaData:
+    meta_data = MetaData(
+        write_datetime_str=datetime.datetime.now().strftime(DATETIME_FORMAT_STR),
+        canonical_file_prefix=canonical_file_prefix,
+        cache_handler_name=cache_handler_name,
+        function_source_hash='',
+        kwargs_hash='',
+        function_name='',
+        function_file_location='',
+    )
+    return meta_data
+
+
+@pytest.mark.skipif(not PYARROW_IS_INSTALLED, reason='pyarrow not installed')
+class TestParquetCacheHandler(TempDirTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.frame = pd.DataFrame(
+            {
+                'a': [1, 2, 3],
+                'b': ['x', 'y', 'z'],
+                'c': pd.to_datetime([
+                    '2021-01-01 00:00:00.000001',
+                    '2021-01-02 00:00:00.000002',
+                    '2021-01-03 00:00:00.000003',
+                ]),
+            },
+            index=pd.Index([10, 20, 30], name='i'),
+        )
+
+    def test_round_trip(self) -> None:
+        meta_data = _get_meta_data(canonical_file_prefix='p', cache_handler_name=ParquetCacheHandler.CACHE_HANDLER_NAME)
+        ParquetCacheHandler.serialize_to_disk(cachable_object=self.frame, meta_data=meta_data, cache_dir=self.cache_dir)
+        # dtypes, index and datetime precision are preserved
+        returned_frame = ParquetCacheHandler.deserialize_from_disk(meta_data=meta_data, cache_dir=self.cache_dir)
+        pd.testing.assert_frame_equal(returned_frame, self.frame)
+
+        returned_frame = ParquetCacheHandler.deserialize_columns_from_disk(
+            meta_data=meta_data,
+            cache_dir=self.cache_dir,
+            columns=['c', 'a'],
+        )
+        pd.testing.assert_frame_equal(returned_frame, self.frame[['c', 'a']])
+
+        ParquetCacheHandler.delete_cache(meta_data=meta_data, cache_dir=self.cache_dir)
+        self.assertEqual(os.listdir(self.cache_dir), [])
+
+    def test_handler_selection(self) -> None:
+        self.assertTrue(ParquetCacheHandler.handles_object(cachable_object=self.frame))
+        # frames parquet can not store exactly are pickled
+        integer_columns_frame = pd.DataFrame({0: [1], 1: [2]})
+        self.assertFalse(ParquetCacheHandler.handles_object(cachable_object=integer_columns_frame))
+        cache_handler = LocalCacher._get_cache_handler_from_object(  # pylint: disable=protected-access
+            return_object=integer_columns_frame)
+        self.assertEqual(cache_handler.CACHE_HANDLER_NAME, ObjectCacheHandler.CACHE_HANDLER_NAME)
+        self.assertFalse(DataFrameCacheHandler.handles_object(cachable_object=self.frame))
+
+    # pylint: disable=unexpected-keyword-arg
+    def test_frames_parquet_can_not_store(self) -> None:
+        frames = [
+            # mixed types in object column are rejected by pyarrow
+            pd.DataFrame({'a': [1, 'x', 2.5], 'b': [1, 2, 3]}),
+            # duplicate column names are rejected by pyarrow
+            pd.DataFrame([[1, 2], [3, 4]], columns=['a', 'a']),
+            # dicts are read back as structs with keys of all rows
+            pd.DataFrame({'a': [{'k': 1}, {'j': 2}]}),
+            # nullable python ints are read back as floats
+            pd.DataFrame({'a': [1, None]}, dtype=object),
+            # mixed types in index
+            pd.DataFrame({'a': [1, 2]}, index=pd.Index([1, 'x'], dtype=object)),
+        ]
+        calls = []
+
+        @LocalCacher(cache_dir=self.cache_dir)
+        def f(i: int, use_cache: bool = True) -> pd.DataFrame:  # pylint: disable=unused-argument
+            calls.append(i)
+            return frames[i]
+
+        for i, frame in enumerate(frames):
+            self.assertFalse(ParquetCacheHandler.handles_object(cachable_object=frame))
+            pd.testing.assert_frame_equal(f(i=i), frame)
+            pd.testing.assert_frame_equal(f(i=i), frame)
+        self.assertEqual(calls, list(range(len(frames))))
+        self.assertEqual(f(i=2)['a'].tolist(), [{'k': 1}, {'j': 2}])
+        handler_names = {m.cache_handler_name for m in JsonMetaDataStore(cache_dir=self.cache_dir).get_all_meta_data()}
+        self.assertEqual(handler_names, {ObjectCacheHandler.CACHE_HANDLER_NAME})
+
+    def test_column_projection(self) -> None:
+        frame = self.frame
+
+        @LocalCacher(cache_dir=self.cache_dir)
+        def f(use_cache: bool = True) -> pd.DataFrame:  # pylint: disable=unused-argument
+            return frame
+
+        # miss computes and caches full frame
+        pd.testing.assert_frame_equal(f(cache_columns=['a']), frame[['a']])
+        pd.testing.assert_frame_equal(f(), frame)
+        # hit reads requested columns only
+        pd.testing.assert_frame_equal(f(cache_columns=['b', 'c']), frame[['b', 'c']])
+
+    def test_migrate_csv_entries_to_parquet(self) -> None:
+        meta_data = _get_meta_data(
+            canonical_file_prefix='c',
+            cache_handler_name=DataFrameCacheHandler.CACHE_HANDLER_NAME,
+        )
+        csv_frame = pd.DataFrame({'a': [1, 2], 'b': ['x', 'y']})
+        DataFrameCacheHandler.serialize_to_disk(
+            cachable_object=csv_frame,
+            meta_data=meta_data,
+            cache_dir=self.cache_dir,
+        )
+        meta_data_store = JsonMetaDataStore(cache_dir=self.cache_dir)
+        meta_data_store.write_meta_data(meta_data=meta_data)
+
+        migrated_count = LocalCacher.migrate_csv_entries_to_parquet(cache_dir=self.cache_dir)
+        self.assertEqual(migrated_count, 1)
+        migrated_meta_data = meta_data_store.get_meta_data(canonical_file_prefix='c')
+        assert migrated_meta_data is not None
+        self.assertEqual(migrated_meta_data.cache_handler_name, ParquetCacheHandler.CACHE_HANDLER_NAME)
+        self.assertEqual(migrated_meta_data.write_datetime_str, meta_data.write_datetime_str)
+        self.assertFalse(os.path.exists(DataFrameCacheHandler.get_cache_file_paths(meta_data, self.cache_dir)[0]))
+        returned_frame = ParquetCacheHandler.deserialize_from_disk(
+            meta_data=migrated_meta_data,
+            cache_dir=self.cache_dir,
+        )
+        self.assertFramesEqual(returned_frame, csv_frame)
+
+
+class TestDataFrameCacheHandler(TempDirTestCase):
+    def test_column_projection(self) -> None:
+        meta_data = _get_meta_data(
+            canonical_file_prefix='c',
+            cache_handler_name=DataFrameCacheHandler.CACHE_HANDLER_NAME,
+        )
+        frame = pd.DataFrame({'a': [1, 2], 'b': ['x', 'y'], 'c': [0.5, 1.5]})
+        DataFrameCacheHandler.serialize_to_disk(cachable_object=frame, meta_data=meta_data, cache_dir=self.cache_dir)
+        returned_frame = DataFrameCacheHandler.deserialize_columns_from_disk(
+            meta_data=meta_data,
+            cache_dir=self.cache_dir,
+            columns=['c', 'a'],
+        )
+        self.assertFramesEqual(returned_frame, frame[['c', 'a']])
+
+
+class TestNumpyCacheHandler(TempDirTestCase):
+    def test_round_trip(self) -> None:
+        arrays = {'x': np.arange(10, dtype=np.float64), 'y': np.ones((3, 4), dtype=np.int32)}
+        for i, cachable_object in enumerate([arrays['x'], arrays, (arrays['x'], arrays['y'])]):
+            meta_data = _get_meta_data(
+                canonical_file_prefix=str(i),
+                cache_handler_name=NumpyCacheHandler.CACHE_HANDLER_NAME,
+            )
+            NumpyCacheHandler.serialize_to_disk(
+                cachable_object=cachable_object,
+                meta_data=meta_data,
+                cache_dir=self.cache_dir,
+            )
+            returned_object = NumpyCacheHandler.deserialize_from_disk(meta_data=meta_data, cache_dir=self.cache_dir)
+            self.assertIsInstance(returned_object, type(cachable_object))
+            if isinstance(cachable_object, dict):
+                self.assertEqual(list(returned_object.keys()), list(cachable_object.keys()))
+                returned_arrays, cached_arrays = list(returned_object.values()), list(cachable_object.values())
+            elif isinstance(cachable_object, tuple):
+                returned_arrays, cached_arrays = list(returned_object), list(cachable_object)
+            else:
+                returned_arrays, cached_arrays = [returned_object], [cachable_object]
+            for returned_array, cached_array in zip(returned_arrays, cached_arrays):
+                # hits are read only memory mapped views
+                self.assertIsInstance(returned_array, np.memmap)
+                self.assertFalse(returned_array.flags.writeable)
+                np.testing.assert_array_equal(returned_array, cached_array)
+                self.assertEqual(returned_array.dtype, cached_array.dtype)
+            del returned_object, returned_arrays
+            NumpyCacheHandler.delete_cache(meta_data=meta_data, cache_dir=self.cache_dir)
+        self.assertEqual(os.listdir(self.cache_dir), [])
+
+    def test_replaced_entries(self) -> None:
+        meta_data = _get_meta_data(canonical_file_prefix='a', cache_handler_name=NumpyCacheHandler.CACHE_HANDLER_NAME)
+        NumpyCacheHandler().serialize_atomically(
+            cachable_object=(np.arange(3), np.arange(4), np.arange(5)),
+            meta_data=meta_data,
+            cache_dir=self.cache_dir,
+        )
+        replaced_arrays = NumpyCacheHandler.deserialize_from_disk(meta_data=meta_data, cache_dir=self.cache_dir)
+        # files of replaced entry are deleted once index names the new files
+        NumpyCacheHandler().serialize_atomically(
+            cachable_object=np.arange(6),
+            meta_data=meta_data,
+            cache_dir=self.cache_dir,
+        )
+        self.assertEqual(
+            sorted(os.listdir(self.cache_dir)),
+            sorted(os.path.basename(f) for f in NumpyCacheHandler.get_cache_file_paths(
+                meta_data=meta_data,
+                cache_dir=self.cache_dir,
+            )),
+        )
+        self.assertEqual(len(os.listdir(self.cache_dir)), 2)
+        np.testing.assert_array_equal(
+            NumpyCacheHandler.deserialize_from_disk(meta_data=meta_data, cache_dir=self.cache_dir),
+            np.arange(6),
+        )
+        # mapped arrays of replaced entry stay readable
+        np.testing.assert_array_equal(replaced_arrays[2], np.arange(5))
+
+        # entries written before files were versioned are read
+        np.save(os.path.join(self.cache_dir, 'b.0.npy'), np.arange(2))
+        with open(os.path.join(self.cache_dir, 'b.npy-index.json'), 'w', encoding='utf8') as index_file:
+            index_file.write('{"kind": "array", "keys": [], "array_count": 1}')
+        np.testing.assert_array_equal(
+            NumpyCacheHandler.deserialize_from_disk(
+                meta_data=_get_meta_data(canonical_file_prefix='b', cache_handler_name='Numpy'),
+                cache_dir=self.cache_dir,
+            ),
+            np.arange(2),
+        )
+
+    def test_handler_selection(self) -> None:
+        array = np.arange(3)
+        self.assertTrue(NumpyCacheHandler.handles_object(cachable_object=array))
+        self.assertTrue(NumpyCacheHandler.handles_object(cachable_object={'a': array}))
+        self.assertTrue(NumpyCacheHandler.handles_object(cachable_object=(array, array)))
+        # object arrays, array subclasses, mixed containers and non string keys are pickled
+        for cachable_object in [
+                np.array(['a', None], dtype=object),
+            np.ma.masked_array([1, 2], mask=[False, True]),
+            np.matrix([[1, 2]]),
+            {'a': np.ma.masked_array([1, 2])},
+            {'a': array, 'b': 1},
+            {1: array},
+            (array, 'a'),
+            {},
+            (),
+        ]:
+            self.assertFalse(NumpyCacheHandler.handles_object(cachable_object=cachable_object))
+            cache_handler = LocalCacher._get_cache_handler_from_object(  # pylint: disable=protected-access
+                return_object=cachable_object)
+            self.assertEqual(cache_handler.CACHE_HANDLER_NAME, ObjectCacheHandler.CACHE_HANDLER_NAME)
+
+    def test_local_cacher(self) -> None:
+        calls = []
+
+        @LocalCacher(cache_dir=self.cache_dir)
+        def f(n: int, use_cache: bool = True) -> np.ndarray:  # pylint: disable=unused-argument
+            calls.append(n)
+            return np.arange(n)
+
+        np.testing.assert_array_equal(f(n=5), np.arange(5))
+        returned_array = f(n=5)
+        self.assertIsInstance(returned_array, np.memmap)
+        np.testing.assert_array_equal(returned_array, np.arange(5))
+        self.assertEqual(calls, [5])
+
+    def test_array_subclasses(self) -> None:
+        arrays = [np.ma.masked_array([1, 2, 3], mask=[False, True, False]), np.matrix([[1, 2], [3, 4]])]
+
+        @LocalCacher(cache_dir=self.cache_dir)
+        def f(i: int, use_cache: bool = True) -> np.ndarray:  # pylint: disable=unused-argument
+            return arrays[i]
+
+        for i, array in enumerate(arrays):
+            _ = f(i=i)
+            returned_array = f(i=i)
+            self.assertIs(type(returned_array), type(array))
+            np.testing.assert_array_equal(returned_array, array)
+        np.testing.assert_array_equal(f(i=0).mask, [False, True, False])
+
+
+class TestOutOfBandObjectCacheHandler(TempDirTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        # large arrays and frame columns are written out of band, small ones stay in the pickle stream
+        self.artifacts = {
+            'name': 'model',
+            'weights': np.arange(10**5, dtype=np.float64),
+            'bias': np.ones(3),
+            'frame': pd.DataFrame({'a': np.arange(10**5), 'b': np.zeros(10**5)}),
+            'empty': np.array([], dtype=np.int8),
+        }
+
+    def test_round_trip(self) -> None:
+        meta_data = _get_meta_data(
+            canonical_file_prefix='o',
+            cache_handler_name=OutOfBandObjectCacheHandler.CACHE_HANDLER_NAME,
+        )
+        OutOfBandObjectCacheHandler.serialize_to_disk(
+            cachable_object=self.artifacts,
+            meta_data=meta_data,
+            cache_dir=self.cache_dir,
+        )
+        buffer_file_names = [f for f in os.listdir(self.cache_dir) if f.endswith('.pkl5-buffer')]
+        # weights and one buffer per dtype block of frame
+        self.assertEqual(len(buffer_file_names), 3)
+        returned_artifacts = OutOfBandObjectCacheHandler.deserialize_from_disk(
+            meta_data=meta_data,
+            cache_dir=self.cache_dir,
+        )
+        self.assertEqual(returned_artifacts['name'], 'model')
+        for key in ['weights', 'bias', 'empty']:
+            np.testing.assert_array_equal(returned_artifacts[key], self.artifacts[key])
+            self.assertEqual(returned_artifacts[key].dtype, self.artifacts[key].dtype)
+        self.assertFramesEqual(returned_artifacts['frame'], self.artifacts['frame'])
+        # large buffers are read only views of mapped files
+        self.assertFalse(returned_artifacts['weights'].flags.writeable)
+        self.assertFalse(returned_artifacts['weights'].flags.owndata)
+        self.assertTrue(returned_artifacts['bias'].flags.writeable)
+        self.assertGreater(
+            OutOfBandObjectCacheHandler.get_cache_size_bytes(meta_data=meta_data, cache_dir=self.cache_dir),
+            2 * 10**5 * 8,
+        )
+        del returned_artifacts
+        OutOfBandObjectCacheHandler.delete_cache(meta_data=meta_data, cache_dir=self.cache_dir)
+        self.assertEqual(os.listdir(self.cache_dir), [])
+
+    def test_replaced_entries(self) -> None:
+        meta_data = _get_meta_data(
+            canonical_file_prefix='o',
+            cache_handler_name=OutOfBandObjectCacheHandler.CACHE_HANDLER_NAME,
+        )
+        for cachable_object in [self.artifacts, {'name': 'model'}]:
+            OutOfBandObjectCacheHandler().serialize_atomically(
+                cachable_object=cachable_object,
+                meta_data=meta_data,
+                cache_dir=self.cache_dir,
+            )
+        # buffer files of replaced entry are deleted
+        self.assertEqual(len(os.listdir(self.cache_dir)), 2)
+        self.assertEqual(
+            OutOfBandObjectCacheHandler.deserialize_from_disk(meta_data=meta_data, cache_dir=self.cache_dir),
+            {'name': 'model'},
+        )
+
+    def test_local_cacher(self) -> None:
+        calls = []
+
+        @LocalCacher(cache_dir=self.cache_dir, handler_config=HandlerConfig(out_of_band_buffers=True))
+        def f(n: int, use_cache: bool = True) -> Any:  # pylint: disable=unused-argument
+            calls.append(n)
+            return {'n': n, 'weights': np.arange(n, dtype=np.float64)}
+
+        _ = f(n=10**5)
+        returned_artifacts = f(n=10**5)
+        self.assertEqual(calls, [10**5])
+        self.assertEqual(returned_artifacts['n'], 10**5)
+        np.testing.assert_array_equal(returned_artifacts['weights'], np.arange(10**5, dtype=np.float64))
+        self.assertFalse(returned_artifacts['weights'].flags.writeable)
+        meta_data = JsonMetaDataStore(cache_dir=self.cache_dir).get_all_meta_data()
+        self.assertEqual(
+            [m.cache_handler_name for m in meta_data],
+            [OutOfBandObjectCacheHandler.CACHE_HANDLER_NAME],
+        )
+        with self.assertRaises(LocalCacheException):
+            LocalCacher(
+                cache_dir=self.cache_dir,
+                handler_config=HandlerConfig(out_of_band_buffers=True, compression_codec='zlib'),
+            )
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
@@ -0,0 +1,133 @@
+import dataclasses
+import datetime
+import os
+from typing import Any, List
+import pytest
+import numpy as np
+from tests.temp_dir_test_case import TempDirTestCase
+from app_lib.utils.local_cacher import (
+    ADAPTIVE_COMPRESSION,
+    DATETIME_FORMAT_STR,
+    NO_COMPRESSION,
+    CompressedObjectCacheHandler,
+    HandlerConfig,
+    JsonMetaDataStore,
+    LocalCacher,
+    LocalCacheException,
+    MetaData,
+    get_available_codec_names,
+)
+from app_lib.utils.local_cacher.compression import (
+    get_adaptive_codec_name,
+    get_codec,
+    get_codec_header,
+)
+
+
+def _get_meta_data(canonical_file_prefix: str) -> MetaData:
+    meta_data = MetaData(
+        write_datetime_str=datetime.datetime.now().strftime(DATETIME_FORMAT_STR),
+        canonical_file_prefix=canonical_file_prefix,
+        cache_handler_name=CompressedObjectCacheHandler.CACHE_HANDLER_NAME,
+        function_source_hash='',
+        kwargs_hash='',
+        function_name='',
+        function_file_location='',
+    )
+    return meta_data
+
+
+class TestCompression(TempDirTestCase):
+    def test_codecs_round_trip(self) -> None:
+        data = b'abc' * 1000
+        for codec_name in get_available_codec_names():
+            codec = get_codec(codec_name=codec_name)
+            self.assertEqual(codec.decompress(codec.compress(data)), data)
+        with pytest.raises(LocalCacheException):
+            _ = get_codec(codec_name='not-a-codec')
+        with pytest.raises(LocalCacheException):
+            _ = CompressedObjectCacheHandler(codec_name='not-a-codec')
+
+    def test_adaptive_codec_choice(self) -> None:
+        cache_handler = CompressedObjectCacheHandler(codec_name=ADAPTIVE_COMPRESSION, min_size_bytes=1000)
+        # small payloads are not compressed
+        self.assertEqual(cache_handler.choose_codec_name(data=b'a' * 10), NO_COMPRESSION)
+        # compressible payloads use preferred codec
+        self.assertEqual(cache_handler.choose_codec_name(data=b'a' * 10000), get_adaptive_codec_name())
+        # random bytes are incompressible
+        random_data = np.random.default_rng(0).bytes(10000)
+        self.assertEqual(cache_handler.choose_codec_name(data=random_data), NO_COMPRESSION)
+
+        fixed_cache_handler = CompressedObjectCacheHandler(codec_name='lzma')
+        self.assertEqual(fixed_cache_handler.choose_codec_name(data=b'a'), 'lzma')
+
+    def test_handler_round_trip(self) -> None:
+        cachable_object = {'a': list(range(10000))}
+        for codec_name in get_available_codec_names() + [ADAPTIVE_COMPRESSION]:
+            cache_handler = CompressedObjectCacheHandler(codec_name=codec_name, min_size_bytes=0)
+            meta_data = cache_handler.serialize_with_meta_data(
+                cachable_object=cachable_object,
+                meta_data=_get_meta_data(canonical_file_prefix=codec_name),
+                cache_dir=self.cache_dir,
+            )
+            # codec is recorded so reads do not need handler settings
+            self.assertNotEqual(meta_data.compression_codec, ADAPTIVE_COMPRESSION)
+            returned_object = CompressedObjectCacheHandler.deserialize_from_disk(
+                meta_data=meta_data,
+                cache_dir=self.cache_dir,
+            )
+            self.assertEqual(returned_object, cachable_object)
+
+    def test_codec_header(self) -> None:
+        cachable_object = {'a': list(range(10000))}
+        cache_handler = CompressedObjectCacheHandler(codec_name='zlib')
+        meta_data = cache_handler.serialize_with_meta_data(
+            cachable_object=cachable_object,
+            meta_data=_get_meta_data(canonical_file_prefix='header'),
+            cache_dir=self.cache_dir,
+        )
+        # meta data of a concurrent write with another codec does not change how payload is read
+        for codec_name in [NO_COMPRESSION, 'lzma']:
+            returned_object = CompressedObjectCacheHandler.deserialize_from_disk(
+                meta_data=dataclasses.replace(meta_data, compression_codec=codec_name),
+                cache_dir=self.cache_dir,
+            )
+            self.assertEqual(returned_object, cachable_object)
+
+        # payloads written without header are read with codec of meta data
+        file_path = CompressedObjectCacheHandler.get_cache_file_paths(meta_data, self.cache_dir)[0]
+        with open(file_path, 'rb') as f:
+            data = f.read()
+        with open(file_path, 'wb') as f:
+            f.write(data[len(get_codec_header(codec_name='zlib')):])
+        returned_object = CompressedObjectCacheHandler.deserialize_from_disk(
+            meta_data=meta_data,
+            cache_dir=self.cache_dir,
+        )
+        self.assertEqual(returned_object, cachable_object)
+
+    def test_local_cacher_compression(self) -> None:
+        call_counter: List[int] = []
+
+        @LocalCacher(cache_dir=self.cache_dir, handler_config=HandlerConfig(compression_codec='zlib'))
+        def f(
+                x: int,
+                use_cache: bool = True,  # pylint: disable=unused-argument
+        ) -> Any:
+            call_counter.append(x)
+            return [x] * 10000
+
+        self.assertEqual(f(x=1), [1] * 10000)
+        self.assertEqual(f(x=1), [1] * 10000)
+        self.assertEqual(call_counter, [1])
+
+        all_meta_data = JsonMetaDataStore(cache_dir=self.cache_dir).get_all_meta_data()
+        self.assertEqual(len(all_meta_data), 1)
+        self.assertEqual(all_meta_data[0].cache_handler_name, CompressedObjectCacheHandler.CACHE_HANDLER_NAME)
+        self.assertEqual(all_meta_data[0].compression_codec, 'zlib')
+        file_path = CompressedObjectCacheHandler.get_cache_file_paths(all_meta_data[0], self.cache_dir)[0]
+        assert os.path.exists(file_path)
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
@@ -0,0 +1,117 @@
+from typing import List
+import multiprocessing
+import os
+import threading
+import time
+import pytest
+import pandas as pd
+from tests.temp_dir_test_case import TempDirTestCase
+from app_lib.utils.local_cacher import LocalCacher
+from app_lib.utils.local_cacher.locks import (
+    FCNTL_IS_AVAILABLE,
+    KeyedLock,
+)
+from app_lib.utils.local_cacher.meta_data import TEMP_FILE_PREFIX
+
+COMPUTE_SECONDS = 0.2
+CALLER_COUNT = 8
+
+
+def _call_cached_function(
+    cache_dir: str,
+    calls_file_path: str,
+) -> None:
+    @LocalCacher(cache_dir=cache_dir)
+    def f(
+            x: int,
+            use_cache: bool = True,  # pylint: disable=unused-argument
+    ) -> pd.DataFrame:
+        with open(calls_file_path, 'a', encoding='utf8') as calls_file:
+            calls_file.write('{}\n'.format(os.getpid()))
+        time.sleep(COMPUTE_SECONDS)
+        return pd.DataFrame({'x': [x] * 3})
+
+    _ = f(x=1)
+
+
+class TestConcurrency(TempDirTestCase):
+    def test_single_flight_threads(self) -> None:
+        call_counter = []
+        results: List[pd.DataFrame] = []
+        barrier = threading.Barrier(CALLER_COUNT)
+
+        @LocalCacher(cache_dir=self.cache_dir)
+        def f(
+                x: int,
+                use_cache: bool = True,  # pylint: disable=unused-argument
+        ) -> pd.DataFrame:
+            call_counter.append(x)
+            time.sleep(COMPUTE_SECONDS)
+            return pd.DataFrame({'x': [x] * 3})
+
+        def _call() -> None:
+            barrier.wait()
+            results.append(f(x=1))
+
+        threads = [threading.Thread(target=_call) for _ in range(CALLER_COUNT)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        # stampede costs a single computation
+        self.assertEqual(call_counter, [1])
+        self.assertEqual(len(results), CALLER_COUNT)
+        for result in results:
+            self.assertFramesEqual(result, pd.DataFrame({'x': [1] * 3}))
+        # no temporary files are left behind
+        self.assertEqual([n for n in os.listdir(self.cache_dir) if n.startswith(TEMP_FILE_PREFIX)], [])
+
+    @pytest.mark.skipif(not FCNTL_IS_AVAILABLE, reason='file locks not available')
+    def test_single_flight_processes(self) -> None:
+        calls_file_path = os.path.join(self.cache_dir, 'calls.txt')
+        context = multiprocessing.get_context('spawn')
+        processes = [
+            context.Process(target=_call_cached_function, args=(self.cache_dir, calls_file_path))
+            for _ in range(CALLER_COUNT // 2)
+        ]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+            self.assertEqual(process.exitcode, 0)
+        with open(calls_file_path, 'r', encoding='utf8') as calls_file:
+            self.assertEqual(len(calls_file.readlines()), 1)
+
+    def test_keyed_lock(self) -> None:
+        keyed_lock = KeyedLock()
+        with keyed_lock.hold(key='a'):
+            with keyed_lock.hold(key='b'):
+                self.assertEqual(len(keyed_lock), 2)
+        # locks are dropped once released
+        self.assertEqual(len(keyed_lock), 0)
+
+    def test_failed_write_is_not_visible(self) -> None:
+        call_counter = []
+
+        class Unpicklable:
+            def __reduce__(self) -> str:
+                raise TypeError('can not pickle')
+
+        @LocalCacher(cache_dir=self.cache_dir)
+        def f(use_cache: bool = True) -> Unpicklable:  # pylint: disable=unused-argument
+            call_counter.append(1)
+            return Unpicklable()
+
+        with self.assertRaises(TypeError):
+            f()
+        # neither partial payload nor meta data was committed
+        self.assertEqual([n for n in os.listdir(self.cache_dir) if os.path.isfile(os.path.join(self.cache_dir, n))],
+                         [])
+        with self.assertRaises(TypeError):
+            f()
+        self.assertEqual(len(call_counter), 2)
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
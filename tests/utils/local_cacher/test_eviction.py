@@ -0,0 +1,304 @@
+from typing import (
+    List,
+    Optional,
+)
+import dataclasses
+import datetime
+import json
+import os
+import sqlite3
+import time
+import pytest
+from tests.temp_dir_test_case import TempDirTestCase
+from app_lib.utils.local_cacher import (
+    COST_EVICTION,
+    DATETIME_FORMAT_STR,
+    LFU_EVICTION,
+    LRU_EVICTION,
+    CacheInstrumentation,
+    EvictableMetaDataStore,
+    EvictionConfig,
+    JsonMetaDataStore,
+    LocalCacheException,
+    LocalCacher,
+    MetaData,
+    ObjectCacheHandler,
+    SqliteMetaDataStore,
+    StorageConfig,
+)
+
+PAYLOAD_SIZE_BYTES = 1000
+
+
+def _get_meta_data(
+    canonical_file_prefix: str,
+    function_name: str = 'f',
+    compute_seconds: Optional[float] = None,
+) -> MetaData:
+    meta_data = MetaData(
+        write_datetime_str=datetime.datetime.now().strftime(DATETIME_FORMAT_STR),
+        canonical_file_prefix=canonical_file_prefix,
+        cache_handler_name=ObjectCacheHandler.CACHE_HANDLER_NAME,
+        function_source_hash='',
+        kwargs_hash='',
+        function_name=function_name,
+        function_file_location='',
+        compute_seconds=compute_seconds,
+    )
+    return meta_data
+
+
+class TestEviction(TempDirTestCase):
+    def test_eviction_candidates(self) -> None:
+        meta_data_store = SqliteMetaDataStore(cache_dir=self.cache_dir)
+        for prefix, function_name in [('a', 'f'), ('b', 'f'), ('c', 'g')]:
+            meta_data_store.write_meta_data(
+                meta_data=_get_meta_data(canonical_file_prefix=prefix, function_name=function_name),
+                size_bytes=10,
+            )
+        self.assertEqual(meta_data_store.get_size_bytes(), 30)
+        self.assertEqual(meta_data_store.get_size_bytes(function_name='f'), 20)
+        self.assertEqual(meta_data_store.get_size_bytes(function_name='missing'), 0)
+        # running totals follow replaced and deleted entries
+        for prefix, size_bytes in [('c', 5), ('d', 7)]:
+            meta_data_store.write_meta_data(
+                meta_data=_get_meta_data(canonical_file_prefix=prefix, function_name='g'),
+                size_bytes=size_bytes,
+            )
+        meta_data_store.delete_meta_data(meta_data=_get_meta_data(canonical_file_prefix='d', function_name='g'))
+        self.assertEqual(meta_data_store.get_size_bytes(), 25)
+        self.assertEqual(meta_data_store.get_size_bytes(function_name='g'), 5)
+
+        # a is most recently used, b is most frequently used
+        meta_data_store.record_hit(canonical_file_prefix='b')
+        meta_data_store.record_hit(canonical_file_prefix='b')
+        meta_data_store.record_hit(canonical_file_prefix='a')
+
+        def _get_candidate_prefixes(eviction_policy: str, **kwargs: str) -> List[str]:
+            eviction_candidates = meta_data_store.get_eviction_candidates(
+                eviction_policy=eviction_policy,
+                limit=10,
+                **kwargs,
+            )
+            return [m.canonical_file_prefix for m, _ in eviction_candidates]
+
+        self.assertEqual(_get_candidate_prefixes(eviction_policy=LRU_EVICTION), ['c', 'b', 'a'])
+        self.assertEqual(_get_candidate_prefixes(eviction_policy=LFU_EVICTION), ['c', 'a', 'b'])
+        self.assertEqual(_get_candidate_prefixes(eviction_policy=LFU_EVICTION, function_name='f'), ['a', 'b'])
+
+    def test_cache_size_quota(self) -> None:
+        call_counter = []
+
+        @LocalCacher(
+            cache_dir=self.cache_dir,
+            storage_config=StorageConfig(use_meta_data_index=True),
+            eviction_config=EvictionConfig(max_cache_size_bytes=int(3.5 * PAYLOAD_SIZE_BYTES)),
+        )
+        def f(
+                x: int,
+                use_cache: bool = True,  # pylint: disable=unused-argument
+        ) -> bytes:
+            call_counter.append(x)
+            return os.urandom(PAYLOAD_SIZE_BYTES)
+
+        for x in range(3):
+            _ = f(x=x)
+        # hit keeps x=0 recently used
+        _ = f(x=0)
+        _ = f(x=3)
+        meta_data_store = SqliteMetaDataStore(cache_dir=self.cache_dir)
+        self.assertLessEqual(meta_data_store.get_size_bytes(), int(3.5 * PAYLOAD_SIZE_BYTES))
+        self.assertEqual(len(meta_data_store.get_all_meta_data()), 3)
+        self.assertEqual(len([n for n in os.listdir(self.cache_dir) if n.endswith('.pkl')]), 3)
+
+        # least recently used x=1 was evicted
+        call_counter.clear()
+        for x in [0, 2, 3, 1]:
+            _ = f(x=x)
+        self.assertEqual(call_counter, [1])
+
+    def test_missing_payload(self) -> None:
+        call_counter = []
+        instrumentation = CacheInstrumentation()
+        local_cacher = LocalCacher(cache_dir=self.cache_dir, instrumentation=instrumentation)
+
+        @local_cacher
+        def f(
+                x: int,
+                use_cache: bool = True,  # pylint: disable=unused-argument
+        ) -> bytes:
+            call_counter.append(x)
+            return b'x' * PAYLOAD_SIZE_BYTES
+
+        _ = f(x=1)
+        # payload evicted by another process after meta data is read is a miss
+        for file_name in os.listdir(self.cache_dir):
+            if file_name.endswith('.pkl'):
+                os.remove(os.path.join(self.cache_dir, file_name))
+        self.assertEqual(f(x=1), b'x' * PAYLOAD_SIZE_BYTES)
+        self.assertEqual(call_counter, [1, 1])
+        counters = instrumentation.snapshot().function_counters['f']
+        self.assertEqual((counters.hits, counters.misses, counters.expirations), (0, 2, 0))
+        disk_tier_stats = local_cacher.get_tier_stats()['disk']
+        self.assertEqual((disk_tier_stats.hits, disk_tier_stats.misses), (0, 2))
+
+    def test_function_size_quota(self) -> None:
+        cacher = LocalCacher(
+            cache_dir=self.cache_dir,
+            storage_config=StorageConfig(use_meta_data_index=True),
+            eviction_config=EvictionConfig(
+                max_function_cache_size_bytes=int(1.5 * PAYLOAD_SIZE_BYTES),
+                eviction_policy=LFU_EVICTION,
+            ),
+        )
+
+        @cacher
+        def f(
+                x: int,
+                use_cache: bool = True,  # pylint: disable=unused-argument
+        ) -> bytes:
+            return os.urandom(PAYLOAD_SIZE_BYTES + x)
+
+        @cacher
+        def g(
+                x: int,
+                use_cache: bool = True,  # pylint: disable=unused-argument
+        ) -> bytes:
+            return os.urandom(PAYLOAD_SIZE_BYTES + x)
+
+        for x in range(3):
+            _ = f(x=x)
+            _ = g(x=x)
+        # each function keeps its newest entry only
+        meta_data_store = SqliteMetaDataStore(cache_dir=self.cache_dir)
+        for function_name in ['f', 'g']:
+            function_meta_data = meta_data_store.get_function_meta_data(function_name=function_name)
+            self.assertEqual(len(function_meta_data), 1)
+
+    def test_evict_to_size(self) -> None:
+        @LocalCacher(cache_dir=self.cache_dir, storage_config=StorageConfig(use_meta_data_index=True))
+        def f(
+                x: int,
+                use_cache: bool = True,  # pylint: disable=unused-argument
+        ) -> bytes:
+            return os.urandom(PAYLOAD_SIZE_BYTES + x)
+
+        for x in range(4):
+            _ = f(x=x)
+        evicted_count = LocalCacher.evict_to_size(cache_dir=self.cache_dir, max_size_bytes=2 * PAYLOAD_SIZE_BYTES)
+        self.assertEqual(evicted_count, 3)
+        self.assertEqual(LocalCacher.evict_to_size(cache_dir=self.cache_dir, max_size_bytes=0), 1)
+        self.assertEqual([n for n in os.listdir(self.cache_dir) if n.endswith('.pkl')], [])
+
+    def test_cost_eviction_candidates(self) -> None:
+        meta_data_store = SqliteMetaDataStore(cache_dir=self.cache_dir)
+        # small result that took 10 minutes, large frame that takes 5 seconds and entry without compute time
+        for prefix, compute_seconds, size_bytes in [
+            ('costly', 600.0, 2 * 10**3),
+            ('cheap', 5.0, 2 * 10**9),
+            ('unknown', None, 10),
+        ]:
+            meta_data_store.write_meta_data(
+                meta_data=_get_meta_data(canonical_file_prefix=prefix, compute_seconds=compute_seconds),
+                size_bytes=size_bytes,
+            )
+        eviction_candidates = meta_data_store.get_eviction_candidates(eviction_policy=COST_EVICTION, limit=10)
+        self.assertEqual([m.canonical_file_prefix for m, _ in eviction_candidates], ['unknown', 'cheap', 'costly'])
+        self.assertEqual(meta_data_store.get_compute_seconds(), 605)
+        self.assertEqual(meta_data_store.get_compute_seconds(function_name='g'), 0)
+
+        # entries written after an eviction start at priority of evicted entry
+        for m, _ in eviction_candidates[:2]:
+            meta_data_store.record_eviction(meta_data=m)
+            meta_data_store.delete_meta_data(meta_data=m)
+        meta_data_store.write_meta_data(meta_data=_get_meta_data(canonical_file_prefix='new'), size_bytes=10)
+        eviction_candidates = meta_data_store.get_eviction_candidates(eviction_policy=COST_EVICTION, limit=10)
+        self.assertEqual([m.canonical_file_prefix for m, _ in eviction_candidates], ['new', 'costly'])
+
+    def test_cost_size_quota(self) -> None:
+        call_counter = []
+        local_cacher = LocalCacher(
+            cache_dir=self.cache_dir,
+            storage_config=StorageConfig(use_meta_data_index=True),
+            eviction_config=EvictionConfig(
+                max_cache_size_bytes=int(3.5 * PAYLOAD_SIZE_BYTES),
+                eviction_policy=COST_EVICTION,
+            ),
+        )
+
+        @local_cacher
+        def f(
+                x: int,
+                use_cache: bool = True,  # pylint: disable=unused-argument
+        ) -> bytes:
+            call_counter.append(x)
+            if x == 0:
+                time.sleep(0.05)
+            return os.urandom(PAYLOAD_SIZE_BYTES)
+
+        for x in range(4):
+            _ = f(x=x)
+        # least recently used x=0 is kept since it took longest to compute
+        call_counter.clear()
+        _ = f(x=0)
+        self.assertEqual(call_counter, [])
+        self.assertGreaterEqual(local_cacher.get_retained_compute_seconds(), 0.05)
+        self.assertGreaterEqual(local_cacher.get_retained_compute_seconds(function_name='f'), 0.05)
+
+        meta_data = [m for m in SqliteMetaDataStore(cache_dir=self.cache_dir).get_all_meta_data() if m.size_bytes]
+        self.assertEqual(len(meta_data), 3)
+        self.assertGreater(max(m.compute_seconds or 0 for m in meta_data), 0.05)
+        with self.assertRaises(LocalCacheException):
+            LocalCacher(cache_dir=self.cache_dir).get_retained_compute_seconds()
+
+    def test_index_without_compute_seconds(self) -> None:
+        # indexes created by earlier versions are extended
+        connection = sqlite3.connect(os.path.join(self.cache_dir, 'meta-data-index.sqlite3'))
+        connection.execute(
+            '''
+            CREATE TABLE cache_entries (
+                canonical_file_prefix TEXT PRIMARY KEY,
+                function_name TEXT NOT NULL,
+                write_timestamp REAL NOT NULL,
+                size_bytes INTEGER NOT NULL DEFAULT 0,
+                last_access_timestamp REAL NOT NULL,
+                hit_count INTEGER NOT NULL DEFAULT 0,
+                meta_data_json TEXT NOT NULL
+            )
+            '''
+        )
+        meta_data = _get_meta_data(canonical_file_prefix='a')
+        meta_data_json = dataclasses.asdict(meta_data)
+        for field_name in ['compute_seconds', 'size_bytes']:
+            meta_data_json.pop(field_name)
+        connection.execute(
+            'INSERT INTO cache_entries VALUES (?, ?, 0, 10, 0, 0, ?)',
+            ('a', 'f', json.dumps(meta_data_json)),
+        )
+        connection.commit()
+        connection.close()
+        meta_data_store = SqliteMetaDataStore(cache_dir=self.cache_dir)
+        meta_data_store.write_meta_data(
+            meta_data=_get_meta_data(canonical_file_prefix='b', compute_seconds=1),
+            size_bytes=10,
+        )
+        eviction_candidates = meta_data_store.get_eviction_candidates(eviction_policy=COST_EVICTION, limit=10)
+        self.assertEqual([m.canonical_file_prefix for m, _ in eviction_candidates], ['a', 'b'])
+        self.assertEqual(meta_data_store.get_compute_seconds(), 1)
+        # sizes of entries written before running totals are counted
+        self.assertEqual(meta_data_store.get_size_bytes(function_name='f'), 20)
+
+    def test_invalid_quota(self) -> None:
+        with self.assertRaises(LocalCacheException):
+            LocalCacher(cache_dir=self.cache_dir, eviction_config=EvictionConfig(max_cache_size_bytes=100))
+        with self.assertRaises(LocalCacheException):
+            EvictionConfig(eviction_policy='fifo')
+        # json meta data stores do not record sizes or access statistics
+        with self.assertRaises(LocalCacheException):
+            LocalCacher(cache_dir=self.cache_dir, eviction_config=EvictionConfig(eviction_policy=COST_EVICTION))
+        self.assertNotIsInstance(JsonMetaDataStore(cache_dir=self.cache_dir), EvictableMetaDataStore)
+        self.assertIsInstance(SqliteMetaDataStore(cache_dir=self.cache_dir), EvictableMetaDataStore)
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
@@ -0,0 +1,206 @@
+from typing import (
+    Any,
+    Callable,
+)
+import asyncio
+import dataclasses
+import threading
+import time
+import pytest
+from tests.temp_dir_test_case import TempDirTestCase
+from app_lib.utils.local_cacher import (
+    CacheInstrumentation,
+    CachedFailure,
+    FailureConfig,
+    LocalCacheException,
+    LocalCacher,
+)
+
+
+COMPUTE_SECONDS = 0.2
+CALLER_COUNT = 4
+
+
+class BadSpreadsheetIdError(Exception):
+    pass
+
+
+class TestFailures(TempDirTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.call_count = 0
+
+    def _get_cached_function(self, local_cacher: LocalCacher) -> Callable[..., Any]:
+        @local_cacher
+        def load_sheet(
+                sheet_id: str,
+                use_cache: bool = True,  # pylint: disable=unused-argument
+        ) -> str:
+            self.call_count += 1
+            if sheet_id == 'bad':
+                raise BadSpreadsheetIdError('no sheet {}'.format(sheet_id))
+            if sheet_id == 'flaky':
+                raise ValueError(sheet_id)
+            return sheet_id
+
+        return load_sheet
+
+    # pylint: disable=unexpected-keyword-arg
+    def test_cached_failures(self) -> None:
+        load_sheet = self._get_cached_function(local_cacher=LocalCacher(
+            cache_dir=self.cache_dir,
+            failure_config=FailureConfig(cached_exceptions=(BadSpreadsheetIdError, )),
+        ))
+        for _ in range(3):
+            with self.assertRaisesRegex(BadSpreadsheetIdError, 'no sheet bad'):
+                load_sheet(sheet_id='bad')
+        self.assertEqual(self.call_count, 1)
+        # exceptions not allowed are not cached
+        for _ in range(2):
+            with self.assertRaises(ValueError):
+                load_sheet(sheet_id='flaky')
+        self.assertEqual(self.call_count, 3)
+        # refreshes retry
+        with self.assertRaises(BadSpreadsheetIdError):
+            load_sheet(sheet_id='bad', use_cache=False)
+        self.assertEqual(self.call_count, 4)
+        # cached failures are raised before batches compute misses
+        with self.assertRaises(BadSpreadsheetIdError):
+            _ = load_sheet.map([{'sheet_id': 'good'}, {'sheet_id': 'bad'}])  # type: ignore[attr-defined]
+        self.assertEqual(self.call_count, 4)
+
+        # failures are retried once past failure validity
+        load_sheet = self._get_cached_function(local_cacher=LocalCacher(
+            cache_dir=self.cache_dir,
+            failure_config=FailureConfig(cached_exceptions=(BadSpreadsheetIdError, ), failure_validity_hours=0),
+        ))
+        with self.assertRaises(BadSpreadsheetIdError):
+            load_sheet(sheet_id='bad')
+        self.assertEqual(self.call_count, 5)
+
+    def test_failure_counters(self) -> None:
+        instrumentation = CacheInstrumentation()
+        local_cacher = LocalCacher(
+            cache_dir=self.cache_dir,
+            failure_config=FailureConfig(cached_exceptions=(BadSpreadsheetIdError, )),
+            instrumentation=instrumentation,
+        )
+        load_sheet = self._get_cached_function(local_cacher=local_cacher)
+        for _ in range(3):
+            with self.assertRaises(BadSpreadsheetIdError):
+                load_sheet(sheet_id='bad')
+        self.assertEqual(self.call_count, 1)
+        # replayed failures are misses, not hits
+        counters = instrumentation.snapshot().function_counters['load_sheet']
+        self.assertEqual((counters.hits, counters.misses, counters.computations), (0, 3, 1))
+        disk_tier_stats = local_cacher.get_tier_stats()['disk']
+        self.assertEqual((disk_tier_stats.hits, disk_tier_stats.misses), (0, 3))
+        # failed batch calls are computations
+        with self.assertRaises(ValueError):
+            _ = load_sheet.map([{'sheet_id': 'flaky'}])  # type: ignore[attr-defined]
+        self.assertEqual(instrumentation.snapshot().function_counters['load_sheet'].computations, 2)
+
+    def test_map_failures(self) -> None:
+        load_sheet = self._get_cached_function(local_cacher=LocalCacher(
+            cache_dir=self.cache_dir,
+            failure_config=FailureConfig(cached_exceptions=(BadSpreadsheetIdError, )),
+        ))
+        with self.assertRaises(BadSpreadsheetIdError):
+            _ = load_sheet.map([{'sheet_id': 'bad'}])  # type: ignore[attr-defined]
+        with self.assertRaises(BadSpreadsheetIdError):
+            load_sheet(sheet_id='bad')
+        self.assertEqual(self.call_count, 1)
+
+    def test_coroutine_failures(self) -> None:
+        @LocalCacher(
+            cache_dir=self.cache_dir,
+            failure_config=FailureConfig(cached_exceptions=(BadSpreadsheetIdError, )),
+        )
+        async def load_sheet(use_cache: bool = True) -> str:  # pylint: disable=unused-argument
+            self.call_count += 1
+            raise BadSpreadsheetIdError()
+
+        for _ in range(2):
+            with self.assertRaises(BadSpreadsheetIdError):
+                asyncio.run(load_sheet())
+        self.assertEqual(self.call_count, 1)
+
+    def test_single_flight_failures(self) -> None:
+        errors = []
+        barrier = threading.Barrier(CALLER_COUNT)
+
+        @LocalCacher(
+            cache_dir=self.cache_dir,
+            failure_config=FailureConfig(cached_exceptions=(BadSpreadsheetIdError, )),
+        )
+        def load_sheet(use_cache: bool = True) -> str:  # pylint: disable=unused-argument
+            self.call_count += 1
+            time.sleep(COMPUTE_SECONDS)
+            raise BadSpreadsheetIdError()
+
+        def _call() -> None:
+            barrier.wait()
+            try:
+                load_sheet()
+            except BadSpreadsheetIdError as exception:
+                errors.append(exception)
+
+        threads = [threading.Thread(target=_call) for _ in range(CALLER_COUNT)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        # callers waiting on the failed computation raise its cached failure
+        self.assertEqual(len(errors), CALLER_COUNT)
+        self.assertEqual(self.call_count, 1)
+
+    def test_single_flight_coroutine_failures(self) -> None:
+        results = []
+        barrier = threading.Barrier(CALLER_COUNT)
+
+        @LocalCacher(
+            cache_dir=self.cache_dir,
+            failure_config=FailureConfig(cached_exceptions=(BadSpreadsheetIdError, )),
+        )
+        async def load_sheet(use_cache: bool = True) -> str:  # pylint: disable=unused-argument
+            self.call_count += 1
+            await asyncio.sleep(COMPUTE_SECONDS)
+            raise BadSpreadsheetIdError()
+
+        async def _gather() -> None:
+            results.extend(await asyncio.gather(*[load_sheet() for _ in range(CALLER_COUNT)], return_exceptions=True))
+
+        def _call() -> None:
+            # each thread runs its own event loop, so loops only share the single flight lock
+            barrier.wait()
+            asyncio.run(_gather())
+
+        threads = [threading.Thread(target=_call) for _ in range(CALLER_COUNT)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(results), CALLER_COUNT * CALLER_COUNT)
+        for result in results:
+            self.assertIsInstance(result, BadSpreadsheetIdError)
+        self.assertEqual(self.call_count, 1)
+
+    def test_cached_failure(self) -> None:
+        cached_failure = CachedFailure.from_exception(exception=KeyError('sheet'))
+        self.assertIsInstance(cached_failure.to_exception(), KeyError)
+        self.assertTrue(cached_failure.is_valid(failure_validity_hours=1))
+        self.assertFalse(dataclasses.replace(cached_failure, failure_timestamp=0).is_valid(failure_validity_hours=1))
+
+        # exceptions that can not be pickled are raised again as LocalCacheException
+        class LocalError(Exception):
+            pass
+
+        cached_failure = CachedFailure.from_exception(exception=LocalError('sheet'))
+        self.assertIsInstance(cached_failure.to_exception(), LocalCacheException)
+        self.assertIn('sheet', str(cached_failure.to_exception()))
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
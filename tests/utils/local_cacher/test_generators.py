@@ -0,0 +1,82 @@
+from typing import (
+    Callable,
+    Generator,
+    List,
+)
+import os
+import pytest
+import pandas as pd
+from tests.temp_dir_test_case import TempDirTestCase
+from app_lib.utils.local_cacher import (
+    CacheInstrumentation,
+    LocalCacher,
+)
+
+
+class TestGenerators(TempDirTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.produced_chunks: List[int] = []
+
+    def _get_chunks(self, local_cacher: LocalCacher) -> Callable[..., Generator[pd.DataFrame, None, None]]:
+        @local_cacher
+        def get_chunks(
+                chunk_count: int,
+                use_cache: bool = True,  # pylint: disable=unused-argument
+        ) -> Generator[pd.DataFrame, None, None]:
+            for i in range(chunk_count):
+                self.produced_chunks.append(i)
+                yield pd.DataFrame({'chunk': [i] * 3, 'value': range(3)})
+
+        return get_chunks
+
+    # pylint: disable=unexpected-keyword-arg
+    def test_stream_and_replay(self) -> None:
+        instrumentation = CacheInstrumentation()
+        local_cacher = LocalCacher(cache_dir=self.cache_dir, instrumentation=instrumentation)
+        get_chunks = self._get_chunks(local_cacher=local_cacher)
+        chunks = get_chunks(chunk_count=3)
+        # chunks are passed through as produced
+        self.assertEqual(self.produced_chunks, [])
+        self.assertEqual(next(chunks)['chunk'].tolist(), [0, 0, 0])
+        self.assertEqual(self.produced_chunks, [0])
+        self.assertEqual([c['chunk'][0] for c in chunks], [1, 2])
+
+        # chunks are replayed lazily
+        replayed_chunks = get_chunks(chunk_count=3)
+        pd.testing.assert_frame_equal(next(replayed_chunks), pd.DataFrame({'chunk': [0] * 3, 'value': range(3)}))
+        self.assertEqual([c['chunk'][0] for c in replayed_chunks], [1, 2])
+        self.assertEqual(self.produced_chunks, [0, 1, 2])
+        self.assertEqual(instrumentation.snapshot().function_counters['get_chunks'].computations, 1)
+
+        # columns are projected from each chunk
+        replayed_chunks = get_chunks(chunk_count=3, cache_columns=['value'])
+        self.assertEqual([list(c.columns) for c in replayed_chunks], [['value']] * 3)
+        # generators without chunks are cached too
+        self.assertEqual(list(get_chunks(chunk_count=0)), [])
+        self.assertEqual(list(get_chunks(chunk_count=0)), [])
+        self.assertEqual(len(self.produced_chunks), 3)
+
+    def test_partly_consumed_generator(self) -> None:
+        get_chunks = self._get_chunks(local_cacher=LocalCacher(cache_dir=self.cache_dir))
+        chunks = get_chunks(chunk_count=3)
+        _ = next(chunks)
+        chunks.close()
+        # generator entry is not written before generator is exhausted
+        self.assertEqual(len(list(get_chunks(chunk_count=3))), 3)
+        self.assertEqual(self.produced_chunks, [0, 0, 1, 2])
+        self.assertEqual(len(list(get_chunks(chunk_count=3))), 3)
+        self.assertEqual(len(self.produced_chunks), 4)
+
+    def test_evicted_chunk(self) -> None:
+        get_chunks = self._get_chunks(local_cacher=LocalCacher(cache_dir=self.cache_dir))
+        _ = list(get_chunks(chunk_count=2))
+        chunk_meta_data_file_name = [n for n in os.listdir(self.cache_dir) if n.endswith('-chunk-1-meta.json')][0]
+        os.remove(os.path.join(self.cache_dir, chunk_meta_data_file_name))
+        # missing chunks are a miss of the whole generator
+        self.assertEqual(len(list(get_chunks(chunk_count=2))), 2)
+        self.assertEqual(self.produced_chunks, [0, 1, 0, 1])
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
@@ -0,0 +1,131 @@
+import dataclasses
+import datetime
+import os
+import pytest
+import pandas as pd
+from tests.temp_dir_test_case import TempDirTestCase
+from app_lib.utils.local_cacher import (
+    DATETIME_FORMAT_STR,
+    CacheInstrumentation,
+    DataFrameCacheHandler,
+    LocalCacher,
+    LoggingMetricsSink,
+    MetaData,
+    ObjectCacheHandler,
+    ParquetCacheHandler,
+    PrometheusMetricsSink,
+)
+
+try:
+    import prometheus_client
+    PROMETHEUS_CLIENT_IS_INSTALLED = True
+except ImportError:
+    PROMETHEUS_CLIENT_IS_INSTALLED = False
+
+
+class TestInstrumentation(TempDirTestCase):
+    # pylint: disable=unexpected-keyword-arg
+    def test_counters(self) -> None:
+        instrumentation = CacheInstrumentation()
+        local_cacher = LocalCacher(cache_dir=self.cache_dir, instrumentation=instrumentation)
+
+        @local_cacher
+        def f(
+                x: int,
+                use_cache: bool = True,  # pylint: disable=unused-argument
+        ) -> pd.DataFrame:
+            return pd.DataFrame({'x': [x] * 3})
+
+        @local_cacher
+        def g(use_cache: bool = True) -> int:  # pylint: disable=unused-argument
+            return 1
+
+        _ = f(x=1)
+        _ = f(x=1)
+        _ = f(x=1, cache_columns=['x'])
+        _ = f.map([{'x': 1}, {'x': 2}])  # type: ignore[attr-defined]
+        _ = g()
+        snapshot = instrumentation.snapshot()
+
+        f_counters = snapshot.function_counters['f']
+        self.assertEqual(f_counters.hits, 3)
+        self.assertEqual(f_counters.misses, 2)
+        self.assertEqual(f_counters.expirations, 0)
+        self.assertEqual(f_counters.computations, 2)
+        self.assertGreater(f_counters.bytes_written, 0)
+        self.assertEqual(f_counters.bytes_read, 3 * f_counters.bytes_written // 2)
+        self.assertGreater(f_counters.key_hashing_seconds, 0)
+        self.assertGreater(f_counters.deserialize_seconds, 0)
+        self.assertGreater(f_counters.serialize_seconds, 0)
+        self.assertGreater(f_counters.compute_seconds, 0)
+        self.assertEqual(snapshot.function_counters['g'].computations, 1)
+
+        handler_counters = snapshot.handler_counters
+        # frames are written by the parquet handler when pyarrow is installed
+        frame_handler_names = {DataFrameCacheHandler.CACHE_HANDLER_NAME, ParquetCacheHandler.CACHE_HANDLER_NAME}
+        frame_handler_name = (set(handler_counters) & frame_handler_names).pop()
+        self.assertEqual(set(handler_counters), {frame_handler_name, ObjectCacheHandler.CACHE_HANDLER_NAME})
+        self.assertEqual(handler_counters[frame_handler_name].hits, 3)
+        self.assertEqual(handler_counters[frame_handler_name].bytes_written, f_counters.bytes_written)
+        # snapshots do not change
+        _ = g()
+        self.assertEqual(snapshot.function_counters['g'].hits, 0)
+        instrumentation.reset()
+        self.assertEqual(instrumentation.snapshot().function_counters, {})
+
+    def test_expirations(self) -> None:
+        instrumentation = CacheInstrumentation()
+
+        @LocalCacher(cache_dir=self.cache_dir, cache_validity_hours=1, instrumentation=instrumentation)
+        def f(use_cache: bool = True) -> int:  # pylint: disable=unused-argument
+            return 1
+
+        _ = f()
+        # age entry past validity
+        meta_data_file_name = [n for n in os.listdir(self.cache_dir) if n.endswith('-meta.json')][0]
+        meta_data = MetaData.from_disk(
+            canonical_file_prefix=meta_data_file_name[:-len('-meta.json')],
+            cache_dir=self.cache_dir,
+        )
+        write_datetime = datetime.datetime.now() - datetime.timedelta(hours=2)
+        meta_data = dataclasses.replace(meta_data, write_datetime_str=write_datetime.strftime(DATETIME_FORMAT_STR))
+        meta_data.write_to_disk(cache_dir=self.cache_dir)
+        _ = f()
+        f_counters = instrumentation.snapshot().function_counters['f']
+        self.assertEqual(f_counters.misses, 2)
+        self.assertEqual(f_counters.expirations, 1)
+
+    def test_logging_sink(self) -> None:
+        instrumentation = CacheInstrumentation(sinks=[LoggingMetricsSink()])
+
+        @LocalCacher(cache_dir=self.cache_dir, instrumentation=instrumentation)
+        def f(use_cache: bool = True) -> int:  # pylint: disable=unused-argument
+            return 1
+
+        _ = f()
+        with self.assertLogs('app_lib.utils.local_cacher.instrumentation', level='INFO') as logs:
+            instrumentation.emit()
+        # one record for function and one for its handler
+        self.assertEqual(len(logs.records), 2)
+        self.assertIn("'misses': 1", logs.output[0])
+
+    @pytest.mark.skipif(not PROMETHEUS_CLIENT_IS_INSTALLED, reason='prometheus_client not installed')
+    def test_prometheus_sink(self) -> None:
+        registry = prometheus_client.CollectorRegistry()
+        instrumentation = CacheInstrumentation(sinks=[PrometheusMetricsSink(registry=registry)])
+
+        @LocalCacher(cache_dir=self.cache_dir, instrumentation=instrumentation)
+        def f(use_cache: bool = True) -> int:  # pylint: disable=unused-argument
+            return 1
+
+        _ = f()
+        _ = f()
+        # counters are read at scrape time
+        self.assertEqual(registry.get_sample_value('local_cacher_function_hits_total', {'function': 'f'}), 1)
+        self.assertEqual(registry.get_sample_value('local_cacher_function_computations_total', {'function': 'f'}), 1)
+        handler_labels = {'handler': ObjectCacheHandler.CACHE_HANDLER_NAME}
+        self.assertEqual(registry.get_sample_value('local_cacher_handler_hits_total', handler_labels), 1)
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
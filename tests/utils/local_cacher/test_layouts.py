@@ -0,0 +1,106 @@
+from typing import (
+    Any,
+    Callable,
+    List,
+)
+import os
+import pytest
+import numpy as np
+import pandas as pd
+from tests.temp_dir_test_case import TempDirTestCase
+from app_lib.utils.local_cacher import (
+    FLAT_LAYOUT,
+    SHARDED_LAYOUT,
+    LocalCacheException,
+    LocalCacher,
+    StorageConfig,
+)
+
+
+class TestLayouts(TempDirTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.call_count = 0
+
+    def _get_cached_function(self, local_cacher: LocalCacher) -> Callable[..., Any]:
+        @local_cacher
+        def f(
+                x: int,
+                use_cache: bool = True,  # pylint: disable=unused-argument
+        ) -> Any:
+            self.call_count += 1
+            if x % 3 == 0:
+                return pd.DataFrame({'x': [x] * 3})
+            if x % 3 == 1:
+                return np.arange(x)
+            return {'x': x}
+
+        return f
+
+    def _get_entry_file_names(self, sharded: bool) -> List[str]:
+        # files of entries directly in cache_dir or in shard directories
+        entry_file_names: List[str] = []
+        for dir_path, dir_names, file_names in os.walk(self.cache_dir):
+            dir_names[:] = [n for n in dir_names if not n.startswith('.')]
+            if (dir_path != self.cache_dir) == sharded:
+                entry_file_names.extend(n for n in file_names if not n.endswith('.sqlite3') and '.sqlite3-' not in n)
+        return entry_file_names
+
+    # pylint: disable=unexpected-keyword-arg
+    def test_sharded_layout(self) -> None:
+        for use_meta_data_index in [False, True]:
+            self.call_count = 0
+            local_cacher = LocalCacher(
+                cache_dir=self.cache_dir,
+                storage_config=StorageConfig(use_meta_data_index=use_meta_data_index, cache_layout=SHARDED_LAYOUT),
+            )
+            f = self._get_cached_function(local_cacher=local_cacher)
+            for _ in range(2):
+                for x in range(6):
+                    _ = f(x=x)
+            self.assertEqual(self.call_count, 6)
+            self.assertEqual(self._get_entry_file_names(sharded=False), [])
+            self.assertGreater(len(self._get_entry_file_names(sharded=True)), 0)
+            LocalCacher.clear_cache(cache_dir=self.cache_dir, use_meta_data_index=use_meta_data_index)
+            self.assertEqual(self._get_entry_file_names(sharded=True), [])
+
+        with self.assertRaises(LocalCacheException):
+            LocalCacher(cache_dir=self.cache_dir, storage_config=StorageConfig(cache_layout='nested'))
+
+    def test_migrate_to_sharded_layout(self) -> None:
+        for use_meta_data_index in [False, True]:
+            self.call_count = 0
+            f = self._get_cached_function(local_cacher=LocalCacher(
+                cache_dir=self.cache_dir,
+                storage_config=StorageConfig(use_meta_data_index=use_meta_data_index, cache_layout=FLAT_LAYOUT),
+            ))
+            for x in range(6):
+                _ = f(x=x)
+            self.assertEqual(self._get_entry_file_names(sharded=True), [])
+
+            migrated_count = LocalCacher.migrate_to_sharded_layout(
+                cache_dir=self.cache_dir,
+                use_meta_data_index=use_meta_data_index,
+            )
+            self.assertEqual(migrated_count, 6)
+            self.assertEqual(self._get_entry_file_names(sharded=False), [])
+            # migrated entries are read by cachers of either layout
+            for cache_layout in [FLAT_LAYOUT, SHARDED_LAYOUT]:
+                f = self._get_cached_function(local_cacher=LocalCacher(
+                    cache_dir=self.cache_dir,
+                    storage_config=StorageConfig(use_meta_data_index=use_meta_data_index, cache_layout=cache_layout),
+                ))
+                pd.testing.assert_frame_equal(f(x=3), pd.DataFrame({'x': [3] * 3}))
+                np.testing.assert_array_equal(f(x=4), np.arange(4))
+                self.assertEqual(f(x=5), {'x': 5})
+            self.assertEqual(self.call_count, 6)
+            migrated_count = LocalCacher.migrate_to_sharded_layout(
+                cache_dir=self.cache_dir,
+                use_meta_data_index=use_meta_data_index,
+            )
+            self.assertEqual(migrated_count, 0)
+            LocalCacher.clear_cache(cache_dir=self.cache_dir, use_meta_data_index=use_meta_data_index)
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
@@ -0,0 +1,80 @@
+import pytest
+import pandas as pd
+from tests.temp_dir_test_case import TempDirTestCase
+from app_lib.utils.local_cacher import (
+    CacheInstrumentation,
+    HandlerConfig,
+    LazyDataFrame,
+    LocalCacher,
+)
+from app_lib.utils.local_cacher.cache_handlers import PYARROW_IS_INSTALLED
+
+
+class TestLazyFrames(TempDirTestCase):
+    # pylint: disable=unexpected-keyword-arg
+    @pytest.mark.skipif(not PYARROW_IS_INSTALLED, reason='pyarrow not installed')
+    def test_lazy_frames(self) -> None:
+        instrumentation = CacheInstrumentation()
+        local_cacher = LocalCacher(
+            cache_dir=self.cache_dir,
+            handler_config=HandlerConfig(lazy_frames=True),
+            instrumentation=instrumentation,
+        )
+
+        @local_cacher
+        def f(use_cache: bool = True) -> pd.DataFrame:  # pylint: disable=unused-argument
+            return pd.DataFrame({'a': [1, 2, 3], 'b': ['x', 'y', 'z']})
+
+        expected_frame = f()
+        self.assertIsInstance(expected_frame, pd.DataFrame)
+        frame = f()
+        self.assertIsInstance(frame, LazyDataFrame)
+        # schema is read from meta data
+        self.assertEqual(frame.shape, (3, 2))
+        self.assertEqual(len(frame), 3)
+        self.assertEqual(list(frame.columns), ['a', 'b'])
+        self.assertEqual(list(frame.dtypes), list(expected_frame.dtypes))
+        self.assertFalse(frame.empty)
+        self.assertIn('a', frame)
+        self.assertFalse(frame.is_loaded)
+        # hit is counted before frame is read
+        self.assertEqual(instrumentation.snapshot().function_counters['f'].hits, 1)
+        self.assertEqual(instrumentation.snapshot().function_counters['f'].deserialize_seconds, 0)
+        self.assertEqual(local_cacher.get_tier_stats()['disk'].hits, 1)
+
+        # frame is read on first data access
+        self.assertEqual(frame['a'].tolist(), [1, 2, 3])
+        self.assertTrue(frame.is_loaded)
+        self.assertEqual(frame.sum(numeric_only=True)['a'], 6)
+        pd.testing.assert_frame_equal(frame.load(), expected_frame)
+        self.assertGreater(instrumentation.snapshot().function_counters['f'].deserialize_seconds, 0)
+        self.assertEqual(instrumentation.snapshot().function_counters['f'].hits, 1)
+
+        # proxies are not DataFrame instances and have no operators
+        self.assertNotIsInstance(frame, pd.DataFrame)
+        with self.assertRaises(TypeError):
+            _ = frame + 1
+        pd.testing.assert_frame_equal(frame.load()[['a']] + 1, expected_frame[['a']] + 1)
+
+        # column reads are lazy too
+        frame = f(cache_columns=['b'])
+        self.assertEqual(frame.shape, (3, 1))
+        pd.testing.assert_frame_equal(frame.load(), expected_frame[['b']])
+
+    def test_eager_frames(self) -> None:
+        # frames without recorded schema are read eagerly
+        @LocalCacher(cache_dir=self.cache_dir, handler_config=HandlerConfig(lazy_frames=True))
+        def f(use_cache: bool = True) -> pd.DataFrame:  # pylint: disable=unused-argument
+            return pd.DataFrame({0: [1, 2, 3]})
+
+        @LocalCacher(cache_dir=self.cache_dir, handler_config=HandlerConfig(lazy_frames=True))
+        def g(use_cache: bool = True) -> int:  # pylint: disable=unused-argument
+            return 1
+
+        for _ in range(2):
+            self.assertIsInstance(f(), pd.DataFrame)
+            self.assertEqual(g(), 1)
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
@@ -0,0 +1,135 @@
+from typing import (
+    Any,
+    Dict,
+    List,
+)
+import dataclasses
+import datetime
+import pytest
+import pandas as pd
+from tests.temp_dir_test_case import TempDirTestCase
+from app_lib.utils.local_cacher import (
+    DATETIME_FORMAT_STR,
+    HandlerConfig,
+    LazyDataFrame,
+    LocalCacher,
+    SqliteMetaDataStore,
+    StorageConfig,
+    TierConfig,
+)
+
+
+class TestLookupMany(TempDirTestCase):
+    # pylint: disable=unexpected-keyword-arg
+    def _test_lookup_many(self, local_cacher: LocalCacher) -> None:
+        call_counter = []
+
+        @local_cacher
+        def f(
+                x: int,
+                use_cache: bool = True,  # pylint: disable=unused-argument
+        ) -> pd.DataFrame:
+            call_counter.append(x)
+            return pd.DataFrame({'x': [x] * 3, 'y': [2 * x] * 3})
+
+        for x in [0, 2, 4]:
+            _ = f(x=x)
+        list_of_kwargs: List[Dict[str, Any]] = [
+            {'x': x} for x in range(6)
+        ] + [{'x': 2}, {'x': 2, 'cache_columns': ['y']}, {'x': 4, 'use_cache': False}]
+        lookup = f.lookup_many(list_of_kwargs)  # type: ignore[attr-defined]
+        # misses are not computed
+        self.assertEqual(call_counter, [0, 2, 4])
+        self.assertEqual(sorted(lookup.hits), [0, 2, 4, 6, 7])
+        for i in [0, 2, 4, 6]:
+            x = list_of_kwargs[i]['x']
+            self.assertFramesEqual(lookup.hits[i], pd.DataFrame({'x': [x] * 3, 'y': [2 * x] * 3}))
+        self.assertFramesEqual(lookup.hits[7], pd.DataFrame({'y': [4] * 3}))
+        self.assertEqual(lookup.missing_indices, [1, 3, 5, 8])
+        self.assertEqual(lookup.missing_kwargs, [{'x': 1}, {'x': 3}, {'x': 5}, {'x': 4, 'use_cache': False}])
+
+        # missing calls are computed and looked up on cacher
+        _ = f.map(lookup.missing_kwargs)  # type: ignore[attr-defined]
+        lookup = local_cacher.lookup_many(func=f, list_of_kwargs=list_of_kwargs, max_workers=2)
+        self.assertEqual(sorted(lookup.hits), [0, 1, 2, 3, 4, 5, 6, 7])
+        self.assertEqual(lookup.missing_kwargs, [{'x': 4, 'use_cache': False}])
+        self.assertFramesEqual(lookup.hits[5], pd.DataFrame({'x': [5] * 3, 'y': [10] * 3}))
+
+    def test_lookup_many(self) -> None:
+        self._test_lookup_many(local_cacher=LocalCacher(cache_dir=self.cache_dir))
+
+    def test_lookup_many_index(self) -> None:
+        self._test_lookup_many(local_cacher=LocalCacher(
+            cache_dir=self.cache_dir,
+            storage_config=StorageConfig(use_meta_data_index=True),
+        ))
+        # hits are recorded in index. x=4 was written again by the call not using the cache
+        meta_data_store = SqliteMetaDataStore(cache_dir=self.cache_dir)
+        hit_counts = [
+            entry_stats.hit_count for entry_stats in [
+                meta_data_store.get_entry_stats(canonical_file_prefix=m.canonical_file_prefix)
+                for m in meta_data_store.get_all_meta_data()
+            ] if entry_stats is not None
+        ]
+        self.assertEqual(sorted(hit_counts), [1, 1, 1, 1, 2, 2])
+
+    def test_lookup_many_memory_tier(self) -> None:
+        local_cacher = LocalCacher(cache_dir=self.cache_dir, tier_config=TierConfig(memory_budget_bytes=10**6))
+
+        @local_cacher
+        def f(
+                x: int,
+                use_cache: bool = True,  # pylint: disable=unused-argument
+        ) -> Dict[str, int]:
+            return {'x': x}
+
+        _ = f(x=1)
+        self.assertEqual(local_cacher.lookup_many(func=f, list_of_kwargs=[{'x': 1}]).hits, {0: {'x': 1}})
+        tier_stats = local_cacher.get_tier_stats()
+        self.assertEqual(tier_stats['memory'].hits, 1)
+        self.assertEqual(tier_stats['disk'].hits, 0)
+
+    def test_lookup_many_expired(self) -> None:
+        local_cacher = LocalCacher(
+            cache_dir=self.cache_dir,
+            cache_validity_hours=1,
+            storage_config=StorageConfig(use_meta_data_index=True),
+        )
+
+        @local_cacher
+        def f(
+                x: int,
+                use_cache: bool = True,  # pylint: disable=unused-argument
+        ) -> int:
+            return x
+
+        for x in range(2):
+            _ = f(x=x)
+        meta_data_store = SqliteMetaDataStore(cache_dir=self.cache_dir)
+        meta_data = [m for m in meta_data_store.get_all_meta_data() if m.function_name == 'f']
+        expired_meta_data = dataclasses.replace(
+            meta_data[0],
+            write_datetime_str=(datetime.datetime.now() - datetime.timedelta(hours=2)).strftime(DATETIME_FORMAT_STR),
+        )
+        meta_data_store.write_meta_data(meta_data=expired_meta_data)
+        lookup = local_cacher.lookup_many(func=f, list_of_kwargs=[{'x': 0}, {'x': 1}])
+        self.assertEqual(len(lookup.hits), 1)
+        self.assertEqual(len(lookup.missing_kwargs), 1)
+
+    def test_lookup_many_lazy_frames(self) -> None:
+        @LocalCacher(cache_dir=self.cache_dir, handler_config=HandlerConfig(lazy_frames=True))
+        def f(
+                x: int,
+                use_cache: bool = True,  # pylint: disable=unused-argument
+        ) -> pd.DataFrame:
+            return pd.DataFrame({'x': [x] * 3})
+
+        _ = f(x=1)
+        lookup = f.lookup_many([{'x': 1}])  # type: ignore[attr-defined]
+        self.assertIsInstance(lookup.hits[0], LazyDataFrame)
+        self.assertFalse(lookup.hits[0].is_loaded)
+        self.assertFramesEqual(lookup.hits[0].load(), pd.DataFrame({'x': [1] * 3}))
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
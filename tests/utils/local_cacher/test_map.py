@@ -0,0 +1,110 @@
+from typing import (
+    Any,
+    Dict,
+    List,
+)
+import concurrent.futures
+import multiprocessing
+import os
+import shutil
+import tempfile
+import threading
+import pytest
+import pandas as pd
+from tests.base_test_case import BaseTestCase
+from tests.temp_dir_test_case import TempDirTestCase
+from app_lib.utils.local_cacher import LocalCacher
+
+WORKER_COUNT = 4
+# process pools pickle decorated functions by name so they are decorated at module level
+PROCESS_POOL_CACHE_DIR = os.path.join(tempfile.gettempdir(), 'test_local_cacher_map')
+
+
+@LocalCacher(cache_dir=PROCESS_POOL_CACHE_DIR)
+def _get_frame(
+        x: int,
+        use_cache: bool = True,  # pylint: disable=unused-argument
+) -> pd.DataFrame:
+    return pd.DataFrame({'x': [x] * 3, 'pid': [os.getpid()] * 3})
+
+
+class TestMap(TempDirTestCase):
+    # pylint: disable=unexpected-keyword-arg
+    def test_map(self) -> None:
+        call_counter = []
+        call_counter_lock = threading.Lock()
+
+        @LocalCacher(cache_dir=self.cache_dir)
+        def f(
+                x: int,
+                use_cache: bool = True,  # pylint: disable=unused-argument
+        ) -> pd.DataFrame:
+            with call_counter_lock:
+                call_counter.append(x)
+            return pd.DataFrame({'x': [x] * 3, 'y': [2 * x] * 3})
+
+        _ = f(x=0)
+        xs = [x % 5 for x in range(10)]
+        list_of_kwargs: List[Dict[str, Any]] = [{'x': x} for x in xs]
+        list_of_kwargs.append({'x': 1, 'cache_columns': ['y']})
+        results = f.map(list_of_kwargs)  # type: ignore[attr-defined]
+        # results are in order. hits and repeated kwargs are not recomputed
+        self.assertEqual(len(results), len(list_of_kwargs))
+        for x, result in zip(xs, results):
+            self.assertFramesEqual(result, pd.DataFrame({'x': [x] * 3, 'y': [2 * x] * 3}))
+        self.assertFramesEqual(results[-1], pd.DataFrame({'y': [2] * 3}))
+        self.assertEqual(sorted(call_counter), [0, 1, 2, 3, 4])
+        # misses were written back
+        results = f.map([{'x': x} for x in range(5)])  # type: ignore[attr-defined]
+        self.assertEqual(sorted(call_counter), [0, 1, 2, 3, 4])
+        # refreshes recompute
+        _ = f.map([{'x': 0, 'use_cache': False}])  # type: ignore[attr-defined]
+        self.assertEqual(sorted(call_counter), [0, 0, 1, 2, 3, 4])
+
+    def test_failed_computation(self) -> None:
+        @LocalCacher(cache_dir=self.cache_dir)
+        def f(
+                x: int,
+                use_cache: bool = True,  # pylint: disable=unused-argument
+        ) -> int:
+            if x == 2:
+                raise ValueError('computation failed')
+            return x
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=1) as executor:
+            with self.assertRaises(ValueError):
+                f.map([{'x': x} for x in range(4)], executor=executor)  # type: ignore[attr-defined]
+        self.assertEqual(f(x=1), 1)
+
+    def test_uncached(self) -> None:
+        @LocalCacher(cache_dir=self.cache_dir, disable_cache=True)
+        def f(x: int, use_cache: bool = True) -> Any:  # pylint: disable=unused-argument
+            return x
+
+        self.assertEqual(f.map([{'x': 1}, {'x': 1}]), [1, 1])  # type: ignore[attr-defined]
+        self.assertEqual(os.listdir(self.cache_dir), [])
+
+
+class TestMapProcessPool(BaseTestCase):
+    def setUp(self) -> None:
+        os.makedirs(PROCESS_POOL_CACHE_DIR, exist_ok=True)
+
+    def tearDown(self) -> None:
+        shutil.rmtree(PROCESS_POOL_CACHE_DIR, ignore_errors=True)
+
+    def test_process_pool(self) -> None:
+        mp_context = multiprocessing.get_context('spawn')
+        list_of_kwargs = [{'x': x} for x in range(8)]
+        with concurrent.futures.ProcessPoolExecutor(max_workers=WORKER_COUNT, mp_context=mp_context) as executor:
+            results = _get_frame.map(list_of_kwargs, executor=executor)  # type: ignore[attr-defined]
+        # misses were computed in worker processes and written by caller
+        for kwargs, result in zip(list_of_kwargs, results):
+            self.assertEqual(list(result['x']), [kwargs['x']] * 3)
+            self.assertNotEqual(result['pid'].iloc[0], os.getpid())
+        cached_results = _get_frame.map(list_of_kwargs)  # type: ignore[attr-defined]
+        for result, cached_result in zip(results, cached_results):
+            self.assertFramesEqual(result, cached_result)
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
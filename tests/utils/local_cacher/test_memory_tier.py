@@ -0,0 +1,122 @@
+from typing import List
+import datetime
+import os
+import pytest
+import pandas as pd
+from tests.temp_dir_test_case import TempDirTestCase
+from app_lib.utils.local_cacher import (
+    DATETIME_FORMAT_STR,
+    HandlerConfig,
+    JsonMetaDataStore,
+    LocalCacher,
+    MemoryCacheTier,
+    MetaData,
+    ObjectCacheHandler,
+    TierConfig,
+)
+from app_lib.utils.local_cacher.memory_tier import estimate_size_bytes
+
+
+def _get_meta_data(
+    canonical_file_prefix: str,
+    hours_old: float = 0,
+) -> MetaData:
+    write_datetime = datetime.datetime.now() - datetime.timedelta(hours=hours_old)
+    meta_data = MetaData(
+        write_datetime_str=write_datetime.strftime(DATETIME_FORMAT_STR),
+        canonical_file_prefix=canonical_file_prefix,
+        cache_handler_name=ObjectCacheHandler.CACHE_HANDLER_NAME,
+        function_source_hash='',
+        kwargs_hash='',
+        function_name='',
+        function_file_location='',
+    )
+    return meta_data
+
+
+class TestMemoryTier(TempDirTestCase):
+    def test_estimate_size_bytes(self) -> None:
+        frame = pd.DataFrame({'a': range(1000)})
+        self.assertEqual(estimate_size_bytes(frame), frame.memory_usage(deep=True).sum())
+        self.assertGreater(estimate_size_bytes(list(range(1000))), estimate_size_bytes([1]))
+        # size of written entries is used instead of pickling objects again
+        self.assertEqual(estimate_size_bytes(list(range(1000)), written_size_bytes=10), 10)
+        self.assertEqual(estimate_size_bytes(frame, written_size_bytes=10), frame.memory_usage(deep=True).sum())
+
+    def test_lru_budget(self) -> None:
+        memory_tier = MemoryCacheTier(budget_bytes=30)
+        memory_tier.put(meta_data=_get_meta_data('a'), cachable_object='a', size_bytes=10)
+        memory_tier.put(meta_data=_get_meta_data('b'), cachable_object='b', size_bytes=10)
+        memory_tier.put(meta_data=_get_meta_data('c'), cachable_object='c', size_bytes=10)
+        # touch a so that b is least recently used
+        self.assertEqual(memory_tier.get('a', cache_validity_hours=1), (True, 'a'))
+        memory_tier.put(meta_data=_get_meta_data('d'), cachable_object='d', size_bytes=10)
+        self.assertEqual(memory_tier.get('b', cache_validity_hours=1), (False, None))
+        self.assertEqual(memory_tier.get('c', cache_validity_hours=1), (True, 'c'))
+        self.assertEqual(memory_tier.size_bytes, 30)
+        self.assertEqual(memory_tier.stats.evictions, 1)
+
+        # objects larger than budget are not held
+        memory_tier.put(meta_data=_get_meta_data('e'), cachable_object='e', size_bytes=31)
+        self.assertEqual(memory_tier.get('e', cache_validity_hours=1), (False, None))
+        self.assertEqual(len(memory_tier), 3)
+
+    def test_validity(self) -> None:
+        memory_tier = MemoryCacheTier(budget_bytes=100)
+        memory_tier.put(meta_data=_get_meta_data('old', hours_old=2), cachable_object=None, size_bytes=1)
+        memory_tier.put(meta_data=_get_meta_data('new'), cachable_object=None, size_bytes=1)
+        self.assertEqual(memory_tier.get('old', cache_validity_hours=1), (False, None))
+        self.assertEqual(memory_tier.get('new', cache_validity_hours=1), (True, None))
+        self.assertEqual(len(memory_tier), 1)
+        self.assertEqual(memory_tier.stats.hits, 1)
+        self.assertEqual(memory_tier.stats.misses, 1)
+
+    def test_local_cacher_memory_tier(self) -> None:
+        local_cacher = LocalCacher(cache_dir=self.cache_dir, tier_config=TierConfig(memory_budget_bytes=10**6))
+
+        @local_cacher
+        def f(
+                x: int,
+                use_cache: bool = True,  # pylint: disable=unused-argument
+        ) -> pd.DataFrame:
+            return pd.DataFrame({'x': [x] * 3})
+
+        expected_result = pd.DataFrame({'x': [1] * 3})
+        self.assertFramesEqual(f(x=1), expected_result)
+        # hot key is served from memory even when disk entry is gone
+        for file_name in os.listdir(self.cache_dir):
+            if os.path.isfile(os.path.join(self.cache_dir, file_name)):
+                os.remove(os.path.join(self.cache_dir, file_name))
+        self.assertFramesEqual(f(x=1), expected_result)
+
+        tier_stats = local_cacher.get_tier_stats()
+        self.assertEqual(tier_stats['memory'].hits, 1)
+        self.assertEqual(tier_stats['memory'].misses, 1)
+        self.assertEqual(tier_stats['disk'].misses, 1)
+        self.assertEqual(tier_stats['disk'].hits, 0)
+
+    def test_written_size_bytes(self) -> None:
+        local_cacher = LocalCacher(
+            cache_dir=self.cache_dir,
+            handler_config=HandlerConfig(compression_codec='zlib'),
+            tier_config=TierConfig(memory_budget_bytes=10**6),
+        )
+
+        @local_cacher
+        def f(
+                x: int,
+                use_cache: bool = True,  # pylint: disable=unused-argument
+        ) -> List[int]:
+            return [x] * 10000
+
+        _ = f(x=1)
+        # objects written to disk are sized by their entry instead of being pickled again
+        all_meta_data = JsonMetaDataStore(cache_dir=self.cache_dir).get_all_meta_data()
+        memory_tier = local_cacher.entries.tiers.memory_tier
+        assert memory_tier is not None
+        self.assertEqual(memory_tier.size_bytes, all_meta_data[0].size_bytes)
+        self.assertLess(memory_tier.size_bytes, estimate_size_bytes([1] * 10000))
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
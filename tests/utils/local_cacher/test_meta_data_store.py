@@ -0,0 +1,117 @@
+from typing import Any
+import datetime
+import os
+import pytest
+from tests.temp_dir_test_case import TempDirTestCase
+from app_lib.utils.local_cacher import (
+    DATETIME_FORMAT_STR,
+    LocalCacher,
+    MetaData,
+    ObjectCacheHandler,
+    SqliteMetaDataStore,
+    StorageConfig,
+)
+from app_lib.utils.local_cacher.meta_data_store import META_DATA_INDEX_FILE_NAME
+
+
+def _get_meta_data(
+    canonical_file_prefix: str,
+    hours_old: float = 0,
+    function_name: str = 'f',
+) -> MetaData:
+    write_datetime = datetime.datetime.now() - datetime.timedelta(hours=hours_old)
+    meta_data = MetaData(
+        write_datetime_str=write_datetime.strftime(DATETIME_FORMAT_STR),
+        canonical_file_prefix=canonical_file_prefix,
+        cache_handler_name=ObjectCacheHandler.CACHE_HANDLER_NAME,
+        function_source_hash='',
+        kwargs_hash='',
+        function_name=function_name,
+        function_file_location='',
+    )
+    return meta_data
+
+
+class TestMetaDataStore(TempDirTestCase):
+    def test_sqlite_meta_data_store(self) -> None:
+        meta_data_store = SqliteMetaDataStore(cache_dir=self.cache_dir)
+        fresh_meta_data = _get_meta_data(canonical_file_prefix='fresh', function_name='f')
+        old_meta_data = _get_meta_data(canonical_file_prefix='old', hours_old=10, function_name='g')
+        meta_data_store.write_meta_data(meta_data=fresh_meta_data, size_bytes=11)
+        meta_data_store.write_meta_data(meta_data=old_meta_data, size_bytes=22)
+        assert os.path.exists(os.path.join(self.cache_dir, META_DATA_INDEX_FILE_NAME))
+
+        self.assertEqual(meta_data_store.get_meta_data(canonical_file_prefix='fresh'), fresh_meta_data)
+        self.assertIsNone(meta_data_store.get_meta_data(canonical_file_prefix='missing'))
+
+        # validity respects write time
+        valid_meta_data = meta_data_store.get_valid_meta_data(canonical_file_prefix='fresh', cache_validity_hours=1)
+        self.assertEqual(valid_meta_data, fresh_meta_data)
+        self.assertIsNone(meta_data_store.get_valid_meta_data(canonical_file_prefix='old', cache_validity_hours=1))
+
+        # indexed sweeps and per function queries
+        self.assertEqual(meta_data_store.get_expired_meta_data(cache_validity_hours=1), [old_meta_data])
+        self.assertEqual(meta_data_store.get_function_meta_data(function_name='f'), [fresh_meta_data])
+
+        # hits are recorded
+        meta_data_store.record_hit(canonical_file_prefix='fresh')
+        meta_data_store.record_hit(canonical_file_prefix='fresh')
+        entry_stats = meta_data_store.get_entry_stats(canonical_file_prefix='fresh')
+        assert entry_stats is not None
+        self.assertEqual(entry_stats.hit_count, 2)
+        self.assertEqual(entry_stats.size_bytes, 11)
+        self.assertGreaterEqual(entry_stats.last_access_timestamp, fresh_meta_data.get_write_timestamp())
+
+        meta_data_store.delete_meta_data(meta_data=old_meta_data)
+        self.assertEqual(meta_data_store.get_all_meta_data(), [fresh_meta_data])
+
+    def test_local_cacher_with_index(self) -> None:
+        call_counter = []
+
+        @LocalCacher(cache_dir=self.cache_dir, storage_config=StorageConfig(use_meta_data_index=True))
+        def f(
+                x: int,
+                use_cache: bool = True,  # pylint: disable=unused-argument
+        ) -> int:
+            call_counter.append(x)
+            return 2 * x
+
+        self.assertEqual(f(x=1), 2)
+        self.assertEqual(f(x=1), 2)
+        self.assertEqual(call_counter, [1])
+        # no per entry meta data files are written
+        file_names = os.listdir(self.cache_dir)
+        self.assertEqual([n for n in file_names if n.endswith('-meta.json')], [])
+
+        meta_data_store = SqliteMetaDataStore(cache_dir=self.cache_dir)
+        function_meta_data = meta_data_store.get_function_meta_data(function_name='f')
+        self.assertEqual(len(function_meta_data), 1)
+        entry_stats = meta_data_store.get_entry_stats(canonical_file_prefix=function_meta_data[0].canonical_file_prefix)
+        assert entry_stats is not None
+        self.assertEqual(entry_stats.hit_count, 1)
+        self.assertGreater(entry_stats.size_bytes, 0)
+
+        LocalCacher.clear_cache(cache_dir=self.cache_dir, use_meta_data_index=True)
+        self.assertEqual(meta_data_store.get_all_meta_data(), [])
+        self.assertEqual([n for n in os.listdir(self.cache_dir) if n.endswith('.pkl')], [])
+
+    def test_migrate_meta_data_to_index(self) -> None:
+        @LocalCacher(cache_dir=self.cache_dir)
+        def g(
+                x: Any,
+                use_cache: bool = True,  # pylint: disable=unused-argument
+        ) -> Any:
+            return x
+
+        _ = g(x=1)
+        _ = g(x=2)
+        migrated_count = LocalCacher.migrate_meta_data_to_index(cache_dir=self.cache_dir, delete_json_files=True)
+        self.assertEqual(migrated_count, 2)
+        self.assertEqual([n for n in os.listdir(self.cache_dir) if n.endswith('-meta.json')], [])
+
+        meta_data_store = SqliteMetaDataStore(cache_dir=self.cache_dir)
+        self.assertEqual(len(meta_data_store.get_function_meta_data(function_name='g')), 2)
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
@@ -0,0 +1,95 @@
+from typing import (
+    Any,
+    Dict,
+    List,
+)
+import pytest
+import pandas as pd
+from tests.temp_dir_test_case import TempDirTestCase
+from app_lib.utils.local_cacher import (
+    CONCAT_PARTITIONS,
+    MERGE_PARTITIONS,
+    LocalCacheException,
+    LocalCacher,
+    PartitionSpec,
+)
+
+
+class TestPartitions(TempDirTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.computed_ids: List[List[int]] = []
+
+    # pylint: disable=unexpected-keyword-arg
+    def test_concat_partitions(self) -> None:
+        local_cacher = LocalCacher(cache_dir=self.cache_dir)
+
+        @local_cacher.cache_partitions(partition_kwarg='ids', combine=CONCAT_PARTITIONS, partition_column='id')
+        def load_metrics(
+                ids: List[int],
+                scale: int = 1,
+                use_cache: bool = True,  # pylint: disable=unused-argument
+        ) -> pd.DataFrame:
+            self.computed_ids.append(list(ids))
+            # id 0 has no rows
+            rows = [(i, j * scale) for i in ids for j in range(i)]
+            return pd.DataFrame(rows, columns=['id', 'value'])
+
+        def get_expected(ids: List[int], scale: int = 1) -> pd.DataFrame:
+            rows = [(i, j * scale) for i in ids for j in range(i)]
+            return pd.DataFrame(rows, columns=['id', 'value'])
+
+        pd.testing.assert_frame_equal(load_metrics(ids=[1, 2]), get_expected([1, 2]))
+        # only missing items are computed in one call. results follow requested order
+        pd.testing.assert_frame_equal(load_metrics(ids=[3, 2, 0, 1]), get_expected([3, 2, 0, 1]))
+        pd.testing.assert_frame_equal(load_metrics(ids=[0, 3, 3]), get_expected([0, 3]))
+        self.assertEqual(self.computed_ids, [[1, 2], [3, 0]])
+
+        # other kwargs are cached separately
+        pd.testing.assert_frame_equal(load_metrics(ids=[2], scale=2), get_expected([2], scale=2))
+        self.assertEqual(self.computed_ids[2:], [[2]])
+        # refresh recomputes requested items
+        _ = load_metrics(ids=[1, 2], use_cache=False)
+        self.assertEqual(self.computed_ids[3:], [[1, 2]])
+        frame = load_metrics(ids=[1, 2], cache_columns=['value'])
+        self.assertEqual(list(frame.columns), ['value'])
+        self.assertEqual(len(self.computed_ids), 4)
+        # empty requests are not cached
+        _ = load_metrics(ids=[])
+        self.assertEqual(self.computed_ids[4:], [[]])
+
+    def test_merge_partitions(self) -> None:
+        @LocalCacher(cache_dir=self.cache_dir).cache_partitions(partition_kwarg='ids', combine=MERGE_PARTITIONS)
+        def load_names(
+                ids: List[int],
+                use_cache: bool = True,  # pylint: disable=unused-argument
+        ) -> Dict[int, Any]:
+            self.computed_ids.append(list(ids))
+            # unknown ids are left out
+            return {i: 'name_{}'.format(i) for i in ids if i > 0}
+
+        self.assertEqual(load_names(ids=[1, 0]), {1: 'name_1'})
+        self.assertEqual(load_names(ids=[2, 0, 1]), {2: 'name_2', 1: 'name_1'})
+        self.assertEqual(self.computed_ids, [[1, 0], [2]])
+
+    def test_invalid_partitions(self) -> None:
+        with self.assertRaises(LocalCacheException):
+            PartitionSpec(partition_kwarg='ids', combine='sum')
+        with self.assertRaises(LocalCacheException):
+            PartitionSpec(partition_kwarg='ids', combine=CONCAT_PARTITIONS)
+        local_cacher = LocalCacher(cache_dir=self.cache_dir)
+        with self.assertRaises(LocalCacheException):
+            @local_cacher.cache_partitions(partition_kwarg='ids', combine=MERGE_PARTITIONS)
+            def f(use_cache: bool = True) -> Dict[int, Any]:  # pylint: disable=unused-argument
+                return {}
+
+        @local_cacher.cache_partitions(partition_kwarg='ids', combine=MERGE_PARTITIONS)
+        def g(ids: List[int], use_cache: bool = True) -> List[int]:  # pylint: disable=unused-argument
+            return ids
+
+        with self.assertRaises(LocalCacheException):
+            g(ids=[1])
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
@@ -0,0 +1,129 @@
+from typing import Any
+import os
+import uuid
+import pytest
+import pandas as pd
+from tests.temp_dir_test_case import TempDirTestCase
+from app_lib.utils.local_cacher import (
+    LocalCacher,
+    RayObjectStoreTier,
+    TierConfig,
+)
+
+try:
+    import ray
+    RAY_IS_INSTALLED = True
+except ImportError:
+    RAY_IS_INSTALLED = False
+
+RAY_NAMESPACE = 'local_cacher_test'
+
+
+@pytest.mark.skipif(not RAY_IS_INSTALLED, reason='ray not installed')
+class TestRayObjectStoreTier(TempDirTestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        # local head node started by the test process
+        ray.init(num_cpus=2, include_dashboard=False, namespace=RAY_NAMESPACE)
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        ray.shutdown()
+
+    def setUp(self) -> None:
+        super().setUp()
+        # registries are detached actors. each test uses its own
+        self.registry_name = 'registry-{}'.format(uuid.uuid4().hex)
+
+    def tearDown(self) -> None:
+        ray.kill(ray.get_actor(self.registry_name, namespace=RAY_NAMESPACE))
+
+    def _get_ray_object_store_tier(self) -> RayObjectStoreTier:
+        return RayObjectStoreTier(registry_name=self.registry_name, namespace=RAY_NAMESPACE, max_object_count=2)
+
+    # pylint: disable=unexpected-keyword-arg
+    def test_object_store_tier(self) -> None:
+        call_counter = []
+
+        def f(
+                x: int,
+                use_cache: bool = True,  # pylint: disable=unused-argument
+        ) -> pd.DataFrame:
+            call_counter.append(x)
+            return pd.DataFrame({'x': [x] * 3, 'y': [2 * x] * 3})
+
+        local_cacher = LocalCacher(
+            cache_dir=self.cache_dir,
+            tier_config=TierConfig(ray_object_store_tier=self._get_ray_object_store_tier()),
+        )
+        # other worker with its own cache directory
+        other_cache_dir = os.path.join(self.cache_dir, 'other')
+        os.makedirs(other_cache_dir)
+        other_local_cacher = LocalCacher(
+            cache_dir=other_cache_dir,
+            tier_config=TierConfig(ray_object_store_tier=self._get_ray_object_store_tier()),
+        )
+        cached_f = local_cacher(f)
+        other_cached_f = other_local_cacher(f)
+
+        expected_result = pd.DataFrame({'x': [1] * 3, 'y': [2] * 3})
+        self.assertFramesEqual(cached_f(x=1), expected_result)
+        # published result is fetched from object store without disk or recomputation
+        self.assertFramesEqual(other_cached_f(x=1), expected_result)
+        self.assertFramesEqual(other_cached_f(x=1, cache_columns=['y']), expected_result[['y']])
+        self.assertEqual(call_counter, [1])
+        self.assertEqual(os.listdir(other_cache_dir), [])
+        self.assertEqual(other_local_cacher.get_tier_stats()['ray'].hits, 2)
+
+        # least recently used objects are released. disk stays the durable tier
+        _ = cached_f(x=2)
+        _ = cached_f(x=3)
+        self.assertEqual(len(local_cacher.tier_config.ray_object_store_tier), 2)  # type: ignore[arg-type]
+        self.assertFramesEqual(cached_f(x=1), expected_result)
+        self.assertEqual(call_counter, [1, 2, 3])
+        self.assertEqual(local_cacher.get_tier_stats()['disk'].hits, 1)
+
+    def test_expired_objects(self) -> None:
+        call_counter = []
+
+        @LocalCacher(
+            cache_dir=self.cache_dir,
+            cache_validity_hours=0,
+            tier_config=TierConfig(ray_object_store_tier=self._get_ray_object_store_tier()),
+        )
+        def f(use_cache: bool = True) -> int:  # pylint: disable=unused-argument
+            call_counter.append(1)
+            return len(call_counter)
+
+        self.assertEqual(f(), 1)
+        self.assertEqual(f(), 2)
+
+    def test_run_misses_on_ray(self) -> None:
+        local_cacher = LocalCacher(
+            cache_dir=self.cache_dir,
+            tier_config=TierConfig(
+                ray_object_store_tier=self._get_ray_object_store_tier(),
+                run_misses_on_ray=True,
+                ray_remote_options={'num_cpus': 1},
+            ),
+        )
+
+        @local_cacher
+        def f(
+                x: int,
+                use_cache: bool = True,  # pylint: disable=unused-argument
+        ) -> Any:
+            return {'x': x, 'pid': os.getpid()}
+
+        result = f(x=1)
+        # computed in a ray worker and cached by caller
+        self.assertNotEqual(result['pid'], os.getpid())
+        self.assertEqual(f(x=1), result)
+        results = f.map([{'x': x} for x in range(3)])  # type: ignore[attr-defined]
+        self.assertEqual([r['x'] for r in results], [0, 1, 2])
+        self.assertEqual(results[1], result)
+        self.assertEqual(local_cacher.get_tier_stats()['ray'].hits, 2)
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
@@ -0,0 +1,188 @@
+from typing import (
+    Any,
+    List,
+)
+import os
+import shutil
+import socket
+import subprocess
+import tempfile
+import threading
+import time
+import pytest
+import numpy as np
+import pandas as pd
+from tests.temp_dir_test_case import TempDirTestCase
+from app_lib.utils.local_cacher import (
+    LocalCacheException,
+    LocalCacher,
+    RedisStorageBackend,
+    RefreshConfig,
+    StorageConfig,
+)
+
+try:
+    import redis
+    REDIS_IS_INSTALLED = True
+except ImportError:
+    REDIS_IS_INSTALLED = False
+
+REDIS_SERVER_PATH = shutil.which('redis-server')
+REDIS_START_TIMEOUT_SECONDS = 10
+CALLER_COUNT = 4
+
+
+def _get_free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind(('127.0.0.1', 0))
+        port: int = s.getsockname()[1]
+    return port
+
+
+@pytest.mark.skipif(not REDIS_IS_INSTALLED or REDIS_SERVER_PATH is None, reason='redis or redis-server not installed')
+class TestRedisStorageBackend(TempDirTestCase):
+    redis_process: 'subprocess.Popen[bytes]'
+    redis_port: int
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        # throwaway local redis-server without persistence
+        cls.redis_port = _get_free_port()
+        cls.redis_process = subprocess.Popen(  # pylint: disable=consider-using-with
+            [str(REDIS_SERVER_PATH), '--port', str(cls.redis_port), '--save', '', '--appendonly', 'no'],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        redis_client = redis.Redis(port=cls.redis_port)
+        start_time = time.time()
+        while True:
+            try:
+                redis_client.ping()
+                break
+            except redis.ConnectionError:
+                if time.time() - start_time > REDIS_START_TIMEOUT_SECONDS:
+                    raise
+                time.sleep(0.05)
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        cls.redis_process.terminate()
+        cls.redis_process.wait()
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.redis_client = redis.Redis(port=self.redis_port)
+        self.redis_client.flushall()
+
+    def _get_local_cacher(self, **kwargs: Any) -> LocalCacher:
+        # each local cacher stands in for a replica with its own cache directory
+        local_cacher = LocalCacher(
+            cache_dir=tempfile.mkdtemp(dir=self.cache_dir),
+            storage_config=StorageConfig(storage_backend=RedisStorageBackend(redis_client=self.redis_client)),
+            **kwargs,
+        )
+        return local_cacher
+
+    # pylint: disable=unexpected-keyword-arg
+    def test_shared_entries(self) -> None:
+        call_counter = []
+        local_cachers = [self._get_local_cacher(), self._get_local_cacher()]
+
+        def f(
+                x: int,
+                use_cache: bool = True,  # pylint: disable=unused-argument
+        ) -> Any:
+            call_counter.append(x)
+            if x == 0:
+                return pd.DataFrame({'a': [1, 2], 'b': ['x', 'y']})
+            if x == 1:
+                return np.arange(5)
+            return {'x': x}
+
+        cached_functions = [local_cacher(f) for local_cacher in local_cachers]
+        for x in range(3):
+            _ = cached_functions[0](x=x)
+        # entries written by one replica are hits on the other
+        self.assertFramesEqual(cached_functions[1](x=0), pd.DataFrame({'a': [1, 2], 'b': ['x', 'y']}))
+        self.assertFramesEqual(cached_functions[1](x=0, cache_columns=['b']), pd.DataFrame({'b': ['x', 'y']}))
+        np.testing.assert_array_equal(cached_functions[1](x=1), np.arange(5))
+        self.assertEqual(cached_functions[1](x=2), {'x': 2})
+        self.assertEqual(call_counter, [0, 1, 2])
+        # nothing is written to cache directories
+        for local_cacher in local_cachers:
+            self.assertEqual(os.listdir(local_cacher.cache_dir), [])
+
+        # refresh replaces entry
+        _ = cached_functions[1](x=2, use_cache=False)
+        self.assertEqual(cached_functions[0](x=2), {'x': 2})
+        self.assertEqual(call_counter, [0, 1, 2, 2])
+
+    def test_lookup_many(self) -> None:
+        @self._get_local_cacher()
+        def f(
+                x: int,
+                use_cache: bool = True,  # pylint: disable=unused-argument
+        ) -> int:
+            return x
+
+        for x in range(3):
+            _ = f(x=x)
+        lookup = f.lookup_many([{'x': x} for x in range(5)])  # type: ignore[attr-defined]
+        self.assertEqual(lookup.hits, {0: 0, 1: 1, 2: 2})
+        self.assertEqual(lookup.missing_kwargs, [{'x': 3}, {'x': 4}])
+
+    def test_ttl(self) -> None:
+        @self._get_local_cacher(cache_validity_hours=1, refresh_config=RefreshConfig(max_staleness_hours=1))
+        def f(use_cache: bool = True) -> int:  # pylint: disable=unused-argument
+            return 1
+
+        _ = f()
+        entry_keys = self.redis_client.keys('local_cacher:entry:*')
+        self.assertEqual(len(entry_keys), 1)
+        # entries are kept while they may be served stale
+        ttl_seconds = self.redis_client.ttl(entry_keys[0])
+        self.assertGreater(ttl_seconds, 60 * 60)
+        self.assertLessEqual(ttl_seconds, 2 * 60 * 60)
+
+    def test_single_flight(self) -> None:
+        call_counter = []
+        results: List[int] = []
+        barrier = threading.Barrier(CALLER_COUNT)
+
+        def f(use_cache: bool = True) -> int:  # pylint: disable=unused-argument
+            call_counter.append(1)
+            time.sleep(0.2)
+            return 1
+
+        # separate replicas only share the redis lease lock
+        cached_functions = [self._get_local_cacher()(f) for _ in range(CALLER_COUNT)]
+
+        def _call(i: int) -> None:
+            barrier.wait()
+            results.append(cached_functions[i]())
+
+        threads = [threading.Thread(target=_call, args=(i, )) for i in range(CALLER_COUNT)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(results, [1] * CALLER_COUNT)
+        self.assertEqual(len(call_counter), 1)
+
+    def test_lock_lease(self) -> None:
+        storage_backend = RedisStorageBackend(redis_client=self.redis_client, lock_lease_seconds=0.2)
+        # lock of a holder that never releases expires with its lease
+        _ = storage_backend.acquire_lock(canonical_file_prefix='p')
+        start_time = time.time()
+        lock = storage_backend.acquire_lock(canonical_file_prefix='p')
+        self.assertGreater(time.time() - start_time, 0.1)
+        storage_backend.release_lock(lock=lock)
+        self.assertEqual(self.redis_client.keys('local_cacher:lock:*'), [])
+
+    def test_decoded_responses(self) -> None:
+        with self.assertRaises(LocalCacheException):
+            RedisStorageBackend(redis_client=redis.Redis(port=self.redis_port, decode_responses=True))
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
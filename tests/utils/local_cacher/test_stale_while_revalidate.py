@@ -0,0 +1,113 @@
+import asyncio
+import threading
+import pytest
+from tests.temp_dir_test_case import TempDirTestCase
+from app_lib.utils.local_cacher import (
+    LocalCacher,
+    RefreshConfig,
+)
+
+WAIT_SECONDS = 10
+
+
+class TestStaleWhileRevalidate(TempDirTestCase):
+    def test_stale_while_revalidate(self) -> None:
+        call_counter = []
+        refresh_may_finish = threading.Event()
+        # every entry is stale as soon as it is written
+        local_cacher = LocalCacher(
+            cache_dir=self.cache_dir,
+            cache_validity_hours=0,
+            refresh_config=RefreshConfig(max_staleness_hours=1),
+        )
+
+        @local_cacher
+        def f(
+                x: int,
+                use_cache: bool = True,  # pylint: disable=unused-argument
+        ) -> int:
+            call_counter.append(x)
+            if len(call_counter) > 1:
+                assert refresh_may_finish.wait(timeout=WAIT_SECONDS)
+            return len(call_counter)
+
+        self.assertEqual(f(x=1), 1)
+        # stale value is returned while refresh is blocked
+        self.assertEqual(f(x=1), 1)
+        self.assertEqual(f(x=1), 1)
+        refresh_may_finish.set()
+        local_cacher.wait_for_refreshes(timeout_seconds=WAIT_SECONDS)
+        # single refresh replaced entry
+        self.assertEqual(call_counter, [1, 1])
+        self.assertEqual(f(x=1), 2)
+        local_cacher.wait_for_refreshes(timeout_seconds=WAIT_SECONDS)
+        self.assertEqual(local_cacher.get_tier_stats()['disk'].stale_hits, 3)
+
+        # entries past max staleness are recomputed in the caller
+        strict_call_counter = []
+
+        @LocalCacher(
+            cache_dir=self.cache_dir,
+            cache_validity_hours=0,
+            refresh_config=RefreshConfig(max_staleness_hours=0),
+        )
+        def g(use_cache: bool = True) -> int:  # pylint: disable=unused-argument
+            strict_call_counter.append(1)
+            return len(strict_call_counter)
+
+        self.assertEqual(g(), 1)
+        self.assertEqual(g(), 2)
+
+    def test_failed_refresh(self) -> None:
+        call_counter = []
+        local_cacher = LocalCacher(
+            cache_dir=self.cache_dir,
+            cache_validity_hours=0,
+            refresh_config=RefreshConfig(max_staleness_hours=1),
+        )
+
+        @local_cacher
+        def f(use_cache: bool = True) -> int:  # pylint: disable=unused-argument
+            call_counter.append(1)
+            if len(call_counter) > 1:
+                raise ValueError('refresh failed')
+            return 1
+
+        self.assertEqual(f(), 1)
+        with self.assertLogs('app_lib.utils.local_cacher.refresh', level='ERROR'):
+            self.assertEqual(f(), 1)
+            local_cacher.wait_for_refreshes(timeout_seconds=WAIT_SECONDS)
+        # stale entry is still served
+        self.assertEqual(f(), 1)
+        local_cacher.wait_for_refreshes(timeout_seconds=WAIT_SECONDS)
+
+    def test_coroutine_function(self) -> None:
+        call_counter = []
+        local_cacher = LocalCacher(
+            cache_dir=self.cache_dir,
+            cache_validity_hours=0,
+            refresh_config=RefreshConfig(max_staleness_hours=1),
+        )
+
+        @local_cacher
+        async def f(use_cache: bool = True) -> int:  # pylint: disable=unused-argument
+            call_counter.append(1)
+            return len(call_counter)
+
+        async def _run() -> None:
+            self.assertEqual(await f(), 1)
+            self.assertEqual(await f(), 1)
+            # refresh task runs on the loop and replaces entry
+            return_value = 1
+            for _ in range(100):
+                await asyncio.sleep(0.01)
+                return_value = await f()
+                if return_value > 1:
+                    break
+            self.assertGreater(return_value, 1)
+
+        asyncio.run(_run())
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
@@ -0,0 +1,165 @@
+from typing import (
+    Any,
+    List,
+    Tuple,
+)
+import datetime
+import pytest
+import pandas as pd
+from tests.temp_dir_test_case import TempDirTestCase
+from app_lib.utils.local_cacher import (
+    LocalCacheException,
+    LocalCacher,
+)
+from app_lib.utils.local_cacher.time_ranges import (
+    combine_segment_frames,
+    get_missing_intervals,
+)
+
+
+class TestTimeRanges(TempDirTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.computed_ranges: List[Tuple[Any, Any]] = []
+
+    def _get_prices(self, local_cacher: LocalCacher, max_segments: int = 32) -> Any:
+        @local_cacher.cache_time_ranges(
+            start_kwarg='start_date',
+            end_kwarg='end_date',
+            time_column='date',
+            max_segments=max_segments,
+        )
+        def get_prices(
+                ticker: str,
+                start_date: datetime.date,
+                end_date: datetime.date,
+                use_cache: bool = True,  # pylint: disable=unused-argument
+        ) -> pd.DataFrame:
+            self.computed_ranges.append((start_date, end_date))
+            dates = pd.date_range(start_date, end_date, freq='D')
+            return pd.DataFrame({'date': dates, 'ticker': ticker, 'price': [d.day for d in dates]})
+
+        return get_prices
+
+    @staticmethod
+    def _get_expected_prices(ticker: str, start_date: datetime.date, end_date: datetime.date) -> pd.DataFrame:
+        dates = pd.date_range(start_date, end_date, freq='D')
+        return pd.DataFrame({'date': dates, 'ticker': ticker, 'price': [d.day for d in dates]})
+
+    # pylint: disable=unexpected-keyword-arg
+    def test_incremental_ranges(self) -> None:
+        get_prices = self._get_prices(local_cacher=LocalCacher(cache_dir=self.cache_dir))
+        day = datetime.date(2021, 1, 1)
+        week_later = day + datetime.timedelta(days=7)
+
+        frame = get_prices(ticker='a', start_date=day, end_date=week_later)
+        pd.testing.assert_frame_equal(frame, self._get_expected_prices('a', day, week_later), check_dtype=False)
+        self.assertEqual(self.computed_ranges, [(day, week_later)])
+
+        # extending range computes only appended days. rows on shared bound are not duplicated
+        next_day = week_later + datetime.timedelta(days=1)
+        frame = get_prices(ticker='a', start_date=day, end_date=next_day)
+        pd.testing.assert_frame_equal(frame, self._get_expected_prices('a', day, next_day), check_dtype=False)
+        self.assertEqual(self.computed_ranges[1:], [(week_later, next_day)])
+
+        # sub ranges are served from cache
+        sub_start = day + datetime.timedelta(days=2)
+        frame = get_prices(ticker='a', start_date=sub_start, end_date=next_day)
+        pd.testing.assert_frame_equal(frame, self._get_expected_prices('a', sub_start, next_day), check_dtype=False)
+        self.assertEqual(len(self.computed_ranges), 2)
+
+        # other kwargs are other series
+        _ = get_prices(ticker='b', start_date=day, end_date=day)
+        self.assertEqual(self.computed_ranges[2:], [(day, day)])
+
+        # columns are projected
+        frame = get_prices(ticker='a', start_date=day, end_date=next_day, cache_columns=['price'])
+        self.assertEqual(list(frame.columns), ['price'])
+        self.assertEqual(len(self.computed_ranges), 3)
+
+    def test_gaps(self) -> None:
+        get_prices = self._get_prices(local_cacher=LocalCacher(cache_dir=self.cache_dir))
+        days = [datetime.date(2021, 1, 1) + datetime.timedelta(days=i) for i in range(20)]
+        _ = get_prices(ticker='a', start_date=days[0], end_date=days[5])
+        _ = get_prices(ticker='a', start_date=days[10], end_date=days[15])
+        frame = get_prices(ticker='a', start_date=days[0], end_date=days[19])
+        pd.testing.assert_frame_equal(frame, self._get_expected_prices('a', days[0], days[19]), check_dtype=False)
+        self.assertEqual(self.computed_ranges[2:], [(days[5], days[10]), (days[15], days[19])])
+
+        # refresh recomputes whole range
+        _ = get_prices(ticker='a', start_date=days[0], end_date=days[19], use_cache=False)
+        self.assertEqual(self.computed_ranges[4:], [(days[0], days[19])])
+        _ = get_prices(ticker='a', start_date=days[0], end_date=days[19])
+        self.assertEqual(len(self.computed_ranges), 5)
+
+    def test_coalesced_segments(self) -> None:
+        get_prices = self._get_prices(local_cacher=LocalCacher(cache_dir=self.cache_dir), max_segments=2)
+        days = [datetime.date(2021, 1, 1) + datetime.timedelta(days=i) for i in range(10)]
+        for i in range(0, 8, 2):
+            _ = get_prices(ticker='a', start_date=days[i], end_date=days[i + 1])
+        frame = get_prices(ticker='a', start_date=days[0], end_date=days[9])
+        pd.testing.assert_frame_equal(frame, self._get_expected_prices('a', days[0], days[9]), check_dtype=False)
+        computed_count = len(self.computed_ranges)
+        frame = get_prices(ticker='a', start_date=days[1], end_date=days[8])
+        pd.testing.assert_frame_equal(frame, self._get_expected_prices('a', days[1], days[8]), check_dtype=False)
+        self.assertEqual(len(self.computed_ranges), computed_count)
+
+    def test_invalid_time_ranges(self) -> None:
+        local_cacher = LocalCacher(cache_dir=self.cache_dir)
+        get_prices = self._get_prices(local_cacher=local_cacher)
+        with self.assertRaises(LocalCacheException):
+            get_prices(ticker='a', start_date=datetime.date(2021, 1, 2), end_date=datetime.date(2021, 1, 1))
+        with self.assertRaises(LocalCacheException):
+            @local_cacher.cache_time_ranges(start_kwarg='start', end_kwarg='end', time_column='date')
+            def f(start: int, use_cache: bool = True) -> pd.DataFrame:  # pylint: disable=unused-argument
+                return pd.DataFrame({'date': [start]})
+
+    def test_duplicate_rows(self) -> None:
+        @LocalCacher(cache_dir=self.cache_dir).cache_time_ranges(
+            start_kwarg='start',
+            end_kwarg='end',
+            time_column='t',
+        )
+        def get_ticks(start: int, end: int, use_cache: bool = True) -> pd.DataFrame:  # pylint: disable=unused-argument
+            self.computed_ranges.append((start, end))
+            # two identical ticks at each time
+            return pd.DataFrame({'t': [t for t in range(start, end + 1) for _ in range(2)], 'x': 1})
+
+        def get_expected_ticks(start: int, end: int) -> pd.DataFrame:
+            return pd.DataFrame({'t': [t for t in range(start, end + 1) for _ in range(2)], 'x': 1})
+
+        # single segment results are returned as read
+        self.assertFramesEqual(get_ticks(start=0, end=5), get_expected_ticks(start=0, end=5))
+        self.assertFramesEqual(get_ticks(start=0, end=5), get_expected_ticks(start=0, end=5))
+        # duplicate rows on and off shared bounds are kept
+        self.assertFramesEqual(get_ticks(start=0, end=9), get_expected_ticks(start=0, end=9))
+        self.assertFramesEqual(get_ticks(start=3, end=9), get_expected_ticks(start=3, end=9))
+        self.assertEqual(self.computed_ranges, [(0, 5), (5, 9)])
+
+    def test_combine_segment_frames(self) -> None:
+        def get_frame(start: int, end: int) -> pd.DataFrame:
+            return pd.DataFrame({'t': list(range(start, end + 1))})
+
+        segment_frames = [(4, 8, get_frame(4, 8)), (0, 4, get_frame(0, 4)), (2, 6, get_frame(2, 6))]
+        frame = combine_segment_frames(segment_frames=segment_frames, time_column='t', start=1, end=7)
+        self.assertEqual(frame['t'].tolist(), list(range(1, 8)))
+        # single segment within range is not copied
+        single_frame = get_frame(0, 4).set_index(pd.Index(list('abcde')))
+        frame = combine_segment_frames(segment_frames=[(0, 4, single_frame)], time_column='t', start=0, end=4)
+        self.assertIs(frame, single_frame)
+
+    def test_get_missing_intervals(self) -> None:
+        self.assertEqual(get_missing_intervals(start=0, end=10, covered_intervals=[]), [(0, 10)])
+        self.assertEqual(get_missing_intervals(start=0, end=10, covered_intervals=[(0, 10)]), [])
+        self.assertEqual(get_missing_intervals(start=2, end=8, covered_intervals=[(0, 10)]), [])
+        self.assertEqual(
+            get_missing_intervals(start=0, end=10, covered_intervals=[(6, 8), (2, 4)]),
+            [(0, 2), (4, 6), (8, 10)],
+        )
+        self.assertEqual(get_missing_intervals(start=0, end=10, covered_intervals=[(-5, 0)]), [(0, 10)])
+        self.assertEqual(get_missing_intervals(start=5, end=5, covered_intervals=[]), [(5, 5)])
+        self.assertEqual(get_missing_intervals(start=5, end=5, covered_intervals=[(5, 5)]), [])
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
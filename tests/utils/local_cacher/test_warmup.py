@@ -0,0 +1,150 @@
+from typing import (
+    Any,
+    List,
+)
+import os
+import pickle
+import tempfile
+import time
+import pytest
+from tests.temp_dir_test_case import TempDirTestCase
+from app_lib.utils.local_cacher import (
+    CallManifest,
+    LocalCacher,
+    ManifestCall,
+    flush_call_manifests,
+    get_call_manifest,
+    warm_up_from_manifest,
+)
+
+# warmup workers import decorated functions by name so they are decorated at module level
+WARMUP_DIR = os.path.join(tempfile.gettempdir(), 'test_local_cacher_warmup')
+CACHE_DIR = os.path.join(WARMUP_DIR, 'cache')
+MANIFEST_PATH = os.path.join(WARMUP_DIR, 'manifest.jsonl')
+CALLS_FILE_PATH = os.path.join(WARMUP_DIR, 'calls.txt')
+
+
+@LocalCacher(cache_dir=CACHE_DIR, call_manifest_path=MANIFEST_PATH)
+def _get_value(
+        x: Any,
+        use_cache: bool = True,  # pylint: disable=unused-argument
+) -> Any:
+    with open(CALLS_FILE_PATH, 'a', encoding='utf8') as calls_file:
+        calls_file.write('{}\n'.format(os.getpid()))
+    return x
+
+
+@LocalCacher(cache_dir=CACHE_DIR, call_manifest_path=MANIFEST_PATH)
+def _get_value_without_default(x: Any, use_cache: bool) -> Any:  # pylint: disable=unused-argument
+    with open(CALLS_FILE_PATH, 'a', encoding='utf8') as calls_file:
+        calls_file.write('{}\n'.format(os.getpid()))
+    return x
+
+
+def _get_call_pids() -> List[int]:
+    if not os.path.exists(CALLS_FILE_PATH):
+        return []
+    with open(CALLS_FILE_PATH, 'r', encoding='utf8') as calls_file:
+        return [int(line) for line in calls_file]
+
+
+class TestWarmup(TempDirTestCase):
+    fixed_temp_dir = WARMUP_DIR
+
+    def setUp(self) -> None:
+        super().setUp()
+        # counts recorded by a test are flushed before its directory is removed
+        self.addCleanup(flush_call_manifests)
+
+    # pylint: disable=unexpected-keyword-arg
+    def test_call_manifest(self) -> None:
+        # hits are recorded with misses so frequent calls are replayed first
+        for x in [1, 2, 1, 1]:
+            _ = _get_value(x=x)
+        _ = _get_value.map([{'x': 2}, {'x': 3}])  # type: ignore[attr-defined]
+        _ = _get_value(x=1, use_cache=False)
+        # unhashable kwargs are not recorded
+        _ = _get_value(x=[1])
+        # counts are held in memory until flushed
+        call_manifest = get_call_manifest(manifest_path=MANIFEST_PATH)
+        self.assertIs(call_manifest, get_call_manifest(manifest_path=MANIFEST_PATH))
+        self.assertEqual(call_manifest.get_calls_by_frequency(), [])
+        flush_call_manifests()
+        calls_by_frequency = call_manifest.get_calls_by_frequency()
+        self.assertEqual([count for _, count in calls_by_frequency], [4, 2, 1])
+        self.assertEqual(calls_by_frequency[0][0].function_path, '{}:_get_value'.format(__name__))
+        self.assertEqual(calls_by_frequency[0][0].use_cache_kwarg, 'use_cache')
+
+        # compaction keeps frequencies
+        self.assertEqual(call_manifest.compact(), 3)
+        self.assertEqual(call_manifest.get_calls_by_frequency(), calls_by_frequency)
+
+    def test_manifest_flush(self) -> None:
+        # lines are about 90 bytes
+        call_manifest = CallManifest(manifest_path=MANIFEST_PATH, flush_seconds=0.2, max_size_bytes=400, max_calls=2)
+        for x in range(3):
+            for _ in range(x + 1):
+                call_manifest.record_call(function_path='m:f', full_kwargs={'x': x}, use_cache_kwarg='use_cache')
+        # timer thread flushes recorded counts
+        for _ in range(300):
+            if os.path.exists(MANIFEST_PATH):
+                break
+            time.sleep(0.01)
+        self.assertEqual([count for _, count in call_manifest.get_calls_by_frequency()], [3, 2, 1])
+        # manifests past max_size_bytes are compacted to the most frequent calls
+        for _ in range(3):
+            call_manifest.record_call(function_path='m:f', full_kwargs={'x': 0}, use_cache_kwarg='use_cache')
+            call_manifest.flush()
+        self.assertEqual([count for _, count in call_manifest.get_calls_by_frequency()], [4, 3])
+        with open(MANIFEST_PATH, 'r', encoding='utf8') as f:
+            self.assertEqual(len(f.readlines()), 2)
+
+    def test_warm_up_from_manifest(self) -> None:
+        for x in [1, 2, 1]:
+            _ = _get_value(x=x)
+        _ = _get_value(x=1, use_cache=False)
+        LocalCacher.clear_cache(cache_dir=CACHE_DIR)
+        os.remove(CALLS_FILE_PATH)
+        # recorded counts are flushed before replaying
+        self.assertEqual(warm_up_from_manifest(manifest_path=MANIFEST_PATH, max_workers=2), 2)
+        # calls were computed by warmup workers and are cached
+        self.assertEqual(len(_get_call_pids()), 2)
+        self.assertNotIn(os.getpid(), _get_call_pids())
+        self.assertEqual(_get_value(x=1), 1)
+        self.assertEqual(_get_value(x=2), 2)
+        self.assertEqual(len(_get_call_pids()), 2)
+        # warmup calls are not recorded again. hits of this process are
+        flush_call_manifests()
+        calls_by_frequency = CallManifest(manifest_path=MANIFEST_PATH).get_calls_by_frequency()
+        self.assertEqual([count for _, count in calls_by_frequency], [4, 2])
+        self.assertEqual(pickle.loads(calls_by_frequency[0][0].kwargs_bytes), {'x': 1})
+
+    def test_warm_up_without_use_cache_default(self) -> None:
+        _ = _get_value_without_default(x=1, use_cache=True)
+        LocalCacher.clear_cache(cache_dir=CACHE_DIR)
+        os.remove(CALLS_FILE_PATH)
+        # use_cache kwarg is not recorded and is passed as True when replayed
+        self.assertEqual(warm_up_from_manifest(manifest_path=MANIFEST_PATH, max_workers=1), 1)
+        self.assertEqual(len(_get_call_pids()), 1)
+        self.assertNotIn(os.getpid(), _get_call_pids())
+        self.assertEqual(_get_value_without_default(x=1, use_cache=True), 1)
+        self.assertEqual(len(_get_call_pids()), 1)
+
+    def test_failed_warmup(self) -> None:
+        # function removed since calls were recorded
+        manifest_call = ManifestCall(
+            function_path='{}:_removed_function'.format(__name__),
+            kwargs_bytes=b'',
+            use_cache_kwarg='use_cache',
+        )
+        # pylint: disable=protected-access
+        call_manifest = CallManifest(manifest_path=MANIFEST_PATH)
+        call_manifest._append_lines(lines=[CallManifest._to_line(manifest_call=manifest_call, count=1)])
+        _ = _get_value(x=1)
+        with self.assertLogs('app_lib.utils.local_cacher.warmup', level='WARNING'):
+            self.assertEqual(warm_up_from_manifest(manifest_path=MANIFEST_PATH, max_workers=1), 1)
+        self.assertEqual(warm_up_from_manifest(manifest_path=os.path.join(WARMUP_DIR, 'missing.jsonl')), 0)
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
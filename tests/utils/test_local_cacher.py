@@ -12,6 +12,7 @@ import pandas as pd
 from tests.base_test_case import BaseTestCase
 from tests.fixtures.simple_function import some_f as other_some_f
 from app_lib.utils.local_cacher import (
+    CallPlan,
     LocalCacher,
     MetaData,
     DATETIME_FORMAT_STR,
@@ -203,6 +204,37 @@ class TestLocalCacher(BaseTestCase):
         )
         self.assertEqual(call_signature_hash_4, call_signature_hash_5)
 
+    def test_call_plan(self) -> None:
+        # call plan must derive the same kwargs and keys as the per-call helpers
+        call_plan = CallPlan.from_function(func=cached_f)
+        self.assertEqual(call_plan.parameter_names, ('x', 'y', CUSTOM_USE_CACHE_KWARG, 'z'))
+        self.assertEqual(call_plan.default_kwargs, {'z': 4})
+        self.assertEqual(call_plan.function_name, 'cached_f')
+        self.assertEqual(call_plan.function_file_location, inspect.getfile(cached_f))
+
+        args = (1, 'a')
+        kwargs = {CUSTOM_USE_CACHE_KWARG: True}
+        full_kwargs = call_plan.get_full_kwargs(passed_args=args, passed_kwargs=kwargs)
+        expected_full_kwargs = LocalCacher._get_full_kwargs(func=cached_f, passed_args=args, passed_kwargs=kwargs)
+        self.assertEqual(full_kwargs, expected_full_kwargs)
+
+        kwargs_hash = call_plan.get_kwargs_hash(
+            full_kwargs=full_kwargs,
+            use_cache_kwarg=CUSTOM_USE_CACHE_KWARG,
+            unhashable_kwargs=[],
+        )
+        # use_cache_kwarg is excluded from hash without mutating kwargs
+        self.assertIn(CUSTOM_USE_CACHE_KWARG, full_kwargs)
+        file_prefix = call_plan.get_canonical_file_prefix(kwargs_hash=kwargs_hash)
+        expected_file_prefix = LocalCacher._get_file_prefix(
+            func=cached_f,
+            passed_args=args,
+            passed_kwargs=kwargs,
+            use_cache_kwarg=CUSTOM_USE_CACHE_KWARG,
+            unhashable_kwargs=[],
+        )
+        self.assertEqual(file_prefix, expected_file_prefix)
+
     def test_get_function_source_hash(self) -> None:
         some_f_source = inspect.getsource(some_f)
         other_some_f_source = inspect.getsource(other_some_f)
@@ -392,10 +424,13 @@ class TestLocalCacher(BaseTestCase):
             if os.path.exists(file_path):
                 os.remove(file_path)
 
-        # verify cache is written
+        # verify cache is written by preferred DataFrame handler
+        frame_cache_handler = LocalCacher._get_cache_handler_from_object(return_object=real_result)
+        frame_file_path = frame_cache_handler.get_cache_file_paths(meta_data=meta_data, cache_dir=LOCAL_CACHE_DIR)[0]
+        files_paths_to_clear.append(frame_file_path)
         returned_result = cached_frame_f(**kwargs)
         self.assertFramesEqual(returned_result, real_result)
-        for file_path in files_paths_to_clear:
+        for file_path in [meta_data_file_path, frame_file_path]:
             assert os.path.exists(file_path)
 
         # verify cache is retreived